@@ -11,10 +11,23 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Caché de usuarios autenticados (0 segundos = deshabilitada)
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 256
+
+    # Hash de contraseñas (bcrypt)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
     # API
     API_V1_PREFIX: str = "/api/v1"
     PROJECT_NAME: str = "Sistema de Reservaciones"
 
+    # Arranque
+    CREATE_TABLES_ON_STARTUP: bool = False
+    MQTT_ENABLED: bool = True
+
     # CORS
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173","http://localhost:4321"]
 
@@ -3,7 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.config import settings
-from app.database import engine, Base
+from app.utils.gzip_request import DescomprimirGzip
 from app.routers import (
     auth,
     reservaciones,
@@ -13,12 +13,9 @@ from app.routers import (
     vision
 )
 
-# Importar servicio MQTT
+# Importar servicio MQTT (el cliente se crea recién en start())
 from app.services.mqtt_service import mqtt_service
 
-# Crear tablas si no existen
-Base.metadata.create_all(bind=engine)
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gestión del ciclo de vida de la aplicación"""
@@ -27,8 +24,17 @@ async def lifespan(app: FastAPI):
     print("Iniciando aplicacion FastAPI...")
     print("=" * 60)
 
+    # Crear tablas solo si se pide explícitamente (el esquema oficial
+    # está en reservationsdb.sql + migrations/)
+    if settings.CREATE_TABLES_ON_STARTUP:
+        from app.database import engine, Base
+        from app import models  # noqa: F401 - registra los modelos en Base.metadata
+        Base.metadata.create_all(bind=engine)
+        print("[DB] Tablas verificadas/creadas")
+
     # Iniciar servicio MQTT
-    mqtt_service.start()
+    if settings.MQTT_ENABLED:
+        mqtt_service.start()
 
     yield
 
@@ -54,8 +60,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Cuerpos comprimidos con gzip (publicador HTTP de vision-artificial)
+app.add_middleware(DescomprimirGzip)
+
 # Registrar routers
 app.include_router(auth.router, prefix=settings.API_V1_PREFIX)
 app.include_router(reservaciones.router, prefix=settings.API_V1_PREFIX)
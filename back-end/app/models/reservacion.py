@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Time, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, String, Date, Time, DateTime, ForeignKey, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -36,4 +36,6 @@ class Reservacion(Base):
             "estado IN ('pendiente', 'confirmada', 'cancelada', 'completada')",
             name='reservaciones_estado_check'
         ),
+        # Índice para la paginación por cursor del listado de administración
+        Index('idx_reservaciones_fecha_hora_id', 'fecha', 'hora', 'id_reserva'),
     )
@@ -12,6 +12,7 @@ class UsuarioAdmin(Base):
     password_hash = Column(String, nullable=False)
     rol = Column(String(30), default="admin")
     is_active = Column(Boolean, default=True, index=True)
+    token_version = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime(timezone=False), default=func.now())
     updated_at = Column(DateTime(timezone=False), default=func.now(), onupdate=func.now())
 
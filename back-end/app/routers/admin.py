@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, and_, or_, tuple_, literal
+from typing import List, Literal
 from datetime import date, datetime
 from app.database import get_db
 from app.models.reservacion import Reservacion
@@ -10,7 +12,10 @@ from app.models.usuario_admin import UsuarioAdmin
 from app.schemas.reservacion import ReservacionWithDetailsResponse, ReservacionUpdate
 from app.schemas.usuario import UsuarioAdminCreate, UsuarioAdminResponse, UsuarioAdminUpdate
 from app.utils.dependencies import get_current_user, get_current_active_superadmin
-from app.utils.security import get_password_hash
+from app.utils.security import get_password_hash_async
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.principal_cache import principal_cache
+from app.services.reservacion_service import iterar_reservaciones_export, generar_csv, generar_ndjson
 
 router = APIRouter(prefix="/admin", tags=["Administración"])
 
@@ -19,28 +24,96 @@ router = APIRouter(prefix="/admin", tags=["Administración"])
 
 @router.get("/reservaciones", response_model=List[ReservacionWithDetailsResponse])
 def listar_reservaciones(
+    response: Response,
     estado: str | None = Query(None, description="Filtrar por estado"),
     fecha: date | None = Query(None, description="Filtrar por fecha"),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, le=100),
+    cursor: str | None = Query(None, description="Cursor de paginación (header X-Next-Cursor de la página anterior)"),
+    skip: int = Query(0, ge=0, description="Obsoleto: usar cursor"),
+    limit: int = Query(100, ge=1, le=100),
     db: Session = Depends(get_db),
     current_user: UsuarioAdmin = Depends(get_current_user)
 ):
     """
     Lista todas las reservaciones con filtros opcionales.
     Requiere autenticación.
+
+    Paginación por cursor: si la página está completa, el header
+    X-Next-Cursor trae el cursor para pedir la siguiente.
     """
-    query = db.query(Reservacion)
+    query = db.query(Reservacion).options(
+        joinedload(Reservacion.mesa).joinedload(Mesa.tipo_mesa)
+    )
 
     if estado:
         query = query.filter(Reservacion.estado == estado)
     if fecha:
         query = query.filter(Reservacion.fecha == fecha)
 
-    reservaciones = query.order_by(Reservacion.fecha.desc(), Reservacion.hora.desc()).offset(skip).limit(limit).all()
+    if cursor:
+        clave = decode_cursor(cursor)
+        if clave is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor de paginación inválido"
+            )
+        query = query.filter(
+            tuple_(Reservacion.fecha, Reservacion.hora, Reservacion.id_reserva) < tuple_(*(literal(valor) for valor in clave))
+        )
+    elif skip:
+        query = query.offset(skip)
+
+    reservaciones = query.order_by(
+        Reservacion.fecha.desc(),
+        Reservacion.hora.desc(),
+        Reservacion.id_reserva.desc()
+    ).limit(limit).all()
+
+    if len(reservaciones) == limit:
+        ultima = reservaciones[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(ultima.fecha, ultima.hora, ultima.id_reserva)
+
     return reservaciones
 
 
+@router.get("/reservaciones/exportar")
+def exportar_reservaciones(
+    formato: Literal["csv", "ndjson"] = Query("csv", description="Formato de exportación"),
+    estado: str | None = Query(None, description="Filtrar por estado"),
+    fecha_desde: date | None = Query(None, description="Fecha inicial (inclusive)"),
+    fecha_hasta: date | None = Query(None, description="Fecha final (inclusive)"),
+    current_user: UsuarioAdmin = Depends(get_current_user)
+):
+    """
+    Exporta el historial de reservaciones en CSV o NDJSON.
+    Las filas se envían a medida que se leen de la base de datos,
+    sin límite de cantidad y con memoria constante.
+    Requiere autenticación.
+    """
+    if fecha_desde and fecha_hasta and fecha_desde > fecha_hasta:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="fecha_desde no puede ser posterior a fecha_hasta"
+        )
+
+    lotes = iterar_reservaciones_export(estado, fecha_desde, fecha_hasta)
+
+    if formato == "csv":
+        contenido = generar_csv(lotes)
+        media_type = "text/csv; charset=utf-8"
+    else:
+        contenido = generar_ndjson(lotes)
+        media_type = "application/x-ndjson"
+
+    return StreamingResponse(
+        contenido,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="reservaciones.{formato}"',
+            "X-Accel-Buffering": "no"  # Deshabilitar buffering en Nginx
+        }
+    )
+
+
 @router.get("/reservaciones/{reservacion_id}", response_model=ReservacionWithDetailsResponse)
 def obtener_reservacion_admin(
     reservacion_id: int,
@@ -143,7 +216,7 @@ def eliminar_reservacion(
 # ===== GESTIÓN DE USUARIOS ADMIN =====
 
 @router.post("/usuarios", response_model=UsuarioAdminResponse, status_code=status.HTTP_201_CREATED)
-def crear_usuario_admin(
+async def crear_usuario_admin(
     usuario_data: UsuarioAdminCreate,
     db: Session = Depends(get_db),
     current_user: UsuarioAdmin = Depends(get_current_active_superadmin)
@@ -152,6 +225,13 @@ def crear_usuario_admin(
     Crea un nuevo usuario administrador.
     Solo accesible para superadmins.
     """
+    # bcrypt en su pool dedicado (503 si está saturado) y la BD en el
+    # threadpool: ningún worker queda bloqueado esperando el hash
+    password_hash = await get_password_hash_async(usuario_data.password)
+    return await run_in_threadpool(_crear_usuario_admin, db, usuario_data, password_hash)
+
+
+def _crear_usuario_admin(db: Session, usuario_data: UsuarioAdminCreate, password_hash: str) -> UsuarioAdmin:
     # Verificar si el email ya existe
     existing_user = db.query(UsuarioAdmin).filter(UsuarioAdmin.email == usuario_data.email).first()
     if existing_user:
@@ -162,7 +242,7 @@ def crear_usuario_admin(
 
     # Crear usuario con password hasheado
     user_dict = usuario_data.model_dump(exclude={"password"})
-    user_dict["password_hash"] = get_password_hash(usuario_data.password)
+    user_dict["password_hash"] = password_hash
 
     nuevo_usuario = UsuarioAdmin(**user_dict)
     db.add(nuevo_usuario)
@@ -188,7 +268,7 @@ def listar_usuarios_admin(
 
 
 @router.put("/usuarios/{usuario_id}", response_model=UsuarioAdminResponse)
-def actualizar_usuario_admin(
+async def actualizar_usuario_admin(
     usuario_id: int,
     usuario_data: UsuarioAdminUpdate,
     db: Session = Depends(get_db),
@@ -198,6 +278,14 @@ def actualizar_usuario_admin(
     Actualiza un usuario administrador.
     Solo accesible para superadmins.
     """
+    password_hash = None
+    if usuario_data.password:
+        password_hash = await get_password_hash_async(usuario_data.password)
+    return await run_in_threadpool(_actualizar_usuario_admin, db, usuario_id, usuario_data, password_hash)
+
+
+def _actualizar_usuario_admin(db: Session, usuario_id: int, usuario_data: UsuarioAdminUpdate,
+                              password_hash: str | None) -> UsuarioAdmin:
     usuario = db.query(UsuarioAdmin).filter(UsuarioAdmin.id_usuario == usuario_id).first()
 
     if not usuario:
@@ -208,9 +296,18 @@ def actualizar_usuario_admin(
 
     update_data = usuario_data.model_dump(exclude_unset=True, exclude={"password"})
 
-    # Si se proporciona password, hashearlo
-    if usuario_data.password:
-        update_data["password_hash"] = get_password_hash(usuario_data.password)
+    # Si se proporcionó password, guardar su hash (calculado en el pool de bcrypt)
+    if password_hash:
+        update_data["password_hash"] = password_hash
+
+    # Cambios de credenciales o permisos invalidan los tokens ya emitidos
+    email_anterior = usuario.email
+    invalida_tokens = bool(usuario_data.password) or any(
+        key in update_data and update_data[key] != getattr(usuario, key)
+        for key in ("email", "rol", "is_active")
+    )
+    if invalida_tokens:
+        update_data["token_version"] = usuario.token_version + 1
 
     for key, value in update_data.items():
         setattr(usuario, key, value)
@@ -218,6 +315,9 @@ def actualizar_usuario_admin(
     db.commit()
     db.refresh(usuario)
 
+    if invalida_tokens:
+        principal_cache.invalidate(email_anterior)
+
     return usuario
 
 
@@ -8,9 +8,9 @@ router = APIRouter(prefix="/auth", tags=["Autenticación"])
 
 
 @router.post("/login", response_model=Token)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     """
     Endpoint para login de usuarios administradores.
     Retorna un token JWT para autenticación.
     """
-    return authenticate_user(db, login_data)
+    return await authenticate_user(db, login_data)
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
 from app.database import get_db
 from app.models.mesa import Mesa
+from app.models.usuario_admin import UsuarioAdmin
 from app.models.tipo_mesa import TipoMesa
 from app.models.reservacion import Reservacion
+from app.services.mqtt_service import mqtt_service
+from app.utils.dependencies import get_current_user
 from datetime import date
 
 # Importamos la función que avisa al frontend
@@ -20,6 +23,21 @@ class DeteccionMesa(BaseModel):
 class ActualizacionEstadoMesas(BaseModel):
     detecciones: List[DeteccionMesa]
 
+class UmbralesDeteccion(BaseModel):
+    """Umbrales del edge (vision-artificial/umbrales.py); solo los que cambian"""
+    confianza_personas: Optional[float] = Field(None, gt=0, le=1)
+    confianza_mesas: Optional[float] = Field(None, gt=0, le=1)
+    min_area_mesa: Optional[int] = Field(None, ge=0)
+    max_area_mesa: Optional[int] = Field(None, gt=0)
+    overlap_persona_mesa: Optional[float] = Field(None, ge=0, le=1)
+
+    @model_validator(mode="after")
+    def validar_areas(self):
+        if (self.min_area_mesa is not None and self.max_area_mesa is not None
+                and self.min_area_mesa >= self.max_area_mesa):
+            raise ValueError("min_area_mesa debe ser menor que max_area_mesa")
+        return self
+
 @router.get("/estado-general")
 def obtener_estado_general(db: Session = Depends(get_db)):
     """
@@ -44,6 +62,42 @@ def obtener_estado_general(db: Session = Depends(get_db)):
 
     return mesas_data
 
+@router.get("/dispositivos")
+def obtener_salud_dispositivos(current_user: UsuarioAdmin = Depends(get_current_user)):
+    """
+    Salud de los dispositivos edge según su telemetría MQTT: FPS, tiempo
+    de inferencia, temperatura y carga de CPU, colas y descartes.
+    Permite detectar cámaras lentas desde el dashboard (solo administradores:
+    expone los IDs, la telemetría y los umbrales de cada dispositivo).
+    """
+    return mqtt_service.salud_dispositivos()
+
+@router.put("/dispositivos/{device_id}/umbrales")
+def actualizar_umbrales_dispositivo(
+    device_id: str,
+    umbrales: UmbralesDeteccion,
+    current_user: UsuarioAdmin = Depends(get_current_user)
+):
+    """
+    Ajusta en caliente los umbrales de detección de un dispositivo edge
+    (confianza, filtros de área de mesas, solapamiento persona-mesa).
+    Se publican retenidos por MQTT: el dispositivo los valida y aplica sin
+    reiniciar ni recargar modelos. Los umbrales vigentes se ven en
+    GET /vision/dispositivos (telemetria.umbrales).
+    """
+    cambios = umbrales.model_dump(exclude_none=True)
+    if not cambios:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No hay umbrales para cambiar")
+
+    try:
+        publicados = mqtt_service.publicar_umbrales(device_id, cambios)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    return {"device_id": device_id, "umbrales": publicados}
+
 @router.post("/actualizar-estado-mesas")
 def actualizar_estado_mesas_vision(
     data: ActualizacionEstadoMesas,
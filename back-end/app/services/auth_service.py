@@ -1,16 +1,31 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from app.models.usuario_admin import UsuarioAdmin
 from app.schemas.auth import LoginRequest, Token
-from app.utils.security import verify_password, create_access_token
+from app.utils.security import (
+    verify_password_async,
+    get_password_hash_async,
+    needs_rehash,
+    create_access_token
+)
 from datetime import timedelta
 from app.config import settings
 
 
-def authenticate_user(db: Session, login_data: LoginRequest) -> Token:
-    user = db.query(UsuarioAdmin).filter(UsuarioAdmin.email == login_data.email).first()
+def _buscar_usuario(db: Session, email: str) -> UsuarioAdmin | None:
+    return db.query(UsuarioAdmin).filter(UsuarioAdmin.email == email).first()
 
-    if not user or not verify_password(login_data.password, user.password_hash):
+
+async def authenticate_user(db: Session, login_data: LoginRequest) -> Token:
+    """
+    Autentica al usuario. La consulta a la BD corre en el threadpool y
+    bcrypt en su pool dedicado, así una ráfaga de logins no bloquea el
+    event loop ni los workers que usan los demás endpoints.
+    """
+    user = await run_in_threadpool(_buscar_usuario, db, login_data.email)
+
+    if not user or not await verify_password_async(login_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos",
@@ -23,9 +38,16 @@ def authenticate_user(db: Session, login_data: LoginRequest) -> Token:
             detail="Usuario inactivo"
         )
 
+    token_data = {"sub": user.email, "rol": user.rol, "ver": user.token_version}
+
+    # Si cambió BCRYPT_ROUNDS, actualizar el hash con la contraseña ya verificada
+    if needs_rehash(user.password_hash):
+        user.password_hash = await get_password_hash_async(login_data.password)
+        await run_in_threadpool(db.commit)
+
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email, "rol": user.rol},
+        data=token_data,
         expires_delta=access_token_expires
     )
 
@@ -3,8 +3,11 @@ Servicio MQTT para recibir detecciones del Edge Device
 y actualizar el estado de las mesas en la base de datos
 """
 
-import paho.mqtt.client as mqtt
 import json
+import threading
+import time
+import zlib
+from collections import deque
 from datetime import datetime, date
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
@@ -17,18 +20,46 @@ from app.models.reservacion import Reservacion, EstadoReservacion
 BROKER_HOST = "100.81.10.77"  # <-- CAMBIAR AQUÍ
 BROKER_PORT = 1883
 TOPIC_OCUPACION = "restaurant/ocupacion"
+TOPIC_OCUPACION_LOTE = "restaurant/ocupacion/lote"  # Cola offline del edge (zlib + JSON)
 TOPIC_DISPOSITIVOS = "restaurant/dispositivos/+/estado"
+TOPIC_TELEMETRIA = "restaurant/telemetria/+"  # Salud de cada edge (FPS, tiempos, CPU)
+TOPIC_CONFIG = "restaurant/config"  # Umbrales de detección por edge: {TOPIC_CONFIG}/{device_id} (retenido)
+
+# Salud de dispositivos (GET /vision/dispositivos)
+TELEMETRIA_VENCIDA_S = 120    # Sin telemetría hace más de esto -> "sin_datos"
+FPS_MINIMO = 2.0              # FPS promedio por debajo -> "lento"
+TEMPERATURA_MAXIMA_C = 75.0   # Por encima -> "caliente" (la Raspberry empieza a bajar frecuencia ~80 °C)
+HISTORIAL_TELEMETRIA = 20     # Muestras por dispositivo para promediar
 # =========================================
 
 class MQTTService:
     """Servicio para gestionar la conexión MQTT y procesar mensajes"""
     
     def __init__(self):
-        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="backend_fastapi")
-        self.client.on_connect = self.on_connect
-        self.client.on_message = self.on_message
-        self.client.on_disconnect = self.on_disconnect
+        # El cliente se construye en start(): importar este módulo no
+        # carga paho ni abre conexiones (scripts, tests, workers)
+        self.client = None
         self.connected = False
+
+        # Vista de salud por dispositivo (se escribe desde el thread de
+        # paho y se lee desde los endpoints)
+        self.dispositivos = {}
+        self._lock_dispositivos = threading.Lock()
+
+        # Último mensaje de configuración retenido por dispositivo (lo
+        # devuelve el broker al suscribirse, también tras un reinicio)
+        self.configs = {}
+        self._lock_configs = threading.Lock()
+
+    def _crear_cliente(self):
+        """Construye el cliente paho y registra los callbacks"""
+        import paho.mqtt.client as mqtt
+
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="backend_fastapi")
+        client.on_connect = self.on_connect
+        client.on_message = self.on_message
+        client.on_disconnect = self.on_disconnect
+        return client
         
     def on_connect(self, client, userdata, flags, rc, properties=None):
         """Callback cuando se conecta al broker"""
@@ -39,11 +70,17 @@ class MQTTService:
 
             # Suscribirse a los topics
             client.subscribe(TOPIC_OCUPACION, qos=1)
+            client.subscribe(TOPIC_OCUPACION_LOTE, qos=1)
             client.subscribe(TOPIC_DISPOSITIVOS, qos=1)
+            client.subscribe(TOPIC_TELEMETRIA, qos=0)
+            client.subscribe(f"{TOPIC_CONFIG}/+", qos=1)
 
             print(f"[SUSCRITO] Topics:")
             print(f"   - {TOPIC_OCUPACION}")
+            print(f"   - {TOPIC_OCUPACION_LOTE}")
             print(f"   - {TOPIC_DISPOSITIVOS}")
+            print(f"   - {TOPIC_TELEMETRIA}")
+            print(f"   - {TOPIC_CONFIG}/+")
             print()
         else:
             self.connected = False
@@ -67,6 +104,20 @@ class MQTTService:
                 estado = message.payload.decode()
                 device_id = topic.split("/")[2]
                 print(f"[DISPOSITIVO] {device_id}: {estado}")
+                self.registrar_estado(device_id, estado)
+                return
+
+            # Telemetría de salud del edge (sin log: llega cada pocos segundos)
+            if topic.startswith("restaurant/telemetria/"):
+                self.registrar_telemetria(topic.split("/")[2], json.loads(message.payload.decode()))
+                return
+
+            # Configuración retenida (la propia o la de otro publicador)
+            if topic.startswith(f"{TOPIC_CONFIG}/"):
+                device_id = topic.split("/")[2]
+                config = json.loads(message.payload.decode()) if message.payload else {}
+                with self._lock_configs:
+                    self.configs[device_id] = config
                 return
             
             # Procesar detecciones de ocupación
@@ -82,14 +133,160 @@ class MQTTService:
                 print(f"   Device: {device_id}")
                 print(f"   Detecciones: {len(detecciones)} mesas")
 
+                # Métricas que algunos edges mandan junto a las detecciones
+                if device_id and payload.get('metadata'):
+                    self.registrar_telemetria(device_id, payload['metadata'], completa=False)
+
                 # Procesar detecciones
                 self.actualizar_estado_mesas(detecciones)
-            
+                return
+
+            # Procesar mensajes acumulados por el edge mientras estuvo sin conexión
+            if topic == TOPIC_OCUPACION_LOTE:
+                mensajes = json.loads(zlib.decompress(message.payload).decode())
+
+                print(f"\n[COLA OFFLINE] {len(mensajes)} mensaje(s) reenviado(s)")
+                if mensajes:
+                    print(f"   Device: {mensajes[0].get('device_id')}")
+                    print(f"   Desde: {mensajes[0].get('timestamp')} hasta: {mensajes[-1].get('timestamp')}")
+
+                # En orden: el estado final es el del último mensaje de cada mesa
+                for payload in mensajes:
+                    self.actualizar_estado_mesas(payload.get('detecciones', []))
+
+        except zlib.error as e:
+            print(f"[ERROR] Error descomprimiendo lote: {e}")
         except json.JSONDecodeError as e:
             print(f"[ERROR] Error decodificando JSON: {e}")
         except Exception as e:
             print(f"[ERROR] Error procesando mensaje: {e}")
     
+    def _dispositivo(self, device_id: str) -> dict:
+        """Registro de salud de un dispositivo (llamar con el lock tomado)"""
+        if device_id not in self.dispositivos:
+            self.dispositivos[device_id] = {
+                "estado": None,
+                "estado_desde": None,
+                "telemetria": {},
+                "recibida": None,
+                "recibida_en": None,
+                "historial_fps": deque(maxlen=HISTORIAL_TELEMETRIA),
+            }
+        return self.dispositivos[device_id]
+
+    def registrar_estado(self, device_id: str, estado: str):
+        """Guarda el estado online/offline publicado por el dispositivo"""
+        with self._lock_dispositivos:
+            dispositivo = self._dispositivo(device_id)
+            if dispositivo["estado"] != estado:
+                dispositivo["estado"] = estado
+                dispositivo["estado_desde"] = datetime.now().isoformat()
+
+    def registrar_telemetria(self, device_id: str, datos: dict, completa: bool = True):
+        """
+        Guarda una muestra de telemetría. Con completa=False (metadata de un
+        mensaje de ocupación) se mezcla con la última muestra en lugar de
+        reemplazarla
+        """
+        with self._lock_dispositivos:
+            dispositivo = self._dispositivo(device_id)
+            if completa:
+                dispositivo["telemetria"] = datos
+            else:
+                dispositivo["telemetria"] = {**dispositivo["telemetria"], **datos}
+            dispositivo["recibida"] = time.monotonic()
+            dispositivo["recibida_en"] = datetime.now().isoformat()
+            if isinstance(datos.get("fps"), (int, float)):
+                dispositivo["historial_fps"].append(datos["fps"])
+
+    def salud_dispositivos(self) -> list:
+        """
+        Vista de salud de todos los dispositivos conocidos: estado,
+        métricas de la última telemetría y un diagnóstico ("ok", "lento",
+        "caliente", "sin_datos" u "offline") con sus motivos
+        """
+        ahora = time.monotonic()
+        with self._lock_dispositivos:
+            copia = {device_id: {**d, "historial_fps": list(d["historial_fps"])}
+                     for device_id, d in self.dispositivos.items()}
+
+        vista = []
+        for device_id, d in sorted(copia.items()):
+            telemetria = d["telemetria"]
+            etapas = telemetria.get("etapas_ms", {})
+            inferencia = etapas.get("personas") or etapas.get("inferencia") or {}
+            fps_promedio = (sum(d["historial_fps"]) / len(d["historial_fps"])
+                            if d["historial_fps"] else None)
+            antiguedad = ahora - d["recibida"] if d["recibida"] is not None else None
+            temperatura = telemetria.get("temperatura_cpu_c")
+
+            motivos = []
+            if d["estado"] == "offline":
+                salud = "offline"
+            elif antiguedad is None or antiguedad > TELEMETRIA_VENCIDA_S:
+                salud = "sin_datos"
+                motivos.append("sin telemetría reciente")
+            else:
+                if fps_promedio is not None and fps_promedio < FPS_MINIMO:
+                    motivos.append(f"FPS promedio {fps_promedio:.1f} < {FPS_MINIMO}")
+                if temperatura is not None and temperatura > TEMPERATURA_MAXIMA_C:
+                    motivos.append(f"CPU a {temperatura} °C")
+                if not motivos:
+                    salud = "ok"
+                elif temperatura is not None and temperatura > TEMPERATURA_MAXIMA_C:
+                    salud = "caliente"
+                else:
+                    salud = "lento"
+
+            vista.append({
+                "device_id": device_id,
+                "estado": d["estado"],
+                "estado_desde": d["estado_desde"],
+                "salud": salud,
+                "motivos": motivos,
+                "ultima_telemetria": d["recibida_en"],
+                "segundos_desde_telemetria": round(antiguedad, 1) if antiguedad is not None else None,
+                "fps": telemetria.get("fps"),
+                "fps_promedio": round(fps_promedio, 2) if fps_promedio is not None else None,
+                "inferencia_p95_ms": inferencia.get("p95", telemetria.get("procesamiento_ms")),
+                "temperatura_cpu_c": temperatura,
+                "carga_cpu": telemetria.get("carga_cpu"),
+                "cola_offline": telemetria.get("cola_offline"),
+                "descartes_captura": telemetria.get("descartes_captura"),
+                "reconexiones_camara": telemetria.get("reconexiones_camara"),
+                "backend": telemetria.get("backend"),
+                "telemetria": telemetria,
+            })
+        return vista
+
+    def publicar_umbrales(self, device_id: str, cambios: dict) -> dict:
+        """
+        Publica umbrales de detección para un dispositivo (retenido, el edge
+        los aplica en caliente y los recibe también al reconectar).
+
+        El mensaje retenido reemplaza al anterior, así que los cambios se
+        mezclan con el último mensaje retenido de ese dispositivo (el
+        backend está suscrito al topic) y se publica el conjunto completo.
+
+        Returns:
+            Los umbrales publicados
+        """
+        if self.client is None or not self.connected:
+            raise RuntimeError("MQTT no conectado")
+
+        # El lock serializa dos cambios simultáneos al mismo dispositivo
+        with self._lock_configs:
+            umbrales = {**self.configs.get(device_id, {}), **cambios}
+            if umbrales.get("min_area_mesa", 0) >= umbrales.get("max_area_mesa", float("inf")):
+                raise ValueError("min_area_mesa debe ser menor que max_area_mesa")
+
+            resultado = self.client.publish(f"{TOPIC_CONFIG}/{device_id}", json.dumps(umbrales), qos=1, retain=True)
+            if resultado.rc != 0:
+                raise RuntimeError(f"No se pudo publicar (código: {resultado.rc})")
+            self.configs[device_id] = umbrales
+        print(f"[CONFIG] Umbrales publicados para {device_id}: {umbrales}")
+        return umbrales
+
     def actualizar_estado_mesas(self, detecciones: list):
         """
         Actualiza el estado de las mesas en la base de datos
@@ -270,8 +467,13 @@ class MQTTService:
             print(f"[MQTT] Iniciando servicio MQTT...")
             print(f"   Conectando a: {BROKER_HOST}:{BROKER_PORT}")
 
-            self.client.connect(BROKER_HOST, BROKER_PORT, 60)
-            self.client.loop_start()  # Loop en thread separado
+            if self.client is None:
+                self.client = self._crear_cliente()
+
+            # connect_async no bloquea el arranque si el broker no responde;
+            # el loop en thread separado conecta y reconecta solo
+            self.client.connect_async(BROKER_HOST, BROKER_PORT, 60)
+            self.client.loop_start()
 
             print(f"[MQTT] Servicio MQTT iniciado")
 
@@ -281,8 +483,11 @@ class MQTTService:
     
     def stop(self):
         """Detiene el cliente MQTT"""
+        if self.client is None:
+            return
+
+        self.client.loop_stop()
         if self.connected:
-            self.client.loop_stop()
             self.client.disconnect()
             print("[MQTT] Servicio MQTT detenido")
 
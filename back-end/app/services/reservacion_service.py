@@ -1,7 +1,11 @@
+import csv
+import io
+import json
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from datetime import date, time, timedelta
+from sqlalchemy import and_, or_, select
+from datetime import date, time, datetime, timedelta
 from fastapi import HTTPException, status
+from app.database import SessionLocal
 from app.models.reservacion import Reservacion
 from app.models.mesa import Mesa
 from app.models.tipo_mesa import TipoMesa
@@ -86,3 +90,93 @@ def asignar_mesa_automatica(
         return mesa
 
     return None
+
+
+# ===== EXPORTACIÓN DE RESERVACIONES =====
+
+COLUMNAS_EXPORTACION = [
+    Reservacion.id_reserva,
+    Reservacion.nombre,
+    Reservacion.apellido,
+    Reservacion.correo,
+    Reservacion.telefono,
+    Reservacion.cantidad_personas,
+    Reservacion.fecha,
+    Reservacion.hora,
+    Reservacion.id_mesa,
+    Reservacion.estado,
+    Reservacion.created_at,
+    Reservacion.updated_at,
+]
+
+FILAS_POR_LOTE = 1000
+
+
+def iterar_reservaciones_export(
+    estado: str | None = None,
+    fecha_desde: date | None = None,
+    fecha_hasta: date | None = None
+):
+    """
+    Genera lotes de filas de reservaciones (tuplas) para exportación.
+
+    Usa un cursor del lado del servidor (yield_per → stream_results), así
+    la memoria se mantiene constante sin importar el rango de fechas.
+    Abre su propia sesión porque se consume mientras se envía la respuesta.
+    """
+    db = SessionLocal()
+    try:
+        query = select(*COLUMNAS_EXPORTACION)
+
+        if estado:
+            query = query.where(Reservacion.estado == estado)
+        if fecha_desde:
+            query = query.where(Reservacion.fecha >= fecha_desde)
+        if fecha_hasta:
+            query = query.where(Reservacion.fecha <= fecha_hasta)
+
+        query = query.order_by(
+            Reservacion.fecha, Reservacion.hora, Reservacion.id_reserva
+        ).execution_options(yield_per=FILAS_POR_LOTE)
+
+        for lote in db.execute(query).partitions():
+            yield lote
+    finally:
+        db.close()
+
+
+def _valor_exportable(valor):
+    """Convierte fechas y horas a ISO 8601; deja el resto igual"""
+    if isinstance(valor, (date, time, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def generar_csv(lotes):
+    """Convierte lotes de filas en fragmentos CSV (con encabezado)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([col.key for col in COLUMNAS_EXPORTACION])
+
+    for lote in lotes:
+        writer.writerows([_valor_exportable(v) for v in fila] for fila in lote)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def generar_ndjson(lotes):
+    """Convierte lotes de filas en fragmentos NDJSON (un objeto por línea)"""
+    nombres = [col.key for col in COLUMNAS_EXPORTACION]
+
+    for lote in lotes:
+        yield "".join(
+            json.dumps(
+                {nombre: _valor_exportable(v) for nombre, v in zip(nombres, fila)},
+                ensure_ascii=False
+            ) + "\n"
+            for fila in lote
+        )
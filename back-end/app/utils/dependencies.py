@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.usuario_admin import UsuarioAdmin
 from app.utils.security import decode_access_token
+from app.utils.principal_cache import principal_cache
 from app.schemas.auth import TokenData
 
 security = HTTPBearer()
@@ -29,10 +30,22 @@ def get_current_user(
     if email is None:
         raise credentials_exception
 
+    # Tokens emitidos antes de token_version se tratan como versión 0
+    version = payload.get("ver", 0)
+
+    user = principal_cache.get(email, version)
+    if user is not None:
+        return user
+
     user = db.query(UsuarioAdmin).filter(UsuarioAdmin.email == email).first()
-    if user is None or not user.is_active:
+    if user is None or not user.is_active or user.token_version != version:
         raise credentials_exception
 
+    # Desvincular de la sesión: el objeto cacheado sobrevive al cierre
+    # y a los commits de este request
+    db.expunge(user)
+    principal_cache.set(email, version, user)
+
     return user
 
 
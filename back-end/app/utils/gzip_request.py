@@ -0,0 +1,65 @@
+"""
+Descompresión de cuerpos de request con Content-Encoding: gzip.
+
+El publicador HTTP de vision-artificial puede enviar las detecciones
+comprimidas. Este middleware ASGI descomprime el cuerpo antes de que
+llegue a FastAPI, así los endpoints reciben el JSON de siempre. El
+tamaño descomprimido está acotado para no aceptar bombas gzip.
+"""
+
+import zlib
+
+from starlette.responses import JSONResponse
+
+MAX_BYTES_DESCOMPRIMIDOS = 1024 * 1024
+
+
+class DescomprimirGzip:
+    """Middleware ASGI: descomprime requests con Content-Encoding: gzip"""
+
+    def __init__(self, app, max_bytes: int = MAX_BYTES_DESCOMPRIMIDOS):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        codificacion = dict(scope["headers"]).get(b"content-encoding", b"")
+        if codificacion.strip().lower() != b"gzip":
+            return await self.app(scope, receive, send)
+
+        comprimido = bytearray()
+        while True:
+            mensaje = await receive()
+            if mensaje["type"] != "http.request":
+                return  # el cliente se desconectó
+            comprimido += mensaje.get("body", b"")
+            if not mensaje.get("more_body", False):
+                break
+
+        try:
+            descompresor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            cuerpo = descompresor.decompress(bytes(comprimido), self.max_bytes)
+            if descompresor.unconsumed_tail:
+                respuesta = JSONResponse({"detail": "Cuerpo demasiado grande"}, status_code=413)
+                return await respuesta(scope, receive, send)
+        except zlib.error:
+            respuesta = JSONResponse({"detail": "Cuerpo gzip inválido"}, status_code=400)
+            return await respuesta(scope, receive, send)
+
+        headers = [(k, v) for k, v in scope["headers"]
+                   if k not in (b"content-encoding", b"content-length")]
+        headers.append((b"content-length", str(len(cuerpo)).encode()))
+        scope = dict(scope, headers=headers)
+
+        entregado = False
+
+        async def recibir():
+            nonlocal entregado
+            if not entregado:
+                entregado = True
+                return {"type": "http.request", "body": cuerpo, "more_body": False}
+            return await receive()
+
+        await self.app(scope, recibir, send)
@@ -0,0 +1,28 @@
+"""
+Utilidades de paginación por cursor (keyset) para listados ordenados.
+
+El cursor es un string opaco que codifica la clave de orden de la última
+fila entregada: (fecha, hora, id_reserva). La siguiente página se obtiene
+con una comparación de tuplas contra esa clave, que PostgreSQL resuelve
+con el índice compuesto sin recorrer las filas anteriores como OFFSET.
+"""
+
+import base64
+from datetime import date, time
+
+
+def encode_cursor(fecha: date, hora: time, id_reserva: int) -> str:
+    """Codifica la clave de orden de una fila como cursor opaco"""
+    raw = f"{fecha.isoformat()}|{hora.isoformat()}|{id_reserva}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[date, time, int] | None:
+    """Decodifica un cursor. Retorna None si el cursor no es válido"""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode("utf-8")
+        fecha_str, hora_str, id_str = raw.split("|")
+        return date.fromisoformat(fecha_str), time.fromisoformat(hora_str), int(id_str)
+    except (ValueError, UnicodeDecodeError):
+        return None
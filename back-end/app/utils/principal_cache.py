@@ -0,0 +1,69 @@
+"""
+Caché en memoria de usuarios autenticados (principals).
+
+Evita consultar usuarios_admin en cada request protegido (p. ej. los
+polls cada 30 s del dashboard). La clave es (sub, ver): cuando se
+incrementa token_version de un usuario, los tokens viejos dejan de
+coincidir con la BD y son rechazados al expirar su entrada en caché.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import settings
+
+
+class PrincipalCache:
+    """Caché LRU con expiración (TTL), segura para múltiples threads"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sub: str, version: int):
+        """Retorna el usuario cacheado o None si no existe o expiró"""
+        key = (sub, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, user = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return user
+
+    def set(self, sub: str, version: int, user):
+        """Guarda un usuario (ya desvinculado de su sesión)"""
+        if self.ttl_seconds <= 0:
+            return
+
+        key = (sub, version)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, sub: str):
+        """Elimina todas las versiones cacheadas de un usuario"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == sub]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Instancia global de la caché
+principal_cache = PrincipalCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS
+)
@@ -1,8 +1,23 @@
+import asyncio
+import threading
 import bcrypt
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from app.config import settings
 
+# Pool dedicado para bcrypt: limita cuántos hashes corren a la vez (CPU)
+# y cuántos pueden esperar, sin ocupar el threadpool de FastAPI.
+# bcrypt libera el GIL mientras calcula, así que los threads sí escalan.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="bcrypt"
+)
+_hash_slots = threading.BoundedSemaphore(
+    settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_PENDING
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica si la contraseña en texto plano coincide con el hash"""
@@ -14,11 +29,51 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Genera un hash bcrypt de la contraseña"""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """Indica si el hash fue generado con un costo distinto al configurado"""
+    try:
+        # Formato: $2b$<costo>$<salt+hash>
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def _submit_hash_job(fn, *args) -> Future:
+    """Encola un trabajo en el pool de bcrypt o rechaza si está saturado"""
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, intente nuevamente",
+            headers={"Retry-After": "1"},
+        )
+
+    try:
+        future = _hash_executor.submit(fn, *args)
+    except Exception:
+        _hash_slots.release()
+        raise
+
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return future
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password ejecutado en el pool de bcrypt sin bloquear el event loop"""
+    return await asyncio.wrap_future(
+        _submit_hash_job(verify_password, plain_password, hashed_password)
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash ejecutado en el pool de bcrypt sin bloquear el event loop"""
+    return await asyncio.wrap_future(_submit_hash_job(get_password_hash, password))
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
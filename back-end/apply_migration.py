@@ -1,6 +1,7 @@
 """
 Script para aplicar migraciones SQL
 """
+import sys
 import psycopg2
 from app.config import settings
 
@@ -63,5 +64,6 @@ def apply_migration(migration_file: str):
     return True
 
 if __name__ == "__main__":
-    migration_file = "migrations/001_add_personas_actuales.sql"
+    # Uso: python apply_migration.py [migrations/00X_nombre.sql]
+    migration_file = sys.argv[1] if len(sys.argv) > 1 else "migrations/001_add_personas_actuales.sql"
     apply_migration(migration_file)
@@ -0,0 +1,6 @@
+"""
+Benchmarks del backend.
+
+Se ejecutan desde el directorio back-end como módulos:
+    python -m benchmarks.<nombre>
+"""
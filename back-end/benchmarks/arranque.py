@@ -0,0 +1,121 @@
+"""
+Benchmark de arranque del backend con presupuesto.
+
+Mide dos cosas en procesos limpios:
+1. Tiempo de importación de app.main (python -X importtime)
+2. Tiempo hasta el primer request exitoso a /health con uvicorn
+
+Termina con código 1 si alguna medición supera su presupuesto. Los
+presupuestos por defecto se verifican en tests/test_arranque.py:
+
+    python -m benchmarks.arranque --presupuesto-import-ms 1500 --presupuesto-arranque-ms 4000
+    python -m pytest tests/test_arranque.py
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+PRESUPUESTO_IMPORT_MS = 1500
+PRESUPUESTO_ARRANQUE_MS = 4000
+
+# Directorio del backend: los subprocesos importan `app` desde aquí
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir_importacion(top: int) -> float:
+    """Importa app.main con -X importtime y retorna el tiempo total en ms"""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True,
+        text=True,
+        cwd=RAIZ,
+        env={**os.environ, "MQTT_ENABLED": "false"},
+    )
+    if resultado.returncode != 0:
+        print(resultado.stderr)
+        raise SystemExit("[ERROR] No se pudo importar app.main")
+
+    # Formato: "import time: self [us] | cumulative | imported package",
+    # los submódulos aparecen indentados bajo el módulo que los importó
+    nivel_superior = []
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado_us, nombre = linea.split("|")
+        if len(nombre) - len(nombre.lstrip()) == 1:
+            nivel_superior.append((int(acumulado_us), nombre.strip()))
+
+    total_ms = sum(us for us, _ in nivel_superior) / 1000
+
+    print("   Módulos más lentos (acumulado):")
+    for us, nombre in sorted(nivel_superior, reverse=True)[:top]:
+        print(f"      {us / 1000:8.1f} ms  {nombre}")
+
+    return total_ms
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def medir_primer_request(timeout_s: float) -> float:
+    """Arranca uvicorn y retorna ms hasta el primer 200 de /health"""
+    puerto = puerto_libre()
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(puerto), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        cwd=RAIZ,
+        env={**os.environ, "MQTT_ENABLED": "false"},
+    )
+
+    try:
+        while time.perf_counter() - inicio < timeout_s:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - inicio) * 1000
+            except OSError:
+                time.sleep(0.02)
+        raise SystemExit(f"[ERROR] El servidor no respondió en {timeout_s} s")
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--presupuesto-import-ms", type=float, default=PRESUPUESTO_IMPORT_MS)
+    parser.add_argument("--presupuesto-arranque-ms", type=float, default=PRESUPUESTO_ARRANQUE_MS)
+    parser.add_argument("--top", type=int, default=10, help="Cantidad de módulos lentos a mostrar")
+    args = parser.parse_args()
+
+    print("-" * 60)
+    import_ms = medir_importacion(args.top)
+    arranque_ms = medir_primer_request(timeout_s=max(30, args.presupuesto_arranque_ms / 1000 * 3))
+    print("-" * 60)
+
+    excedidos = []
+    for nombre, valor, presupuesto in [
+        ("Importación de app.main", import_ms, args.presupuesto_import_ms),
+        ("Tiempo al primer request", arranque_ms, args.presupuesto_arranque_ms),
+    ]:
+        ok = valor <= presupuesto
+        print(f"   {nombre:<26} {valor:8.1f} ms  (presupuesto {presupuesto:.0f} ms) {'OK' if ok else 'EXCEDIDO'}")
+        if not ok:
+            excedidos.append(nombre)
+    print("-" * 60)
+
+    sys.exit(1 if excedidos else 0)
+
+
+if __name__ == "__main__":
+    main()
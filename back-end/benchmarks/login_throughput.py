@@ -0,0 +1,90 @@
+"""
+Benchmark de throughput de login.
+
+Lanza una ráfaga de logins concurrentes contra un servidor en ejecución y,
+al mismo tiempo, mide la latencia de /health para verificar que bcrypt no
+bloquea al resto de endpoints.
+
+    uvicorn app.main:app --port 8000 &
+    python -m benchmarks.login_throughput --email admin@example.com --password admin123
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def login(base_url: str, email: str, password: str) -> int:
+    body = json.dumps({"email": email, "password": password}).encode("utf-8")
+    request = urllib.request.Request(
+        f"{base_url}/api/v1/auth/login",
+        data=body,
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def sondear_health(base_url: str, detener: threading.Event, latencias: list):
+    """Mide /health cada 50 ms mientras dura la ráfaga"""
+    while not detener.is_set():
+        inicio = time.perf_counter()
+        with urllib.request.urlopen(f"{base_url}/health", timeout=30) as response:
+            response.read()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        time.sleep(0.05)
+
+
+def percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=200, help="Total de logins a enviar")
+    parser.add_argument("--concurrencia", type=int, default=32)
+    args = parser.parse_args()
+
+    latencias_health: list = []
+    detener = threading.Event()
+    sonda = threading.Thread(target=sondear_health, args=(args.url, detener, latencias_health))
+    sonda.start()
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrencia) as executor:
+        codigos = list(executor.map(
+            lambda _: login(args.url, args.email, args.password),
+            range(args.logins)
+        ))
+    duracion = time.perf_counter() - inicio
+
+    detener.set()
+    sonda.join()
+
+    print("-" * 60)
+    print(f"   Logins enviados:     {args.logins} (concurrencia {args.concurrencia})")
+    print(f"   Duración:            {duracion:.2f} s")
+    print(f"   Throughput:          {args.logins / duracion:.1f} logins/s")
+    for codigo in sorted(set(codigos)):
+        print(f"   HTTP {codigo}:            {codigos.count(codigo)}")
+    if latencias_health:
+        print(f"   /health p50:         {statistics.median(latencias_health):.1f} ms")
+        print(f"   /health p95:         {percentil(latencias_health, 0.95):.1f} ms")
+    print("-" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+-- Migración: Índice compuesto para paginación por cursor de reservaciones
+-- Fecha: 2026-10-19
+-- Descripción: El listado de administración ordena por (fecha, hora, id_reserva)
+--              y pagina por cursor sobre esa misma clave. Con este índice la
+--              página N cuesta lo mismo que la primera (sin recorrer OFFSET).
+--
+-- NOTA: CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una
+--       transacción, por eso este archivo contiene una sola sentencia.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reservaciones_fecha_hora_id
+    ON reservaciones (fecha, hora, id_reserva);
@@ -0,0 +1,22 @@
+-- Migración: Agregar campo token_version a la tabla usuarios_admin
+-- Fecha: 2026-10-19
+-- Descripción: Versión de credenciales incluida en el JWT (claim "ver").
+--              Al incrementarla se invalidan los tokens ya emitidos y las
+--              entradas de la caché de usuarios autenticados.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_name = 'usuarios_admin'
+        AND column_name = 'token_version'
+    ) THEN
+        ALTER TABLE usuarios_admin
+        ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0;
+
+        RAISE NOTICE 'Columna token_version agregada exitosamente';
+    ELSE
+        RAISE NOTICE 'La columna token_version ya existe';
+    END IF;
+END $$;
@@ -68,6 +68,7 @@ CREATE TABLE IF NOT EXISTS public.usuarios_admin (
     password_hash TEXT NOT NULL,
     rol VARCHAR(30) DEFAULT 'admin',
     is_active BOOLEAN DEFAULT true,
+    token_version INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
     updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
     CONSTRAINT usuarios_admin_rol_check CHECK (rol IN ('admin', 'superadmin', 'staff'))
@@ -94,6 +95,7 @@ ALTER TABLE public.reservaciones
 CREATE INDEX IF NOT EXISTS idx_mesas_estado ON public.mesas USING btree (estado);
 CREATE INDEX IF NOT EXISTS idx_mesas_tipo ON public.mesas USING btree (id_tipo_mesa);
 CREATE INDEX IF NOT EXISTS idx_reservaciones_fecha ON public.reservaciones USING btree (fecha, hora);
+CREATE INDEX IF NOT EXISTS idx_reservaciones_fecha_hora_id ON public.reservaciones USING btree (fecha, hora, id_reserva);
 CREATE INDEX IF NOT EXISTS idx_reservaciones_estado ON public.reservaciones USING btree (estado);
 CREATE INDEX IF NOT EXISTS idx_reservaciones_correo ON public.reservaciones USING btree (correo);
 CREATE INDEX IF NOT EXISTS idx_usuarios_email ON public.usuarios_admin USING btree (email);
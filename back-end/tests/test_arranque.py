@@ -0,0 +1,20 @@
+"""
+Presupuesto de arranque del backend (ver benchmarks/arranque.py).
+
+Cada medición corre en un proceso limpio, con MQTT deshabilitado.
+"""
+
+from benchmarks.arranque import (
+    PRESUPUESTO_ARRANQUE_MS,
+    PRESUPUESTO_IMPORT_MS,
+    medir_importacion,
+    medir_primer_request,
+)
+
+
+def test_importacion_de_app_main_dentro_del_presupuesto():
+    assert medir_importacion(top=10) <= PRESUPUESTO_IMPORT_MS
+
+
+def test_primer_request_dentro_del_presupuesto():
+    assert medir_primer_request(timeout_s=30) <= PRESUPUESTO_ARRANQUE_MS
@@ -0,0 +1,266 @@
+"""
+Backends de inferencia para los modelos YOLO del edge.
+
+Todos los detectores exponen el mismo método:
+
+    detectar(frames, conf, iou, max_det, imgsz, clases) -> List[Detecciones]
+
+con las cajas en coordenadas del frame original, así SistemaVisionMesas
+arma los mismos BoundingBox sin importar el backend.
+
+- DetectorUltralytics: pesos PyTorch (.pt) o un directorio OpenVINO
+  exportado (*_openvino_model/), ambos a través de ultralytics.YOLO
+- DetectorOnnx: un .onnx exportado con exportar_modelos.py y ejecutado
+  con onnxruntime (letterbox + NMS propios, sin PyTorch). Si el
+  onnxruntime instalado trae OpenVINOExecutionProvider, se usa primero.
+  Con un .onnx de entrada dinámica respeta `imgsz` y corre todos los
+  frames en un solo batch; uno viejo de entrada fija (entrada_fija=True)
+  corre frame por frame al tamaño exportado
+
+cargar_detector() elige según BACKEND_INFERENCIA de config.py.
+"""
+
+import logging
+import os
+from typing import List, NamedTuple, Optional, Sequence
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Relleno gris del letterbox (el mismo que usa ultralytics)
+COLOR_RELLENO = 114
+
+# Orden de preferencia de proveedores de onnxruntime
+PROVEEDORES_PREFERIDOS = ["OpenVINOExecutionProvider", "CPUExecutionProvider"]
+
+# Los lados de la entrada de YOLOv8 deben ser múltiplo del stride máximo
+STRIDE = 32
+
+
+class Detecciones(NamedTuple):
+    """Resultado de un frame: xyxy (N, 4), conf (N,) y clase (N,)"""
+    xyxy: np.ndarray
+    conf: np.ndarray
+    clase: np.ndarray
+
+
+def rutas_exportadas(ruta_pt: str, int8: bool = False) -> dict:
+    """Rutas de los modelos exportados a partir de los pesos .pt"""
+    base = os.path.splitext(ruta_pt)[0]
+    return {
+        "onnx": f"{base}_int8.onnx" if int8 else f"{base}.onnx",
+        "openvino": f"{base}_openvino_model",
+    }
+
+
+class DetectorUltralytics:
+    """YOLO de ultralytics (PyTorch u OpenVINO)"""
+
+    nombre = "ultralytics"
+    entrada_fija = False
+
+    def __init__(self, ruta: str):
+        from ultralytics import YOLO
+
+        self.ruta = ruta
+        self.modelo = YOLO(ruta)
+
+    def detectar(self, frames: Sequence[np.ndarray], conf: float, iou: float = 0.7,
+                 max_det: int = 300, imgsz: int = 640,
+                 clases: Optional[List[int]] = None) -> List[Detecciones]:
+        results = self.modelo(
+            list(frames),
+            classes=clases,
+            conf=conf,
+            iou=iou,
+            max_det=max_det,
+            imgsz=imgsz,
+            verbose=False
+        )
+        return [
+            Detecciones(
+                r.boxes.xyxy.cpu().numpy(),
+                r.boxes.conf.cpu().numpy(),
+                r.boxes.cls.cpu().numpy().astype(np.int32)
+            )
+            for r in results
+        ]
+
+
+def letterbox(frame: np.ndarray, alto: int, ancho: int):
+    """
+    Redimensiona manteniendo la proporción y rellena hasta (alto, ancho).
+
+    Returns:
+        (imagen, escala, (relleno_x, relleno_y))
+    """
+    h, w = frame.shape[:2]
+    escala = min(alto / h, ancho / w)
+    nuevo_w, nuevo_h = int(round(w * escala)), int(round(h * escala))
+    relleno_x, relleno_y = (ancho - nuevo_w) / 2, (alto - nuevo_h) / 2
+
+    if (w, h) != (nuevo_w, nuevo_h):
+        frame = cv2.resize(frame, (nuevo_w, nuevo_h), interpolation=cv2.INTER_LINEAR)
+
+    arriba, izquierda = int(round(relleno_y - 0.1)), int(round(relleno_x - 0.1))
+    imagen = cv2.copyMakeBorder(
+        frame, arriba, alto - nuevo_h - arriba, izquierda, ancho - nuevo_w - izquierda,
+        cv2.BORDER_CONSTANT, value=(COLOR_RELLENO,) * 3
+    )
+    return imagen, escala, (izquierda, arriba)
+
+
+def nms(cajas: np.ndarray, puntajes: np.ndarray, iou_umbral: float) -> np.ndarray:
+    """Non-maximum suppression; retorna los índices conservados por puntaje"""
+    orden = puntajes.argsort()[::-1]
+    areas = (cajas[:, 2] - cajas[:, 0]) * (cajas[:, 3] - cajas[:, 1])
+    conservar = []
+
+    while orden.size:
+        i = orden[0]
+        conservar.append(i)
+        resto = orden[1:]
+        ix = np.clip(np.minimum(cajas[i, 2], cajas[resto, 2]) - np.maximum(cajas[i, 0], cajas[resto, 0]), 0, None)
+        iy = np.clip(np.minimum(cajas[i, 3], cajas[resto, 3]) - np.maximum(cajas[i, 1], cajas[resto, 1]), 0, None)
+        interseccion = ix * iy
+        iou = interseccion / np.maximum(areas[i] + areas[resto] - interseccion, 1e-6)
+        orden = resto[iou <= iou_umbral]
+
+    return np.array(conservar, dtype=np.int64)
+
+
+class DetectorOnnx:
+    """YOLOv8 exportado a ONNX, ejecutado con onnxruntime"""
+
+    nombre = "onnx"
+
+    def __init__(self, ruta: str, hilos: int = 0):
+        import onnxruntime as ort
+
+        opciones = ort.SessionOptions()
+        if hilos > 0:
+            opciones.intra_op_num_threads = hilos
+
+        disponibles = ort.get_available_providers()
+        proveedores = [p for p in PROVEEDORES_PREFERIDOS if p in disponibles] or disponibles
+
+        self.ruta = ruta
+        self.sesion = ort.InferenceSession(ruta, sess_options=opciones, providers=proveedores)
+        entrada = self.sesion.get_inputs()[0]
+        self.nombre_entrada = entrada.name
+
+        # exportar_modelos.py exporta con dynamic=True (batch, alto y ancho
+        # libres). Un .onnx exportado con dynamic=False tiene todo fijo:
+        # batch 1 y el tamaño de la exportación
+        lote, _, alto, ancho = entrada.shape
+        self.entrada_fija = all(isinstance(d, int) for d in (lote, alto, ancho))
+        self.alto = alto if isinstance(alto, int) else None
+        self.ancho = ancho if isinstance(ancho, int) else None
+        if self.entrada_fija:
+            logger.warning(f"ONNX {os.path.basename(ruta)}: entrada fija {ancho}x{alto} sin batch "
+                           f"(se ignora imgsz); re-exportar con exportar_modelos.py")
+        logger.info(f"ONNX {os.path.basename(ruta)}: entrada "
+                    f"{'fija' if self.entrada_fija else 'dinámica'}, "
+                    f"proveedores {self.sesion.get_providers()}")
+
+    def _preprocesar(self, frame: np.ndarray, alto: int, ancho: int):
+        imagen, escala, relleno = letterbox(frame, alto, ancho)
+        tensor = imagen[:, :, ::-1].transpose(2, 0, 1)  # BGR→RGB, HWC→CHW
+        return tensor, escala, relleno
+
+    def _ejecutar(self, tensores: List[np.ndarray]) -> np.ndarray:
+        lote = np.ascontiguousarray(np.stack(tensores), dtype=np.float32) / 255.0
+        return self.sesion.run(None, {self.nombre_entrada: lote})[0]
+
+    def _postprocesar(self, salida: np.ndarray, escala: float, relleno, forma,
+                      conf: float, iou: float, max_det: int,
+                      clases: Optional[List[int]]) -> Detecciones:
+        # (4 + nc, N) → (N, 4 + nc): cx, cy, w, h y puntaje por clase
+        predicciones = salida.T
+        puntajes_clase = predicciones[:, 4:]
+        clase = puntajes_clase.argmax(axis=1)
+        puntaje = puntajes_clase[np.arange(len(clase)), clase]
+
+        mascara = puntaje >= conf
+        if clases is not None:
+            mascara &= np.isin(clase, clases)
+        predicciones, clase, puntaje = predicciones[mascara], clase[mascara], puntaje[mascara]
+
+        if len(puntaje) == 0:
+            return Detecciones(np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int32))
+
+        cx, cy, w, h = predicciones[:, 0], predicciones[:, 1], predicciones[:, 2], predicciones[:, 3]
+        xyxy = np.stack((cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2), axis=1)
+
+        # NMS por clase: desplazar cada clase para que no se crucen
+        desplazamiento = clase[:, None].astype(np.float32) * 7680
+        conservar = nms(xyxy + desplazamiento, puntaje, iou)[:max_det]
+        xyxy, puntaje, clase = xyxy[conservar], puntaje[conservar], clase[conservar]
+
+        # Deshacer el letterbox y recortar al frame
+        xyxy -= np.array([relleno[0], relleno[1], relleno[0], relleno[1]], dtype=np.float32)
+        xyxy /= escala
+        alto, ancho = forma[:2]
+        xyxy = np.clip(xyxy, 0, [ancho, alto, ancho, alto])
+
+        return Detecciones(xyxy.astype(np.float32), puntaje.astype(np.float32), clase.astype(np.int32))
+
+    def detectar(self, frames: Sequence[np.ndarray], conf: float, iou: float = 0.7,
+                 max_det: int = 300, imgsz: int = 640,
+                 clases: Optional[List[int]] = None) -> List[Detecciones]:
+        if self.entrada_fija:
+            alto, ancho = self.alto, self.ancho
+        else:
+            alto = ancho = -(-imgsz // STRIDE) * STRIDE
+        preprocesados = [self._preprocesar(frame, alto, ancho) for frame in frames]
+
+        if self.entrada_fija:
+            salidas = [self._ejecutar([tensor])[0] for tensor, _, _ in preprocesados]
+        else:
+            # Todos los frames llevan el mismo letterbox: un solo batch
+            salidas = self._ejecutar([tensor for tensor, _, _ in preprocesados])
+
+        return [
+            self._postprocesar(salida, escala, relleno, frame.shape, conf, iou, max_det, clases)
+            for salida, (_, escala, relleno), frame in zip(salidas, preprocesados, frames)
+        ]
+
+
+def onnxruntime_disponible() -> bool:
+    try:
+        import onnxruntime  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def cargar_detector(ruta_pt: str, backend: str = "auto", int8: bool = False, hilos: int = 0):
+    """
+    Carga el detector para los pesos `ruta_pt` con el backend pedido.
+
+    Args:
+        ruta_pt: Pesos PyTorch; los exportados se buscan junto a ellos
+            (ver rutas_exportadas)
+        backend: "auto" (ONNX si hay onnxruntime y el .onnx existe, si no
+            PyTorch), "onnx", "openvino" o "ultralytics"
+        int8: Usar el .onnx cuantizado (*_int8.onnx)
+        hilos: Hilos de onnxruntime (0 = por defecto)
+    """
+    exportados = rutas_exportadas(ruta_pt, int8)
+
+    if backend == "auto":
+        if onnxruntime_disponible() and os.path.exists(exportados["onnx"]):
+            backend = "onnx"
+        else:
+            backend = "ultralytics"
+
+    if backend == "onnx":
+        return DetectorOnnx(exportados["onnx"], hilos)
+    if backend == "openvino":
+        return DetectorUltralytics(exportados["openvino"])
+    if backend == "ultralytics":
+        return DetectorUltralytics(ruta_pt)
+
+    raise ValueError(f"Backend de inferencia desconocido: {backend}")
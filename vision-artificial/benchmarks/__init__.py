@@ -0,0 +1,6 @@
+"""
+Benchmarks del sistema de visión.
+
+Se ejecutan desde el directorio vision-artificial como módulos:
+    python -m benchmarks.<nombre>
+"""
@@ -0,0 +1,83 @@
+"""
+Benchmark de la asignación persona → mesa.
+
+Compara el bucle Python original (pares mesa × persona con atributos de
+dataclass) contra la versión vectorizada de geometria.matriz_asignacion,
+y verifica que ambas asignen exactamente lo mismo.
+
+    python -m benchmarks.asignacion --personas 50 --mesas 30
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from geometria import matriz_asignacion
+
+OVERLAP_MINIMO = 0.30
+
+
+def cajas_aleatorias(rng, n: int, ancho: int, alto: int, min_lado: int, max_lado: int) -> np.ndarray:
+    lados = rng.integers(min_lado, max_lado, size=(n, 2))
+    x1 = rng.integers(0, ancho - max_lado, size=n)
+    y1 = rng.integers(0, alto - max_lado, size=n)
+    return np.stack((x1, y1, x1 + lados[:, 0], y1 + lados[:, 1]), axis=1).astype(np.int32)
+
+
+def asignacion_bucle(mesas: list, personas: list) -> list:
+    """Réplica del algoritmo original con tuplas (x1, y1, x2, y2)"""
+    resultado = []
+    for mx1, my1, mx2, my2 in mesas:
+        en_mesa = []
+        for j, (px1, py1, px2, py2) in enumerate(personas):
+            cx, cy = (px1 + px2) // 2, (py1 + py2) // 2
+            dentro = mx1 <= cx <= mx2 and my1 <= cy <= my2
+            if not dentro:
+                ix = max(0, min(mx2, px2) - max(mx1, px1))
+                iy = max(0, min(my2, py2) - max(my1, py1))
+                dentro = (ix * iy) / ((px2 - px1) * (py2 - py1)) > OVERLAP_MINIMO
+            if dentro:
+                en_mesa.append(j)
+        resultado.append(en_mesa)
+    return resultado
+
+
+def medir(funcion, repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--personas", type=int, default=50)
+    parser.add_argument("--mesas", type=int, default=30)
+    parser.add_argument("--repeticiones", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    mesas = cajas_aleatorias(rng, args.mesas, 1920, 1080, 120, 380)
+    personas = cajas_aleatorias(rng, args.personas, 1920, 1080, 40, 200)
+
+    mesas_lista = [tuple(int(v) for v in fila) for fila in mesas]
+    personas_lista = [tuple(int(v) for v in fila) for fila in personas]
+
+    esperado = asignacion_bucle(mesas_lista, personas_lista)
+    obtenido = [list(np.flatnonzero(fila)) for fila in matriz_asignacion(mesas, personas, OVERLAP_MINIMO)]
+
+    us_bucle = medir(lambda: asignacion_bucle(mesas_lista, personas_lista), args.repeticiones)
+    us_numpy = medir(lambda: matriz_asignacion(mesas, personas, OVERLAP_MINIMO), args.repeticiones)
+
+    print("-" * 60)
+    print(f"   {args.personas} personas × {args.mesas} mesas")
+    print(f"   Bucle Python:   {us_bucle:10.1f} µs por frame")
+    print(f"   NumPy:          {us_numpy:10.1f} µs por frame")
+    print(f"   Aceleración:    {us_bucle / us_numpy:10.1f}x")
+    print(f"   Misma asignación: {'sí' if esperado == obtenido else 'NO'}")
+    print("-" * 60)
+
+
+if __name__ == "__main__":
+    main()
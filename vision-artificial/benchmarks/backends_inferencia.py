@@ -0,0 +1,102 @@
+"""
+Benchmark de los backends de inferencia (backends.py).
+
+Para cada backend disponible (PyTorch, ONNX, ONNX int8, OpenVINO) mide
+el tiempo de carga, la latencia por frame (p50/p95) y la coincidencia
+de sus detecciones con las de PyTorch, que se toma como referencia
+(precisión y recall con IoU >= 0.5).
+
+Los modelos exportados se generan antes con exportar_modelos.py.
+
+    python -m benchmarks.backends_inferencia --fuente grabacion.mp4 --frames 100
+    python -m benchmarks.backends_inferencia --fuente frames/ --modelo Entrenamiendo_mesas/weights/best.pt --conf 0.75
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from backends import cargar_detector, rutas_exportadas, onnxruntime_disponible
+from benchmarks.fuentes import leer_frames
+from config import MODELO_PERSONAS
+from geometria import iou_matriz
+from metricas import percentil
+
+IOU_COINCIDENCIA = 0.5
+
+
+def candidatos(ruta_pt: str):
+    """(nombre, backend, int8) de los backends que se pueden probar"""
+    yield "pytorch", "ultralytics", False
+    if onnxruntime_disponible():
+        if os.path.exists(rutas_exportadas(ruta_pt)["onnx"]):
+            yield "onnx", "onnx", False
+        if os.path.exists(rutas_exportadas(ruta_pt, int8=True)["onnx"]):
+            yield "onnx int8", "onnx", True
+    if os.path.isdir(rutas_exportadas(ruta_pt)["openvino"]):
+        yield "openvino", "openvino", False
+
+
+def coincidencias(referencia: np.ndarray, obtenido: np.ndarray) -> int:
+    """Cajas de `referencia` con alguna caja de `obtenido` con IoU >= umbral"""
+    if len(referencia) == 0 or len(obtenido) == 0:
+        return 0
+    return int((iou_matriz(referencia, obtenido).max(axis=1) >= IOU_COINCIDENCIA).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuente", required=True, help="Video, índice de webcam o carpeta de imágenes")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--modelo", default=MODELO_PERSONAS, help="Pesos .pt de referencia")
+    parser.add_argument("--conf", type=float, default=0.35)
+    parser.add_argument("--clases", type=int, nargs="*", default=[0],
+                        help="Clases a detectar (vacío = todas)")
+    parser.add_argument("--calentamiento", type=int, default=3)
+    args = parser.parse_args()
+
+    frames = list(leer_frames(args.fuente, args.frames))
+    if not frames:
+        print("No se leyeron frames")
+        return
+    clases = args.clases or None
+
+    referencia = None
+    print("-" * 78)
+    print(f"   {len(frames)} frames | modelo {args.modelo}")
+    print(f"   {'backend':<11} {'carga':>9} {'p50':>9} {'p95':>9} {'precisión':>10} {'recall':>8}")
+
+    for nombre, backend, int8 in candidatos(args.modelo):
+        inicio = time.perf_counter()
+        detector = cargar_detector(args.modelo, backend, int8)
+        carga = time.perf_counter() - inicio
+
+        for frame in frames[:args.calentamiento]:
+            detector.detectar([frame], conf=args.conf, clases=clases)
+
+        latencias, resultados = [], []
+        for frame in frames:
+            inicio = time.perf_counter()
+            resultados.append(detector.detectar([frame], conf=args.conf, clases=clases)[0].xyxy)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+        if referencia is None:
+            referencia = resultados
+
+        total_ref = sum(len(r) for r in referencia)
+        total_obt = sum(len(r) for r in resultados)
+        acertadas = sum(coincidencias(r, o) for r, o in zip(referencia, resultados))
+        encontradas = sum(coincidencias(o, r) for r, o in zip(referencia, resultados))
+        recall = acertadas / total_ref if total_ref else 1.0
+        precision = encontradas / total_obt if total_obt else 1.0
+
+        print(f"   {nombre:<11} {carga:8.2f}s {percentil(latencias, 50):7.1f}ms {percentil(latencias, 95):7.1f}ms "
+              f"{precision * 100:9.1f}% {recall * 100:7.1f}%")
+
+    print("-" * 78)
+
+
+if __name__ == "__main__":
+    main()
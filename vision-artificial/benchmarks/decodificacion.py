@@ -0,0 +1,81 @@
+"""
+Benchmark de los backends de captura (captura.py).
+
+Lee el mismo stream con cv2.VideoCapture y con el lector MJPEG a cada
+escala de decodificación, y reporta por frame:
+
+- tiempo de decodificación (p50/p95)
+- memoria asignada mientras se lee y decodifica (pico de tracemalloc)
+- tamaño del frame decodificado
+
+    python -m benchmarks.decodificacion --fuente http://192.168.1.125:8080/video --frames 200
+    python -m benchmarks.decodificacion --fuente http://192.168.1.125:8080/video --escalas 1 2 4
+"""
+
+import argparse
+import tracemalloc
+
+from captura import LectorMjpeg, LectorOpenCV, _turbojpeg
+from metricas import MedidorEtapas
+
+
+def medir_lector(lector, frames: int, calentamiento: int):
+    """(resumen de decodificación, KB asignados por frame, forma del frame)"""
+    if not lector.abrir():
+        return None
+    try:
+        for _ in range(calentamiento):
+            if lector.leer() is None:
+                return None
+
+        lector.medidor = MedidorEtapas(ventana=frames)
+        asignado, forma = [], None
+        tracemalloc.start()
+        for _ in range(frames):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            frame = lector.leer()
+            if frame is None:
+                break
+            asignado.append((tracemalloc.get_traced_memory()[1] - base) / 1024)
+            forma = frame.shape
+            del frame
+        tracemalloc.stop()
+    finally:
+        lector.cerrar()
+
+    if not asignado:
+        return None
+    return lector.medidor.resumen()["decodificacion"], sum(asignado) / len(asignado), forma
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuente", required=True, help="URL del stream MJPEG")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--calentamiento", type=int, default=10)
+    args = parser.parse_args()
+
+    lectores = [("opencv", LectorOpenCV(args.fuente))]
+    lectores += [(f"mjpeg 1/{e}", LectorMjpeg(args.fuente, escala=e)) for e in args.escalas]
+
+    decodificador = "PyTurboJPEG" if _turbojpeg()[0] is not None else "OpenCV (sin PyTurboJPEG)"
+    print("-" * 78)
+    print(f"   {args.frames} frames por backend | decodificador MJPEG: {decodificador}")
+    print(f"   {'backend':<12} {'frame':>11} {'p50':>9} {'p95':>9} {'asignado/frame':>16}")
+
+    for nombre, lector in lectores:
+        resultado = medir_lector(lector, args.frames, args.calentamiento)
+        if resultado is None:
+            print(f"   {nombre:<12} sin frames (¿la fuente es un stream MJPEG?)")
+            continue
+        decodificacion, kb_por_frame, forma = resultado
+        print(f"   {nombre:<12} {forma[1]:>5}x{forma[0]:<5} {decodificacion['p50_ms']:7.1f}ms "
+              f"{decodificacion['p95_ms']:7.1f}ms {kb_por_frame:13.0f} KB")
+
+    print("-" * 78)
+
+
+if __name__ == "__main__":
+    main()
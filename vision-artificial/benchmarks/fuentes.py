@@ -0,0 +1,25 @@
+"""Lectura de frames para los benchmarks (video, webcam o carpeta de imágenes)"""
+
+import os
+
+import cv2
+
+
+def leer_frames(fuente: str, maximo: int):
+    """Frames de un video, una webcam (índice) o una carpeta de imágenes"""
+    if os.path.isdir(fuente):
+        for nombre in sorted(os.listdir(fuente))[:maximo]:
+            frame = cv2.imread(os.path.join(fuente, nombre))
+            if frame is not None:
+                yield frame
+        return
+
+    cap = cv2.VideoCapture(int(fuente) if fuente.isdigit() else fuente)
+    try:
+        for _ in range(maximo):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
@@ -0,0 +1,105 @@
+"""
+Benchmark de los dos motores de ocupación sobre los mismos frames.
+
+- "deteccion": YOLO de personas en el frame + cruce con las mesas
+- "recortes": clasificador sobre el recorte de cada mesa (clasificador_mesas.py)
+
+Ambos corren sin tracking ni compuerta de movimiento (se infiere cada
+frame) y con el mismo layout, así que la diferencia es solo el motor.
+Reporta latencia p50/p95 por frame, concordancia entre ambos y, con
+--verdad (CSV frame,id_mesa,personas, como en benchmarks.replay),
+la exactitud de cada uno.
+
+    python -m benchmarks.motores_ocupacion --fuente grabacion.mp4 --frames 300
+    python -m benchmarks.motores_ocupacion --fuente frames/ --verdad verdad.csv --modelo best.onnx
+"""
+
+import argparse
+import logging
+import time
+
+import vision_system
+from benchmarks.fuentes import leer_frames
+from benchmarks.replay import cargar_verdad
+from config import RUTA_LAYOUT_MESAS, MODELO_CLASIFICADOR_MESAS
+from metricas import percentil
+from vision_system import SistemaVisionMesas, cargar_clasificador
+
+MOTORES = ("deteccion", "recortes")
+
+
+def exactitud(obtenido: dict, verdad: dict, frames: int) -> dict:
+    pares = [(v, obtenido.get(clave, 0)) for clave, v in verdad.items() if clave[0] <= frames]
+    if not pares:
+        return {}
+    return {
+        "pares": len(pares),
+        "conteo_exacto": sum(v == o for v, o in pares) / len(pares),
+        "error_absoluto_medio": sum(abs(v - o) for v, o in pares) / len(pares),
+        "estado_correcto": sum((v > 0) == (o > 0) for v, o in pares) / len(pares),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuente", required=True, help="Video o carpeta de imágenes")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--layout", default=RUTA_LAYOUT_MESAS)
+    parser.add_argument("--modelo", default=MODELO_CLASIFICADOR_MESAS, help="Clasificador de mesas (.pt u .onnx)")
+    parser.add_argument("--verdad", help="CSV frame,id_mesa,personas")
+    args = parser.parse_args()
+
+    vision_system.USAR_TRACKING = False
+    vision_system.USAR_COMPUERTA_MOVIMIENTO = False
+    logging.getLogger().setLevel(logging.WARNING)
+
+    deteccion = SistemaVisionMesas(conectar_mqtt=False, ruta_layout=args.layout, mostrar_ventana=False,
+                                   motor_ocupacion="deteccion")
+    sistemas = {
+        "deteccion": deteccion,
+        "recortes": SistemaVisionMesas(conectar_mqtt=False, ruta_layout=args.layout, mostrar_ventana=False,
+                                       motor_ocupacion="recortes", model_mesas=deteccion.model_mesas,
+                                       clasificador=cargar_clasificador(args.modelo)),
+    }
+    for sistema in sistemas.values():
+        sistema.calentar()
+
+    tiempos = {motor: [] for motor in MOTORES}
+    conteos = {motor: {} for motor in MOTORES}
+    frames = 0
+    for frame in leer_frames(args.fuente, args.frames):
+        frames += 1
+        for motor, sistema in sistemas.items():
+            inicio = time.perf_counter()
+            detecciones = sistema.procesar_frame(frame)
+            tiempos[motor].append(time.perf_counter() - inicio)
+            for det in detecciones:
+                conteos[motor][(frames, det.id_mesa)] = det.personas_detectadas
+
+    if frames == 0:
+        print("No se leyeron frames")
+        return
+
+    verdad = cargar_verdad(args.verdad) if args.verdad else None
+    print("-" * 70)
+    print(f"   {frames} frames | clasificador: {sistemas['recortes'].clasificador.nombre} ({args.modelo})")
+    for motor in MOTORES:
+        ms = [t * 1000 for t in tiempos[motor]]
+        print(f"   {motor:<10} p50 {percentil(ms, 50):7.1f} ms | p95 {percentil(ms, 95):7.1f} ms | "
+              f"{frames / (sum(tiempos[motor]) or 1):6.1f} FPS")
+        if verdad:
+            e = exactitud(conteos[motor], verdad, frames)
+            if e:
+                print(f"   {'':<10} conteo exacto {e['conteo_exacto'] * 100:.1f}% | "
+                      f"MAE {e['error_absoluto_medio']:.3f} | "
+                      f"estado libre/ocupada {e['estado_correcto'] * 100:.1f}% ({e['pares']} pares)")
+
+    claves = conteos["deteccion"].keys() | conteos["recortes"].keys()
+    if claves:
+        iguales = sum(conteos["deteccion"].get(c, 0) == conteos["recortes"].get(c, 0) for c in claves)
+        print(f"   Concordancia entre motores: {iguales / len(claves) * 100:.1f}% de {len(claves)} pares frame/mesa")
+    print("-" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Benchmark reproducible del sistema de visión sobre un video grabado.
+
+Corre el camino completo de SistemaVisionMesas (detección → asignación →
+política de publicación → payload MQTT) sobre un video o una carpeta de
+imágenes, sin cámara ni ventana, con un cliente MQTT falso que guarda
+los mensajes en memoria. Reporta:
+
+- FPS y percentiles de latencia por etapa (MedidorEtapas)
+- pico de memoria residente (RSS) del proceso
+- mensajes publicados y bytes enviados
+- serie temporal de personas por mesa (--serie archivo.csv)
+- exactitud contra una verdad de terreno opcional (--verdad), un CSV
+  con columnas frame,id_mesa,personas (frame empieza en 1)
+
+Para que dos corridas sobre la misma grabación den lo mismo en cualquier
+máquina, los modelos se calientan antes de medir y el tiempo que ven la
+política de publicación (debounce, heartbeat), la compuerta de movimiento
+y el rastreador es un reloj simulado que avanza 1/--fps-fuente por frame,
+no el reloj real.
+
+    python -m benchmarks.replay --fuente grabacion.mp4 --frames 500
+    python -m benchmarks.replay --fuente grabacion.mp4 --verdad verdad.csv --serie serie.csv
+    python -m benchmarks.replay --fuente frames/ --sin-tracking --roi
+    python -m benchmarks.replay --fuente grabacion.mp4 --sin-compuerta   # inferir todos los frames
+"""
+
+import argparse
+import csv
+import json
+import logging
+import resource
+import sys
+import time
+from typing import Dict, Tuple
+
+import vision_system
+from benchmarks.fuentes import leer_frames
+from config import RUTA_LAYOUT_MESAS
+from vision_system import SistemaVisionMesas
+
+# Origen del reloj simulado: la política y la compuerta usan 0 como
+# "nunca", así que el primer frame no puede caer en 0
+INICIO_RELOJ = 1000.0
+
+
+class _ResultadoPublicacion:
+    rc = 0  # mqtt.MQTT_ERR_SUCCESS
+
+
+class ClienteMqttFalso:
+    """Reemplaza a paho: guarda lo publicado en lugar de enviarlo"""
+
+    def __init__(self):
+        self.mensajes = []
+        self.bytes_enviados = 0
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.mensajes.append((time.perf_counter(), topic, payload))
+        self.bytes_enviados += len(payload) if payload else 0
+        return _ResultadoPublicacion()
+
+    def loop_stop(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+
+def pico_rss_mb() -> float:
+    """Pico de memoria residente del proceso (ru_maxrss: KB en Linux, bytes en macOS)"""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def cargar_verdad(ruta: str) -> Dict[Tuple[int, int], int]:
+    """{(frame, id_mesa): personas} desde un CSV frame,id_mesa,personas"""
+    verdad = {}
+    with open(ruta, newline="", encoding="utf-8") as f:
+        for fila in csv.DictReader(f):
+            verdad[(int(fila["frame"]), int(fila["id_mesa"]))] = int(fila["personas"])
+    return verdad
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuente", required=True, help="Video o carpeta de imágenes")
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--fps-fuente", type=float, default=30.0,
+                        help="FPS de la grabación (el reloj simulado avanza 1/FPS por frame)")
+    parser.add_argument("--layout", default=RUTA_LAYOUT_MESAS)
+    parser.add_argument("--verdad", help="CSV frame,id_mesa,personas")
+    parser.add_argument("--serie", help="Guardar la serie temporal frame,id_mesa,personas en este CSV")
+    parser.add_argument("--sin-tracking", action="store_true", help="Contar por frame, sin rastreador")
+    parser.add_argument("--roi", action="store_true", help="Detectar personas solo alrededor de las mesas")
+    parser.add_argument("--sin-compuerta", action="store_true", help="Inferir todos los frames, haya o no movimiento")
+    parser.add_argument("--json", action="store_true", help="Imprimir el resumen como JSON")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    vision_system.USAR_ROI_PERSONAS = args.roi
+    if args.sin_tracking:
+        vision_system.USAR_TRACKING = False
+    if args.sin_compuerta:
+        vision_system.USAR_COMPUERTA_MOVIMIENTO = False
+
+    rss_inicial = pico_rss_mb()
+    inicio_carga = time.perf_counter()
+    sistema = SistemaVisionMesas(conectar_mqtt=False, ruta_layout=args.layout, mostrar_ventana=False)
+    carga = time.perf_counter() - inicio_carga
+    # Fuera de la medición: la primera inferencia es mucho más lenta
+    sistema.calentar()
+
+    cliente = ClienteMqttFalso()
+    sistema.mqtt_client = cliente
+    sistema.mqtt_connected = True
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    serie = []
+    inicio, cpu_inicio = time.perf_counter(), time.process_time()
+    for numero, frame in enumerate(leer_frames(args.fuente, args.frames)):
+        ahora = INICIO_RELOJ + numero / args.fps_fuente
+        with sistema.medidor.medir("frame"):
+            detecciones = sistema.procesar_frame(frame, ahora=ahora)
+            sistema.publicar_si_corresponde(detecciones, ahora)
+        sistema.medidor.marcar_frame()
+        for det in detecciones:
+            serie.append((sistema.contador_frames, det.id_mesa, det.personas_detectadas))
+    duracion = time.perf_counter() - inicio
+    cpu = time.process_time() - cpu_inicio
+
+    frames = sistema.contador_frames
+    if frames == 0:
+        print("No se leyeron frames")
+        return
+
+    resumen = {
+        "frames": frames,
+        "carga_s": round(carga, 2),
+        "fps": round(frames / duracion, 2),
+        "cpu_ms_por_frame": round(cpu / frames * 1000, 1),
+        "frames_sin_inferencia": sistema.frames_sin_inferencia,
+        "rss_pico_mb": round(pico_rss_mb(), 1),
+        "rss_inicial_mb": round(rss_inicial, 1),
+        "mensajes": len(cliente.mensajes),
+        "bytes_publicados": cliente.bytes_enviados,
+        "etapas": {etapa: {k: round(v, 2) for k, v in datos.items()}
+                   for etapa, datos in sistema.medidor.resumen().items()},
+    }
+
+    if args.serie:
+        with open(args.serie, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(["frame", "id_mesa", "personas"])
+            escritor.writerows(serie)
+
+    if args.verdad:
+        verdad = cargar_verdad(args.verdad)
+        obtenido = {(frame, mesa): personas for frame, mesa, personas in serie}
+        pares = [(v, obtenido.get(clave, 0)) for clave, v in verdad.items() if clave[0] <= frames]
+        if pares:
+            resumen["exactitud"] = {
+                "pares": len(pares),
+                "conteo_exacto": round(sum(v == o for v, o in pares) / len(pares), 3),
+                "error_absoluto_medio": round(sum(abs(v - o) for v, o in pares) / len(pares), 3),
+                "estado_correcto": round(sum((v > 0) == (o > 0) for v, o in pares) / len(pares), 3),
+            }
+
+    if args.json:
+        print(json.dumps(resumen, indent=2, ensure_ascii=False))
+        return
+
+    print("-" * 70)
+    print(f"   {frames} frames en {duracion:.1f}s → {resumen['fps']} FPS (carga de modelos {carga:.1f}s)")
+    print(f"   CPU: {resumen['cpu_ms_por_frame']} ms/frame | "
+          f"frames sin inferencia (quietos): {resumen['frames_sin_inferencia']}")
+    print(f"   RSS pico: {resumen['rss_pico_mb']} MB (antes de cargar: {resumen['rss_inicial_mb']} MB)")
+    print(f"   Mensajes MQTT: {resumen['mensajes']} ({resumen['bytes_publicados']} bytes)")
+    for etapa, datos in resumen["etapas"].items():
+        print(f"   {etapa:<12} p50 {datos['p50_ms']:7.1f} ms | p95 {datos['p95_ms']:7.1f} ms | n={datos['n']}")
+    if "exactitud" in resumen:
+        e = resumen["exactitud"]
+        print(f"   Verdad ({e['pares']} pares frame/mesa): conteo exacto {e['conteo_exacto'] * 100:.1f}% | "
+              f"MAE {e['error_absoluto_medio']} | estado libre/ocupada {e['estado_correcto'] * 100:.1f}%")
+    print("-" * 70)
+
+
+if __name__ == "__main__":
+    main()
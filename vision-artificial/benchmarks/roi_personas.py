@@ -0,0 +1,106 @@
+"""
+Benchmark de la detección de personas por recortes (ROI) vs frame completo.
+
+Sobre los mismos frames corre detectar_personas (frame completo) y
+detectar_personas_roi (recortes alrededor de las mesas) y reporta:
+
+- tiempo de CPU y de reloj por frame de cada modo
+- recall de ROI sobre las personas del frame completo que quedan en
+  alguna mesa (las únicas que importan para la ocupación)
+- fracción de mesas con el mismo conteo de personas en ambos modos
+
+Necesita un layout calibrado (o el modelo de mesas) y un video o una
+carpeta de imágenes de la cámara.
+
+    python -m benchmarks.roi_personas --fuente grabacion.mp4 --frames 200 --imgsz 480
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import vision_system
+from config import RUTA_LAYOUT_MESAS, OVERLAP_PERSONA_MESA
+from benchmarks.fuentes import leer_frames
+from geometria import matriz_asignacion, iou_matriz
+from vision_system import SistemaVisionMesas
+
+IOU_COINCIDENCIA = 0.5
+
+
+def medir(funcion):
+    cpu, reloj = time.process_time(), time.perf_counter()
+    resultado = funcion()
+    return resultado, (time.process_time() - cpu) * 1000, (time.perf_counter() - reloj) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuente", required=True, help="Video, índice de webcam o carpeta de imágenes")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--layout", default=RUTA_LAYOUT_MESAS)
+    parser.add_argument("--imgsz", type=int, default=vision_system.IMGSZ_PERSONAS,
+                        help="Tamaño de entrada del modelo de personas")
+    parser.add_argument("--margen", type=float, default=vision_system.MARGEN_ROI)
+    parser.add_argument("--separacion", type=float, default=vision_system.SEPARACION_MINIMA_ROI,
+                        help="Hueco mínimo entre recortes (fracción del alto del frame)")
+    parser.add_argument("--calentamiento", type=int, default=5)
+    args = parser.parse_args()
+
+    vision_system.IMGSZ_PERSONAS = args.imgsz
+    vision_system.MARGEN_ROI = args.margen
+    vision_system.SEPARACION_MINIMA_ROI = args.separacion
+    vision_system.FRACCION_MAXIMA_ROI = 1.0  # medir siempre el camino por recortes
+
+    sistema = SistemaVisionMesas(conectar_mqtt=False, ruta_layout=args.layout)
+
+    tiempos = {"completo": ([], []), "roi": ([], [])}
+    relevantes = encontradas = 0
+    mesas_iguales = mesas_total = 0
+
+    for n, frame in enumerate(leer_frames(args.fuente, args.frames + args.calentamiento)):
+        mesas = sistema.obtener_mesas(frame)
+        completo, cpu_c, reloj_c = medir(lambda: sistema.detectar_personas(frame))
+        roi, cpu_r, reloj_r = medir(lambda: sistema.detectar_personas_roi(frame, mesas))
+
+        if n < args.calentamiento:
+            continue
+        tiempos["completo"][0].append(cpu_c)
+        tiempos["completo"][1].append(reloj_c)
+        tiempos["roi"][0].append(cpu_r)
+        tiempos["roi"][1].append(reloj_r)
+
+        mesas_xyxy = vision_system.CajasDetectadas.desde_lista(mesas).xyxy
+        en_mesa_completo = matriz_asignacion(mesas_xyxy, completo.xyxy, OVERLAP_PERSONA_MESA)
+        en_mesa_roi = matriz_asignacion(mesas_xyxy, roi.xyxy, OVERLAP_PERSONA_MESA)
+
+        # Recall sobre las personas que cuentan para alguna mesa
+        relevantes_frame = completo.xyxy[en_mesa_completo.any(axis=0)]
+        relevantes += len(relevantes_frame)
+        if len(relevantes_frame) and len(roi):
+            encontradas += int((iou_matriz(relevantes_frame, roi.xyxy).max(axis=1) >= IOU_COINCIDENCIA).sum())
+
+        mesas_total += len(mesas_xyxy)
+        mesas_iguales += int((en_mesa_completo.sum(axis=1) == en_mesa_roi.sum(axis=1)).sum())
+
+    frames = len(tiempos["roi"][0])
+    if frames == 0:
+        print("No se leyeron frames suficientes")
+        return
+
+    cpu_c, cpu_r = np.mean(tiempos["completo"][0]), np.mean(tiempos["roi"][0])
+    print("-" * 60)
+    print(f"   {frames} frames | imgsz {args.imgsz} | margen {args.margen}")
+    for modo, (cpu, reloj) in tiempos.items():
+        print(f"   {modo:<9} CPU {np.mean(cpu):8.1f} ms | reloj {np.mean(reloj):8.1f} ms "
+              f"(p95 {np.percentile(reloj, 95):.1f} ms)")
+    print(f"   CPU ahorrada por frame: {cpu_c - cpu_r:.1f} ms ({(1 - cpu_r / cpu_c) * 100 if cpu_c else 0:.0f}%)")
+    recall = encontradas / relevantes if relevantes else 1.0
+    print(f"   Recall ROI (personas en mesa): {recall * 100:.1f}% ({encontradas}/{relevantes})")
+    print(f"   Mesas con el mismo conteo: {mesas_iguales / max(mesas_total, 1) * 100:.1f}%")
+    print("-" * 60)
+
+
+if __name__ == "__main__":
+    main()
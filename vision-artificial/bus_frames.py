@@ -0,0 +1,335 @@
+"""
+Bus de frames en memoria compartida para varios procesos del mismo equipo.
+
+Si en la Raspberry corren a la vez, por ejemplo, un grabador y el
+detector, cada uno abriendo la cámara por su cuenta, el stream se
+descarga y decodifica dos veces. Con el bus, un único daemon de captura
+decodifica cada frame una vez y lo escribe en un anillo de N slots en
+multiprocessing.shared_memory; cualquier cantidad de procesos locales lee
+el último frame como una vista NumPy del segmento, sin copiarlo.
+
+Disposición del segmento:
+
+    cabecera | N x (secuencia, timestamp) | N x frame (alto x ancho x 3, uint8)
+
+El daemon escribe el frame k en el slot k % N. Mientras escribe, la
+secuencia del slot vale 0; al terminar la pone en k y recién entonces
+publica k en la cabecera. Un cliente toma la secuencia de la cabecera y
+devuelve una vista del slot; la vista sigue siendo válida mientras el
+daemon no dé la vuelta al anillo (N - 1 frames), lo que se comprueba con
+ClienteBusFrames.vigente(secuencia) después de usarla.
+
+    python bus_frames.py --fuente http://192.168.1.125:8080/video --nombre cam01
+    python vision_system.py --camara bus:cam01
+"""
+
+import argparse
+import logging
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from captura import crear_lector, reconectar, es_archivo
+
+logger = logging.getLogger(__name__)
+
+MAGIA = 0x56495346  # "VISF"
+VERSION = 1
+
+CABECERA = np.dtype([
+    ("magia", "<u4"), ("version", "<u4"),
+    ("slots", "<u4"), ("alto", "<u4"), ("ancho", "<u4"), ("canales", "<u4"),
+    ("secuencia", "<u8"),
+    ("latido", "<f8"),  # time.time() de la última escritura del daemon
+])
+SLOT = np.dtype([("secuencia", "<u8"), ("timestamp", "<f8")])
+ALINEACION = 64
+SEGUNDOS_LATIDO_VIVO = 5.0
+
+
+def _disposicion(slots: int, forma: Tuple[int, int, int]) -> Tuple[int, int, int]:
+    """(offset de la tabla de slots, offset del primer frame, tamaño total)"""
+    offset_slots = CABECERA.itemsize
+    offset_frames = offset_slots + slots * SLOT.itemsize
+    offset_frames = (offset_frames + ALINEACION - 1) // ALINEACION * ALINEACION
+    return offset_slots, offset_frames, offset_frames + slots * int(np.prod(forma))
+
+
+class _Segmento:
+    """Vistas NumPy sobre el segmento compartido (comunes a daemon y cliente)"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, slots: int, forma: Tuple[int, int, int]):
+        self.shm = shm
+        offset_slots, offset_frames, _ = _disposicion(slots, forma)
+        self.cabecera = np.ndarray((), dtype=CABECERA, buffer=shm.buf)
+        self.tabla = np.ndarray((slots,), dtype=SLOT, buffer=shm.buf, offset=offset_slots)
+        self.frames = np.ndarray((slots,) + forma, dtype=np.uint8, buffer=shm.buf, offset=offset_frames)
+
+    def liberar(self):
+        # Las vistas deben soltarse antes de cerrar el segmento
+        self.cabecera = self.tabla = self.frames = None
+
+
+class PublicadorBusFrames:
+    """Lado del daemon: crea el segmento y escribe los frames"""
+
+    def __init__(self, nombre: str, forma: Tuple[int, int, int], slots: int = 4):
+        if slots < 2:
+            raise ValueError("El bus necesita al menos 2 slots")
+        self.nombre = nombre
+        self.forma = tuple(forma)
+        self.slots = slots
+
+        _, _, tamano = _disposicion(slots, self.forma)
+        try:
+            self.shm = shared_memory.SharedMemory(name=nombre, create=True, size=tamano)
+        except FileExistsError:
+            # Restos de un daemon anterior que terminó sin limpiar, salvo
+            # que siga vivo (latido reciente)
+            viejo = shared_memory.SharedMemory(name=nombre)
+            cabecera = np.ndarray((), dtype=CABECERA, buffer=viejo.buf)
+            vivo = int(cabecera["magia"]) == MAGIA and time.time() - float(cabecera["latido"]) < SEGUNDOS_LATIDO_VIVO
+            del cabecera
+            viejo.close()
+            if vivo:
+                raise RuntimeError(f"Ya hay un daemon publicando en el bus '{nombre}'")
+            viejo.unlink()
+            self.shm = shared_memory.SharedMemory(name=nombre, create=True, size=tamano)
+
+        self._segmento = _Segmento(self.shm, slots, self.forma)
+        cabecera = self._segmento.cabecera
+        cabecera["slots"], cabecera["alto"], cabecera["ancho"], cabecera["canales"] = slots, *self.forma
+        cabecera["secuencia"] = 0
+        cabecera["latido"] = time.time()
+        self._segmento.tabla["secuencia"] = 0
+        cabecera["version"] = VERSION
+        cabecera["magia"] = MAGIA  # al final: el segmento recién ahora es legible
+        self.secuencia = 0
+
+    def publicar(self, frame: np.ndarray):
+        """Copia el frame al siguiente slot y lo publica"""
+        if frame.shape != self.forma:
+            frame = cv2.resize(frame, (self.forma[1], self.forma[0]), interpolation=cv2.INTER_AREA)
+
+        secuencia = self.secuencia + 1
+        slot = secuencia % self.slots
+        tabla = self._segmento.tabla
+        tabla["secuencia"][slot] = 0  # escribiendo
+        np.copyto(self._segmento.frames[slot], frame)
+        ahora = time.time()
+        tabla["timestamp"][slot] = ahora
+        tabla["secuencia"][slot] = secuencia
+        self._segmento.cabecera["secuencia"] = secuencia
+        self._segmento.cabecera["latido"] = ahora
+        self.secuencia = secuencia
+
+    def latir(self):
+        """Marca al daemon como vivo aunque no haya frames (cámara caída)"""
+        self._segmento.cabecera["latido"] = time.time()
+
+    def cerrar(self):
+        self._segmento.liberar()
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _adjuntar(nombre: str) -> shared_memory.SharedMemory:
+    """
+    Abre un segmento existente sin registrarlo en el resource_tracker: en
+    Python < 3.13 el tracker del cliente lo borraría al salir aunque el
+    daemon lo siga usando
+    """
+    try:
+        return shared_memory.SharedMemory(name=nombre, track=False)
+    except TypeError:
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=nombre)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class ClienteBusFrames:
+    """Lado de los consumidores: lee el último frame como vista sin copia"""
+
+    def __init__(self, nombre: str, intervalo_sondeo: float = 0.002):
+        """
+        Args:
+            nombre: Nombre del bus (el --nombre del daemon)
+            intervalo_sondeo: Espera entre consultas de la secuencia en leer()
+        """
+        self.nombre = nombre
+        self.intervalo_sondeo = intervalo_sondeo
+        self.shm = _adjuntar(nombre)
+
+        cabecera = np.ndarray((), dtype=CABECERA, buffer=self.shm.buf)
+        if int(cabecera["magia"]) != MAGIA or int(cabecera["version"]) != VERSION:
+            del cabecera
+            self.shm.close()
+            raise RuntimeError(f"El segmento '{nombre}' no es un bus de frames (o todavía se está creando)")
+        self.slots = int(cabecera["slots"])
+        self.forma = (int(cabecera["alto"]), int(cabecera["ancho"]), int(cabecera["canales"]))
+        del cabecera
+
+        self._segmento = _Segmento(self.shm, self.slots, self.forma)
+        self.ultima_secuencia = 0
+
+    @property
+    def secuencia(self) -> int:
+        """Secuencia del último frame publicado por el daemon"""
+        return int(self._segmento.cabecera["secuencia"])
+
+    def segundos_sin_latido(self) -> float:
+        """Segundos desde la última señal del daemon (para detectar que murió)"""
+        return time.time() - float(self._segmento.cabecera["latido"])
+
+    def vigente(self, secuencia: int) -> bool:
+        """True si el slot de `secuencia` todavía no fue sobrescrito"""
+        return int(self._segmento.tabla["secuencia"][secuencia % self.slots]) == secuencia
+
+    def ultimo(self, copiar: bool = False) -> Optional[Tuple[int, float, np.ndarray]]:
+        """
+        Último frame publicado, haya sido leído o no.
+
+        Returns:
+            (secuencia, timestamp time.time() de captura, frame) o None si
+            todavía no hay frames. Con copiar=False el frame es una vista
+            de solo lectura del segmento (ver vigente())
+        """
+        for _ in range(self.slots):
+            secuencia = self.secuencia
+            if secuencia == 0:
+                return None
+            slot = secuencia % self.slots
+            timestamp = float(self._segmento.tabla["timestamp"][slot])
+            frame = self._segmento.frames[slot]
+            if copiar:
+                frame = frame.copy()
+            else:
+                frame = frame.view()
+                frame.flags.writeable = False
+            # Si el daemon empezó a reescribir el slot mientras tanto, reintentar
+            if self.vigente(secuencia):
+                self.ultima_secuencia = secuencia
+                return secuencia, timestamp, frame
+        return None
+
+    def leer(self, timeout: float = 1.0, copiar: bool = False) -> Optional[Tuple[int, float, np.ndarray]]:
+        """Espera un frame más nuevo que el último leído (None si no llega en `timeout`)"""
+        limite = time.monotonic() + timeout
+        while self.secuencia <= self.ultima_secuencia:
+            if time.monotonic() >= limite:
+                return None
+            time.sleep(self.intervalo_sondeo)
+        return self.ultimo(copiar)
+
+    def cerrar(self):
+        self._segmento.liberar()
+        self.shm.close()
+
+
+class LectorBus:
+    """
+    Lector (interfaz de captura.py) que consume un bus de frames; se usa
+    con fuentes "bus:NOMBRE". Entrega copias porque el sistema de visión
+    guarda los frames entre threads más tiempo del que el anillo garantiza
+    """
+
+    def __init__(self, nombre: str, medidor=None, timeout: float = 2.0):
+        self.nombre_bus = nombre
+        self.medidor = medidor
+        self.timeout = timeout
+        self.cliente: Optional[ClienteBusFrames] = None
+        self.nombre = f"bus ({nombre})"
+
+        # Estadísticas
+        self.frames = 0
+        self.bytes_decodificados = 0  # no decodifica: bytes copiados del bus
+
+    @property
+    def abierto(self) -> bool:
+        return self.cliente is not None
+
+    def abrir(self) -> bool:
+        self.cerrar()
+        try:
+            self.cliente = ClienteBusFrames(self.nombre_bus)
+        except (FileNotFoundError, RuntimeError) as e:
+            logger.warning(f"No se pudo abrir el bus de frames '{self.nombre_bus}': {e}")
+            return False
+        return True
+
+    def leer(self) -> Optional[np.ndarray]:
+        """Siguiente frame del bus, o None si el daemon dejó de publicar"""
+        lectura = self.cliente.leer(timeout=self.timeout, copiar=True)
+        if lectura is None:
+            return None
+        frame = lectura[2]
+        self.frames += 1
+        self.bytes_decodificados += frame.nbytes
+        return frame
+
+    def cerrar(self):
+        if self.cliente is not None:
+            self.cliente.cerrar()
+            self.cliente = None
+
+
+def ejecutar_daemon(fuente, nombre: str, slots: int, backend: str, escala: int):
+    """Lee la cámara (con reconexión) y publica cada frame en el bus"""
+    lector = crear_lector(fuente, backend, escala)
+    if not lector.abrir():
+        logger.error(f"No se pudo conectar a la cámara {fuente}")
+        return
+
+    frame = lector.leer()
+    if frame is None:
+        logger.error("La cámara no entregó ningún frame")
+        return
+
+    bus = PublicadorBusFrames(nombre, frame.shape, slots)
+    logger.info(f"✓ Bus '{nombre}' listo: {frame.shape[1]}x{frame.shape[0]}, {slots} slots "
+                f"({bus.shm.size / 1024 / 1024:.1f} MB)")
+    detener = threading.Event()
+    ultimo_reporte = time.monotonic()
+    try:
+        while frame is not None or not es_archivo(fuente):
+            if frame is None:
+                bus.latir()
+                logger.error("Conexión con cámara perdida")
+                if not reconectar(lector, detener):
+                    break
+            else:
+                bus.publicar(frame)
+
+            if time.monotonic() - ultimo_reporte >= 30:
+                ultimo_reporte = time.monotonic()
+                logger.info(f"Bus '{nombre}': {bus.secuencia} frames publicados")
+            frame = lector.leer()
+    except KeyboardInterrupt:
+        logger.info("Interrumpido por el usuario")
+    finally:
+        lector.cerrar()
+        bus.cerrar()
+        logger.info(f"Bus '{nombre}' cerrado ({bus.secuencia} frames)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Daemon de captura que publica los frames en memoria compartida")
+    parser.add_argument("--fuente", required=True, help="URL de cámara, índice de webcam o video")
+    parser.add_argument("--nombre", required=True, help="Nombre del bus (los clientes usan bus:NOMBRE)")
+    parser.add_argument("--slots", type=int, default=4, help="Frames en el anillo")
+    parser.add_argument("--backend", default="auto", help="Backend de captura: auto, mjpeg u opencv")
+    parser.add_argument("--escala", type=int, default=1, help="Divisor de decodificación MJPEG (1, 2, 4 u 8)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S')
+    fuente = int(args.fuente) if args.fuente.isdigit() else args.fuente
+    ejecutar_daemon(fuente, args.nombre, args.slots, args.backend, args.escala)
+
+
+if __name__ == "__main__":
+    main()
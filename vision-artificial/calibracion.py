@@ -0,0 +1,140 @@
+"""
+Calibración del layout de mesas de una cámara.
+
+Las mesas de una vista fija no se mueven, así que basta detectarlas una
+vez: durante un período de calentamiento se corre el modelo de mesas,
+se agrupan las cajas de todos los frames y se guarda un archivo JSON con
+IDs estables. En ejecución, SistemaVisionMesas carga ese layout y corre
+solo el modelo de personas.
+
+Uso:
+    python calibracion.py --frames 150 --salida layout_mesas.json
+"""
+
+import argparse
+import json
+from datetime import datetime
+from typing import List, Tuple
+
+import numpy as np
+
+# Una caja se suma a un grupo si su IoU con el representante supera este valor
+IOU_MINIMO_GRUPO = 0.5
+
+# Fracción mínima de frames en los que debe aparecer una mesa para conservarla
+PRESENCIA_MINIMA = 0.5
+
+Caja = Tuple[int, int, int, int]
+
+
+def iou(a: Caja, b: Caja) -> float:
+    """Intersección sobre unión de dos cajas (x1, y1, x2, y2)"""
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    interseccion = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - interseccion
+    return interseccion / union if union > 0 else 0.0
+
+
+def agrupar_cajas(cajas_por_frame: List[List[Caja]],
+                  iou_minimo: float = IOU_MINIMO_GRUPO,
+                  presencia_minima: float = PRESENCIA_MINIMA) -> List[Caja]:
+    """
+    Agrupa las detecciones de varios frames en mesas únicas.
+
+    Cada grupo usa la mediana de sus cajas como representante. Se descartan
+    los grupos que aparecen en menos de `presencia_minima` de los frames
+    (falsos positivos intermitentes). El resultado queda ordenado de
+    izquierda a derecha, que define los IDs estables.
+    """
+    grupos: List[List[Caja]] = []
+
+    for cajas in cajas_por_frame:
+        for caja in cajas:
+            mejor, mejor_iou = None, iou_minimo
+            for grupo in grupos:
+                valor = iou(caja, _mediana(grupo))
+                if valor >= mejor_iou:
+                    mejor, mejor_iou = grupo, valor
+            if mejor is None:
+                grupos.append([caja])
+            else:
+                mejor.append(caja)
+
+    minimo = presencia_minima * len(cajas_por_frame)
+    mesas = [_mediana(grupo) for grupo in grupos if len(grupo) >= minimo]
+    mesas.sort(key=lambda c: c[0])
+    return mesas
+
+
+def _mediana(grupo: List[Caja]) -> Caja:
+    return tuple(int(v) for v in np.median(np.array(grupo), axis=0))
+
+
+def guardar_layout(ruta: str, mesas: List[Caja], resolucion: Tuple[int, int], device_id: str):
+    """Escribe el layout: IDs estables (1..N) → polígono de cada mesa"""
+    layout = {
+        "version": 1,
+        "device_id": device_id,
+        "creado": datetime.now().isoformat(),
+        "resolucion": list(resolucion),
+        "mesas": [
+            {
+                "id_mesa": idx + 1,
+                "poligono": [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+            }
+            for idx, (x1, y1, x2, y2) in enumerate(mesas)
+        ]
+    }
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(layout, f, indent=2)
+
+
+def cargar_layout(ruta: str) -> Tuple[List[Tuple[int, Caja]], Tuple[int, int]]:
+    """
+    Lee un layout y retorna ([(id_mesa, caja)], (ancho, alto)).
+
+    Se usa el rectángulo envolvente de cada polígono, así el archivo se
+    puede editar a mano con polígonos de más de 4 puntos.
+    """
+    with open(ruta, encoding="utf-8") as f:
+        layout = json.load(f)
+
+    mesas = []
+    for mesa in layout["mesas"]:
+        puntos = np.array(mesa["poligono"])
+        x1, y1 = puntos.min(axis=0)
+        x2, y2 = puntos.max(axis=0)
+        mesas.append((int(mesa["id_mesa"]), (int(x1), int(y1), int(x2), int(y2))))
+
+    return mesas, tuple(layout["resolucion"])
+
+
+def escalar_caja(caja: Caja, origen: Tuple[int, int], destino: Tuple[int, int]) -> Caja:
+    """Escala una caja de la resolución `origen` a `destino` (ancho, alto)"""
+    fx = destino[0] / origen[0]
+    fy = destino[1] / origen[1]
+    x1, y1, x2, y2 = caja
+    return int(x1 * fx), int(y1 * fy), int(x2 * fx), int(y2 * fy)
+
+
+def main():
+    from config import IP_WEBCAM, RUTA_LAYOUT_MESAS
+    from vision_system import SistemaVisionMesas
+
+    parser = argparse.ArgumentParser(description="Calibra el layout de mesas de una cámara")
+    parser.add_argument("--fuente", default=IP_WEBCAM, help="URL de cámara, índice de webcam o archivo de video")
+    parser.add_argument("--frames", type=int, default=150, help="Frames de calentamiento")
+    parser.add_argument("--salida", default=RUTA_LAYOUT_MESAS)
+    args = parser.parse_args()
+
+    fuente = int(args.fuente) if str(args.fuente).isdigit() else args.fuente
+
+    # Solo el modelo de mesas: el de personas no se usa al calibrar
+    sistema = SistemaVisionMesas(ip_webcam=fuente, conectar_mqtt=False, usar_layout=False,
+                                 cargar_personas=False)
+    sistema.calibrar_layout(args.frames, args.salida)
+
+
+if __name__ == "__main__":
+    main()
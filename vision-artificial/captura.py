@@ -0,0 +1,406 @@
+"""
+Captura de video en un thread dedicado que conserva solo el último frame.
+
+OpenCV acumula frames en un buffer interno cuando el consumidor es más
+lento que la cámara (típico con IP Webcam + YOLO en CPU), y la inferencia
+termina corriendo sobre imágenes de hace varios segundos. Este thread lee
+continuamente, descarta lo viejo y deja disponible siempre el frame más
+reciente junto con su número de secuencia y la hora de captura.
+
+La lectura en sí la hace un lector intercambiable:
+
+- LectorMjpeg: lee el stream MJPEG por HTTP (IP Webcam) en un buffer
+  reutilizado y decodifica cada JPEG directamente a escala reducida
+  (escalado DCT: el decodificador ni siquiera calcula los píxeles que
+  se descartarían). Usa PyTurboJPEG si está instalado, si no OpenCV
+- LectorOpenCV: cv2.VideoCapture (webcams locales, RTSP, archivos)
+- LectorBus (bus_frames.py): frames ya decodificados por el daemon de
+  captura, compartidos con otros procesos del equipo
+
+Si la cámara se cae, se reconecta con backoff exponencial en lugar de
+terminar; solo un archivo de video termina al llegar al final.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+import urllib.parse
+import urllib.request
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from metricas import MedidorEtapas
+
+logger = logging.getLogger(__name__)
+
+ESCALAS_VALIDAS = (1, 2, 4, 8)
+FLAGS_IMDECODE = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+SOI, EOI = b"\xff\xd8", b"\xff\xd9"
+
+
+def es_archivo(fuente) -> bool:
+    """True si la fuente es un archivo de video (termina, no se reconecta)"""
+    return isinstance(fuente, str) and os.path.isfile(fuente)
+
+
+def pedir_resolucion(url: str, resolucion: str, timeout: float = 3.0) -> bool:
+    """
+    Pide a IP Webcam que transmita en `resolucion` ("640x480") vía
+    /settings/video_size. Otras cámaras lo ignoran (se loguea y sigue)
+    """
+    partes = urllib.parse.urlsplit(url)
+    ajuste = f"{partes.scheme}://{partes.netloc}/settings/video_size?set={resolucion}"
+    try:
+        with urllib.request.urlopen(ajuste, timeout=timeout):
+            pass
+        logger.info(f"Resolución de cámara pedida: {resolucion}")
+        return True
+    except (OSError, ValueError) as e:
+        logger.warning(f"La cámara no aceptó la resolución {resolucion}: {e}")
+        return False
+
+
+def _turbojpeg():
+    """(decodificador, flags) de PyTurboJPEG, o (None, 0) si no está instalado"""
+    try:
+        from turbojpeg import TurboJPEG, TJFLAG_FASTDCT, TJFLAG_FASTUPSAMPLE
+        return TurboJPEG(), TJFLAG_FASTDCT | TJFLAG_FASTUPSAMPLE
+    except (ImportError, RuntimeError, OSError):
+        return None, 0
+
+
+class LectorOpenCV:
+    """cv2.VideoCapture; separa grab (red) de retrieve (decodificación)"""
+
+    def __init__(self, fuente, resolucion: str = "", medidor: Optional[MedidorEtapas] = None):
+        self.fuente = fuente
+        self.resolucion = resolucion
+        self.medidor = medidor
+        self.cap: Optional[cv2.VideoCapture] = None
+        self.nombre = "opencv"
+
+        # Estadísticas
+        self.frames = 0
+        self.bytes_decodificados = 0
+
+    def abrir(self) -> bool:
+        self.cap = cv2.VideoCapture(self.fuente)
+        # Pedir a OpenCV un buffer mínimo (no todos los backends lo respetan)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if self.resolucion:
+            ancho, alto = (int(v) for v in self.resolucion.lower().split("x"))
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, ancho)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, alto)
+        return self.cap.isOpened()
+
+    @property
+    def abierto(self) -> bool:
+        return self.cap is not None and self.cap.isOpened()
+
+    def leer(self) -> Optional[np.ndarray]:
+        """Siguiente frame, o None si la conexión se cortó"""
+        if not self.cap.grab():
+            return None
+        inicio = time.perf_counter()
+        ret, frame = self.cap.retrieve()
+        if not ret:
+            return None
+        if self.medidor is not None:
+            self.medidor.registrar("decodificacion", time.perf_counter() - inicio)
+        self.frames += 1
+        self.bytes_decodificados += frame.nbytes
+        return frame
+
+    def cerrar(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+class LectorMjpeg:
+    """
+    Stream MJPEG por HTTP decodificado a escala reducida.
+
+    Los bytes comprimidos se leen con readinto() sobre un único bytearray
+    que se reutiliza entre frames, y cada JPEG se decodifica desde una
+    vista de ese buffer (sin copias intermedias). El único buffer nuevo
+    por frame es la imagen decodificada, que ya sale 1/escala de ancho y
+    alto: se comparte sin copiar con los threads de inferencia y
+    visualización, por eso no se recicla.
+    """
+
+    def __init__(self, url: str, escala: int = 2, resolucion: str = "",
+                 medidor: Optional[MedidorEtapas] = None, timeout: float = 5.0,
+                 tamano_buffer: int = 1 << 20):
+        """
+        Args:
+            url: URL del stream (p. ej. http://ip:8080/video)
+            escala: Divisor del tamaño decodificado (1, 2, 4 u 8)
+            resolucion: Resolución a pedir a IP Webcam ("" = no cambiarla)
+            medidor: Donde registrar la etapa "decodificacion" (opcional)
+            timeout: Timeout de conexión y lectura (segundos)
+            tamano_buffer: Tamaño inicial del buffer de bytes (crece si
+                llega un JPEG más grande)
+        """
+        if escala not in ESCALAS_VALIDAS:
+            raise ValueError(f"Escala de decodificación inválida: {escala} (usar {ESCALAS_VALIDAS})")
+        self.url = url
+        self.escala = escala
+        self.resolucion = resolucion
+        self.medidor = medidor
+        self.timeout = timeout
+
+        self._respuesta = None
+        self._buffer = bytearray(tamano_buffer)
+        self._vista = memoryview(self._buffer)
+        self._inicio = 0
+        self._fin = 0
+
+        self._turbo, self._flags_turbo = _turbojpeg()
+        self.nombre = f"mjpeg ({'turbojpeg' if self._turbo else 'opencv'}, 1/{escala})"
+
+        # Estadísticas
+        self.frames = 0
+        self.bytes_decodificados = 0
+        self.crecimientos_buffer = 0
+
+    def abrir(self) -> bool:
+        self.cerrar()
+        if self.resolucion:
+            pedir_resolucion(self.url, self.resolucion, self.timeout)
+        try:
+            self._respuesta = urllib.request.urlopen(self.url, timeout=self.timeout)
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo abrir el stream {self.url}: {e}")
+            return False
+        self._inicio = self._fin = 0
+        return True
+
+    @property
+    def abierto(self) -> bool:
+        return self._respuesta is not None
+
+    def _compactar(self, desde: int):
+        """Mueve los bytes pendientes al inicio del buffer (y lo agranda si está lleno)"""
+        pendientes = self._fin - desde
+        if desde > 0:
+            self._vista[:pendientes] = self._vista[desde:self._fin]
+        elif pendientes == len(self._buffer):
+            nuevo = bytearray(len(self._buffer) * 2)
+            nuevo[:pendientes] = self._vista[:pendientes]
+            self._buffer, self._vista = nuevo, memoryview(nuevo)
+            self.crecimientos_buffer += 1
+        self._inicio, self._fin = 0, pendientes
+
+    def _siguiente_jpeg(self) -> Optional[memoryview]:
+        """Vista (sin copia) del próximo JPEG completo del stream"""
+        while True:
+            soi = self._buffer.find(SOI, self._inicio, self._fin)
+            if soi >= 0:
+                eoi = self._buffer.find(EOI, soi + 2, self._fin)
+                if eoi >= 0:
+                    self._inicio = eoi + 2
+                    return self._vista[soi:eoi + 2]
+                self._compactar(soi)
+            else:
+                # Conservar el último byte por si es la primera mitad de SOI
+                self._compactar(max(self._fin - 1, self._inicio))
+
+            try:
+                leidos = self._respuesta.readinto(self._vista[self._fin:])
+            except (OSError, ValueError):
+                return None
+            if not leidos:
+                return None
+            self._fin += leidos
+
+    def _decodificar(self, jpeg: memoryview) -> Optional[np.ndarray]:
+        datos = np.frombuffer(jpeg, dtype=np.uint8)
+        if self._turbo is not None:
+            try:
+                return self._turbo.decode(datos, scaling_factor=(1, self.escala), flags=self._flags_turbo)
+            except OSError:
+                return None  # JPEG corrupto: se pasa al siguiente
+        return cv2.imdecode(datos, FLAGS_IMDECODE[self.escala])
+
+    def leer(self) -> Optional[np.ndarray]:
+        """Siguiente frame decodificado, o None si la conexión se cortó"""
+        if self._respuesta is None:
+            return None
+        while True:
+            jpeg = self._siguiente_jpeg()
+            if jpeg is None:
+                return None
+
+            inicio = time.perf_counter()
+            frame = self._decodificar(jpeg)
+            if frame is None:
+                continue
+            if self.medidor is not None:
+                self.medidor.registrar("decodificacion", time.perf_counter() - inicio)
+            self.frames += 1
+            self.bytes_decodificados += frame.nbytes
+            return frame
+
+    def cerrar(self):
+        if self._respuesta is not None:
+            try:
+                self._respuesta.close()
+            except OSError:
+                pass
+            self._respuesta = None
+
+
+def crear_lector(fuente, backend: str = "auto", escala: int = 1, resolucion: str = "",
+                 medidor: Optional[MedidorEtapas] = None):
+    """
+    Lector para `fuente`. backend "auto" usa LectorMjpeg para URLs http(s)
+    y LectorOpenCV para el resto (webcams, RTSP, archivos). Las fuentes
+    "bus:NOMBRE" leen del bus de frames en memoria compartida (bus_frames.py)
+    """
+    if isinstance(fuente, str) and fuente.startswith("bus:"):
+        from bus_frames import LectorBus  # bus_frames importa este módulo
+        return LectorBus(fuente[len("bus:"):], medidor)
+    if backend == "auto":
+        backend = "mjpeg" if isinstance(fuente, str) and fuente.startswith(("http://", "https://")) else "opencv"
+    if backend == "mjpeg":
+        return LectorMjpeg(fuente, escala, resolucion, medidor)
+    if backend == "opencv":
+        return LectorOpenCV(fuente, resolucion, medidor)
+    raise ValueError(f"Backend de captura desconocido: {backend}")
+
+
+def reconectar(lector, detener: threading.Event, espera_inicial: float = 1.0,
+               espera_maxima: float = 30.0) -> bool:
+    """
+    Reintenta abrir el lector con backoff exponencial (con jitter) hasta
+    lograrlo o hasta que se pida detener. Retorna True si reconectó
+    """
+    lector.cerrar()
+    espera = espera_inicial
+    intento = 1
+    while not detener.is_set():
+        logger.warning(f"Reconectando con la cámara en {espera:.1f}s (intento {intento})...")
+        if detener.wait(espera * random.uniform(0.8, 1.2)):
+            break
+        if lector.abrir():
+            logger.info("✓ Cámara reconectada")
+            return True
+        espera = min(espera * 2, espera_maxima)
+        intento += 1
+    return False
+
+
+class CapturaUltimoFrame(threading.Thread):
+    """Thread de captura que mantiene únicamente el frame más reciente"""
+
+    def __init__(self, fuente, nombre: str = "captura", lector=None,
+                 espera_inicial: float = 1.0, espera_maxima: float = 30.0):
+        """
+        Args:
+            fuente: URL de cámara, índice de webcam o archivo de video
+            nombre: Nombre del thread
+            lector: Lector a usar (por defecto crear_lector(fuente))
+            espera_inicial: Primera espera del backoff de reconexión
+            espera_maxima: Tope de la espera entre reintentos
+        """
+        super().__init__(name=nombre, daemon=True)
+        self.fuente = fuente
+        self.lector = lector if lector is not None else crear_lector(fuente)
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+
+        self._condicion = threading.Condition()
+        self._frame: Optional[np.ndarray] = None
+        self._timestamp = 0.0
+        self._secuencia = 0
+        self._secuencia_leida = 0
+        self._detener = threading.Event()
+
+        # Estadísticas
+        self.frames_capturados = 0
+        self.frames_descartados = 0  # sobrescritos antes de ser consumidos
+        self.reconexiones = 0
+
+    def abrir(self) -> bool:
+        """Abre la fuente de video (si no lo está). Retorna False si no se pudo conectar"""
+        return self.lector.abierto or self.lector.abrir()
+
+    @property
+    def activo(self) -> bool:
+        return self.is_alive() and not self._detener.is_set()
+
+    def run(self):
+        try:
+            while not self._detener.is_set():
+                frame = self.lector.leer()
+                if frame is None:
+                    if es_archivo(self.fuente):
+                        logger.info("Fin del video")
+                        break
+                    logger.error("Conexión con cámara perdida")
+                    if not reconectar(self.lector, self._detener, self.espera_inicial, self.espera_maxima):
+                        break
+                    self.reconexiones += 1
+                    continue
+
+                with self._condicion:
+                    if self._frame is not None and self._secuencia_leida < self._secuencia:
+                        self.frames_descartados += 1
+                    self._frame = frame
+                    self._timestamp = time.perf_counter()
+                    self._secuencia += 1
+                    self.frames_capturados += 1
+                    self._condicion.notify_all()
+        finally:
+            self._detener.set()
+            with self._condicion:
+                self._condicion.notify_all()
+            self.lector.cerrar()
+
+    def leer(self, timeout: float = 1.0) -> Optional[Tuple[int, float, np.ndarray]]:
+        """
+        Espera un frame más nuevo que el último leído.
+
+        Returns:
+            (secuencia, timestamp de captura, frame) o None si no llegó
+            ningún frame nuevo en `timeout` segundos o la captura terminó
+        """
+        with self._condicion:
+            self._condicion.wait_for(
+                lambda: self._secuencia > self._secuencia_leida or self._detener.is_set(),
+                timeout=timeout
+            )
+            if self._secuencia <= self._secuencia_leida:
+                return None
+
+            self._secuencia_leida = self._secuencia
+            return self._secuencia, self._timestamp, self._frame
+
+    def telemetria(self) -> dict:
+        """Métricas de la captura para la telemetría del dispositivo"""
+        return {
+            "captura": self.lector.nombre,
+            "frames_capturados": self.frames_capturados,
+            "descartes_captura": self.frames_descartados,
+            "reconexiones_camara": self.reconexiones,
+        }
+
+    def reporte(self) -> str:
+        """Resumen de la captura: reconexiones y tamaño decodificado por frame"""
+        frames = max(self.lector.frames, 1)
+        return (f"captura {self.lector.nombre}: {self.reconexiones} reconexiones, "
+                f"{self.lector.bytes_decodificados / frames / 1024:.0f} KB decodificados por frame")
+
+    def detener(self):
+        self._detener.set()
+        with self._condicion:
+            self._condicion.notify_all()
@@ -0,0 +1,155 @@
+"""
+Motor de ocupación por recortes: un clasificador chico sobre cada mesa.
+
+Con un layout calibrado las mesas no se mueven, así que en lugar de
+detectar personas en el frame completo y cruzar cajas (con su umbral de
+solapamiento fijo) se recorta cada mesa con un margen, se arma un batch
+con los recortes a TAMANO_RECORTE_MESA píxeles y un clasificador chico
+devuelve directamente cuántas personas hay en cada una.
+
+El modelo puede ser:
+
+- un clasificador de ultralytics (.pt, p. ej. yolov8n-cls entrenado con
+  dataset_recortes.py) cuyas clases son conteos: "0", "1", "2", "3", "4"
+  (la última se interpreta como "4 o más")
+- el mismo exportado a ONNX (ver exportar_modelos.py), o cualquier ONNX
+  con salida (N, K) de puntajes por conteo o (N, 1) de regresión
+
+El resultado se arma como DeteccionMesa en vision_system.py, así que el
+contrato con el backend no cambia.
+"""
+
+import ast
+import logging
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+from backends import letterbox, PROVEEDORES_PREFERIDOS
+
+logger = logging.getLogger(__name__)
+
+# "deteccion": YOLO de personas + cruce con las mesas (vision_system.py)
+# "recortes": este módulo
+MOTORES_OCUPACION: List[str] = ["deteccion", "recortes"]
+
+
+def recortar_mesas(frame: np.ndarray, mesas_xyxy: np.ndarray, tamano: int,
+                   margen: float = 0.3) -> np.ndarray:
+    """
+    Recorte de cada mesa (con `margen` fracción de su lado, para incluir
+    las sillas) llevado a tamano x tamano con letterbox.
+
+    Returns:
+        Batch (N, tamano, tamano, 3) uint8 BGR
+    """
+    alto, ancho = frame.shape[:2]
+    recortes = np.empty((len(mesas_xyxy), tamano, tamano, 3), dtype=np.uint8)
+    for i, (x1, y1, x2, y2) in enumerate(np.asarray(mesas_xyxy, dtype=np.float32)):
+        mx, my = (x2 - x1) * margen, (y2 - y1) * margen
+        x1, y1 = max(int(x1 - mx), 0), max(int(y1 - my), 0)
+        x2, y2 = min(int(np.ceil(x2 + mx)), ancho), min(int(np.ceil(y2 + my)), alto)
+        recortes[i] = letterbox(frame[y1:max(y2, y1 + 1), x1:max(x2, x1 + 1)], tamano, tamano)[0]
+    return recortes
+
+
+def _conteos_de_nombres(nombres: dict) -> np.ndarray:
+    """Conteo de personas de cada clase a partir de sus nombres ("0", "1", ..., "4+")"""
+    conteos = []
+    for indice in sorted(nombres):
+        try:
+            conteos.append(int(str(nombres[indice]).rstrip("+")))
+        except ValueError:
+            raise ValueError(f"Clase '{nombres[indice]}' del clasificador de mesas: "
+                             f"los nombres de clase deben ser conteos (0, 1, 2, ...)")
+    return np.array(conteos, dtype=np.int32)
+
+
+class ClasificadorMesas:
+    """Cuenta personas por mesa a partir de recortes"""
+
+    def __init__(self, ruta: str, tamano: int = 96, hilos: int = 0):
+        """
+        Args:
+            ruta: Modelo .pt (ultralytics, tarea classify) u .onnx
+            tamano: Lado de los recortes (debe coincidir con el del entrenamiento)
+            hilos: Hilos de onnxruntime (0 = automático)
+        """
+        self.ruta = ruta
+        self.tamano = tamano
+
+        if os.path.splitext(ruta)[1] == ".onnx":
+            self._cargar_onnx(ruta, hilos)
+        else:
+            from ultralytics import YOLO
+
+            self.modelo = YOLO(ruta, task="classify")
+            self.conteos = _conteos_de_nombres(self.modelo.names)
+            self.nombre = "recortes (ultralytics)"
+            self._inferir = self._inferir_ultralytics
+
+    def _cargar_onnx(self, ruta: str, hilos: int):
+        import onnxruntime as ort
+
+        opciones = ort.SessionOptions()
+        if hilos > 0:
+            opciones.intra_op_num_threads = hilos
+        disponibles = ort.get_available_providers()
+        proveedores = [p for p in PROVEEDORES_PREFERIDOS if p in disponibles] or disponibles
+
+        self.sesion = ort.InferenceSession(ruta, sess_options=opciones, providers=proveedores)
+        entrada = self.sesion.get_inputs()[0]
+        self.nombre_entrada = entrada.name
+        # Exportado con dynamic=False el batch queda fijo en 1
+        self.batch_fijo = entrada.shape[0] == 1
+
+        # ultralytics guarda los nombres de clase en los metadatos del .onnx
+        nombres = self.sesion.get_modelmeta().custom_metadata_map.get("names")
+        salidas = self.sesion.get_outputs()[0].shape[-1]
+        if nombres:
+            self.conteos = _conteos_de_nombres(ast.literal_eval(nombres))
+        else:
+            self.conteos = np.arange(salidas if isinstance(salidas, int) else 5, dtype=np.int32)
+        self.nombre = "recortes (onnx)"
+        self._inferir = self._inferir_onnx
+
+    def _inferir_ultralytics(self, recortes: np.ndarray) -> np.ndarray:
+        resultados = self.modelo(list(recortes), imgsz=self.tamano, verbose=False)
+        return np.stack([r.probs.data.cpu().numpy() for r in resultados])
+
+    def _inferir_onnx(self, recortes: np.ndarray) -> np.ndarray:
+        tensor = np.ascontiguousarray(recortes[..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+        if self.batch_fijo:
+            return np.concatenate([self.sesion.run(None, {self.nombre_entrada: t[None]})[0] for t in tensor])
+        return self.sesion.run(None, {self.nombre_entrada: tensor})[0]
+
+    def contar(self, recortes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            recortes: Batch (N, tamano, tamano, 3) uint8 BGR (recortar_mesas)
+
+        Returns:
+            (personas por recorte, confianza de cada conteo)
+        """
+        if len(recortes) == 0:
+            return np.zeros(0, np.int32), np.zeros(0, np.float32)
+
+        salida = self._inferir(recortes).reshape(len(recortes), -1).astype(np.float32)
+
+        # Regresión: una sola salida con el conteo
+        if salida.shape[1] == 1:
+            personas = np.clip(np.rint(salida[:, 0]), 0, None).astype(np.int32)
+            return personas, np.ones(len(personas), np.float32)
+
+        # Clasificación: normalizar si el modelo devuelve logits
+        if not np.allclose(salida.sum(axis=1), 1.0, atol=1e-3):
+            salida = np.exp(salida - salida.max(axis=1, keepdims=True))
+            salida /= salida.sum(axis=1, keepdims=True)
+        indice = salida.argmax(axis=1)
+        return self.conteos[indice], salida[np.arange(len(indice)), indice]
+
+    def contar_frame(self, frame: np.ndarray, mesas_xyxy: np.ndarray,
+                     margen: float = 0.3) -> Tuple[np.ndarray, np.ndarray]:
+        """Recorta las mesas del frame y cuenta (ver contar)"""
+        return self.contar(recortar_mesas(frame, mesas_xyxy, self.tamano, margen))
@@ -0,0 +1,144 @@
+"""
+Cola en disco para guardar detecciones mientras no hay conexión.
+
+Si el broker MQTT (o el backend HTTP en vision_simple) no está
+disponible, cada mensaje se guarda en una base SQLite en modo WAL en
+lugar de descartarse. Cada mensaje va con su timestamp y comprimido con
+zlib. Cuando vuelve la conexión se reenvían en orden de llegada y se
+borran solo después de enviarse.
+
+La cola es acotada: si supera `max_entradas` se compacta en un único
+mensaje con el último estado de cada mesa. El backend solo guarda el
+estado actual, así que el resultado final es el mismo que reenviar todo.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+TIPO_COMPACTADO = "compactado"
+
+
+def comprimir(datos) -> bytes:
+    return zlib.compress(json.dumps(datos, separators=(",", ":")).encode("utf-8"))
+
+
+def descomprimir(blob: bytes):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class ColaOffline:
+    """Cola FIFO persistente y acotada de mensajes de detecciones"""
+
+    def __init__(self, ruta: str, max_entradas: int = 2000):
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+
+        # Se usa desde el thread de publicación del pipeline
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS pendientes ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " creado REAL NOT NULL,"
+            " payload BLOB NOT NULL)"
+        )
+
+        # Estadísticas
+        self.encolados = 0
+        self.reenviados = 0
+        self.compactaciones = 0
+
+        pendientes = len(self)
+        if pendientes:
+            logger.info(f"Cola offline: {pendientes} mensajes pendientes en {ruta}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conexion.execute("SELECT COUNT(*) FROM pendientes").fetchone()[0]
+
+    def encolar(self, payload: dict):
+        """Guarda un mensaje; compacta si la cola se pasó del límite"""
+        with self._lock:
+            self._conexion.execute(
+                "INSERT INTO pendientes (creado, payload) VALUES (?, ?)",
+                (time.time(), comprimir(payload))
+            )
+            self.encolados += 1
+            total = self._conexion.execute("SELECT COUNT(*) FROM pendientes").fetchone()[0]
+            if total > self.max_entradas:
+                self._compactar()
+
+    def _compactar(self):
+        """Reemplaza toda la cola por el último estado de cada mesa"""
+        filas = self._conexion.execute("SELECT payload FROM pendientes ORDER BY id").fetchall()
+
+        ultimo_por_mesa: Dict[int, dict] = {}
+        ultimo = {}
+        for (blob,) in filas:
+            ultimo = descomprimir(blob)
+            for det in ultimo.get("detecciones", []):
+                ultimo_por_mesa[det["id_mesa"]] = det
+
+        compactado = {k: v for k, v in ultimo.items() if k != "detecciones"}
+        compactado["tipo"] = TIPO_COMPACTADO
+        compactado["detecciones"] = [ultimo_por_mesa[k] for k in sorted(ultimo_por_mesa)]
+
+        self._conexion.execute("BEGIN")
+        self._conexion.execute("DELETE FROM pendientes")
+        self._conexion.execute(
+            "INSERT INTO pendientes (creado, payload) VALUES (?, ?)",
+            (time.time(), comprimir(compactado))
+        )
+        self._conexion.execute("COMMIT")
+        self.compactaciones += 1
+        logger.warning(f"Cola offline compactada: {len(filas)} mensajes → último estado de "
+                       f"{len(ultimo_por_mesa)} mesas")
+
+    def _leer_lote(self, limite: int) -> List[Tuple[int, dict]]:
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT id, payload FROM pendientes ORDER BY id LIMIT ?", (limite,)
+            ).fetchall()
+        return [(id_fila, descomprimir(blob)) for id_fila, blob in filas]
+
+    def _borrar_hasta(self, id_fila: int):
+        with self._lock:
+            self._conexion.execute("DELETE FROM pendientes WHERE id <= ?", (id_fila,))
+
+    def reenviar_lotes(self, enviar: Callable[[List[dict]], bool], tamano_lote: int = 100) -> int:
+        """
+        Reenvía la cola en orden, de a `tamano_lote` mensajes por llamada a
+        `enviar`. Se detiene en el primer envío fallido (el lote queda en la
+        cola). Retorna la cantidad de mensajes reenviados.
+        """
+        reenviados = 0
+        while True:
+            lote = self._leer_lote(tamano_lote)
+            if not lote:
+                break
+            if not enviar([payload for _, payload in lote]):
+                break
+            self._borrar_hasta(lote[-1][0])
+            reenviados += len(lote)
+
+        if reenviados:
+            self.reenviados += reenviados
+            logger.info(f"✓ Cola offline: {reenviados} mensajes reenviados")
+        return reenviados
+
+    def reenviar(self, enviar: Callable[[dict], bool]) -> int:
+        """Como reenviar_lotes, pero un mensaje por llamada a `enviar`"""
+        return self.reenviar_lotes(lambda lote: enviar(lote[0]), tamano_lote=1)
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
@@ -11,6 +11,25 @@ IP_WEBCAM = "http://192.168.1.125:8080/video"  # Cambiar según tu IP
 USAR_WEBCAM_LOCAL = False
 WEBCAM_INDEX = 0  # 0 para cámara predeterminada
 
+# Backend de captura (captura.py): "mjpeg" lee el stream HTTP de IP Webcam
+# y decodifica cada JPEG ya reducido (PyTurboJPEG si está instalado, si no
+# OpenCV); "opencv" usa cv2.VideoCapture. "auto" = mjpeg para URLs http
+BACKEND_CAPTURA = "auto"
+
+# Divisor del tamaño decodificado en el backend mjpeg (1, 2, 4 u 8). Con 2
+# un stream 1280x720 se decodifica directo a 640x360, que es lo que el
+# modelo de personas usa de todos modos. Los filtros de área de mesas
+# (MIN_AREA_MESA / MAX_AREA_MESA) se dividen por escala² automáticamente
+ESCALA_DECODIFICACION = 2
+
+# Resolución que se le pide a la cámara al conectar, p. ej. "640x480"
+# ("" = no cambiarla). En IP Webcam se ajusta vía /settings/video_size
+RESOLUCION_CAMARA = ""
+
+# Reconexión con backoff exponencial si se corta la cámara (segundos)
+RECONEXION_ESPERA_INICIAL = 1.0
+RECONEXION_ESPERA_MAXIMA = 30.0
+
 # CONFIGURACIÓN DE MQTT BROKER
 
 # IP del broker MQTT (Raspberry Pi donde corre Mosquitto)
@@ -20,7 +39,13 @@ BROKER_KEEPALIVE = 60
 
 # Topics MQTT
 TOPIC_OCUPACION = "restaurant/ocupacion"
+# Reenvío de la cola offline: lista de mensajes JSON comprimida con zlib
+TOPIC_OCUPACION_LOTE = "restaurant/ocupacion/lote"
 TOPIC_DISPOSITIVOS = "restaurant/dispositivos"
+# Telemetría de salud del dispositivo (telemetria.py): {TOPIC_TELEMETRIA}/{device_id}
+TOPIC_TELEMETRIA = "restaurant/telemetria"
+# Umbrales de detección en caliente (umbrales.py): {TOPIC_CONFIG}/{device_id}, retenido
+TOPIC_CONFIG = "restaurant/config"
 
 # ID único de este dispositivo edge
 DEVICE_ID = "vision_camera_01" 
@@ -33,27 +58,161 @@ RUTA_MODELO_MESAS = "Entrenamiendo_mesas/weights/best.pt"
 # Modelo YOLO para personas (COCO preentrenado)
 MODELO_PERSONAS = "yolov8n.pt" 
 
+# Backend de inferencia (backends.py): "auto" usa ONNX Runtime si está
+# instalado y existe el .onnx exportado (python exportar_modelos.py), si no
+# PyTorch. También "onnx", "openvino" o "ultralytics" para forzarlo
+BACKEND_INFERENCIA = "auto"
+
+# Usar los modelos ONNX cuantizados a int8 (*_int8.onnx)
+ONNX_INT8 = False
+
+# Hilos de ONNX Runtime (0 = los que elija onnxruntime)
+ONNX_HILOS = 0
+
+# Motor de ocupación (se puede elegir por cámara en CAMARAS_MULTI):
+# "deteccion" = YOLO de personas en el frame + cruce con las mesas
+# "recortes"  = clasificador chico sobre el recorte de cada mesa
+#               (clasificador_mesas.py; pensado para layouts calibrados)
+MOTOR_OCUPACION = "deteccion"
+
+# Clasificador de conteo por mesa (.pt de ultralytics classify u .onnx),
+# entrenado con recortes generados por dataset_recortes.py
+MODELO_CLASIFICADOR_MESAS = "clasificador_mesas/weights/best.pt"
+
+# Lado (píxeles) de los recortes y margen alrededor de cada mesa
+# (fracción de su lado, para incluir las sillas)
+TAMANO_RECORTE_MESA = 96
+MARGEN_RECORTE_MESA = 0.3
+
+# Layout de mesas calibrado (python calibracion.py). Si el archivo existe,
+# no se carga el modelo de mesas y se usan estas mesas con IDs estables
+RUTA_LAYOUT_MESAS = "layout_mesas.json"
+
 # CONFIGURACIÓN DE DETECCIÓN
 
-# Umbral de confianza para las detecciones
-CONFIDENCE_THRESHOLD = 0.5
+# Valores por defecto de los umbrales; se pueden cambiar en caliente
+# publicando en {TOPIC_CONFIG}/{device_id} (ver umbrales.py)
+
+# Umbral de confianza de personas (más bajo = detecta más personas)
+CONFIDENCE_PERSONAS = 0.35
+
+# Umbral de confianza de mesas (más alto = menos falsos positivos: paredes, techos, caras)
+CONFIDENCE_MESAS = 0.75
+
+# Área válida de una mesa detectada en píxeles del frame completo
+# (ej: 122x122 a 387x387); con ESCALA_DECODIFICACION se ajusta sola
+MIN_AREA_MESA = 15000
+MAX_AREA_MESA = 150000
+
+# Fracción del área de la persona que debe caer sobre la mesa
+OVERLAP_PERSONA_MESA = 0.30
+
+# Las mesas casi no se mueven: el modelo de mesas corre cada N frames y
+# entre medio se reutilizan las cajas en caché (1 = detectar en cada frame)
+INTERVALO_DETECCION_MESAS = 30
+
+# Fracción de píxeles que deben cambiar (en una miniatura en escala de
+# grises) para forzar una nueva detección de mesas antes de tiempo.
+# 0 = desactivado
+UMBRAL_CAMBIO_ESCENA = 0.25
+
+# Compuerta de movimiento (movimiento.py): solo se ejecuta el modelo de
+# personas si cambió la imagen alrededor de las mesas; si no, se reutiliza
+# el último resultado
+USAR_COMPUERTA_MOVIMIENTO = True
+
+# Fracción de píxeles (en las zonas de mesa) que deben cambiar para inferir
+MOVIMIENTO_FRACCION_MINIMA = 0.01
+
+# Diferencia de gris (0-255) para considerar que un píxel cambió
+MOVIMIENTO_UMBRAL_PIXEL = 25
 
-# Porcentaje mínimo de solapamiento para considerar persona en mesa (%)
-OVERLAP_THRESHOLD = 30
+# Staleness máxima: se infiere al menos cada estos segundos aunque no
+# haya movimiento
+MAX_SEGUNDOS_SIN_INFERENCIA = 2.0
+
+# Seguimiento de personas entre frames (tracking.py): IDs persistentes,
+# conteo por mesa estable frente a fallos puntuales del detector y
+# tiempo de permanencia
+USAR_TRACKING = True
+
+# IoU mínimo para asociar una detección con una persona ya seguida
+TRACKING_IOU_MINIMO = 0.3
+
+# Frames que una persona sigue contando después de dejar de detectarse
+TRACKING_MAX_PERDIDOS = 15
+
+# Frames seguidos que debe detectarse una persona nueva antes de contarla
+TRACKING_MIN_GOLPES = 3
+
+# Tamaño de entrada (lado mayor, múltiplo de 32) del modelo de personas.
+# Menos píxeles = menos CPU por frame, a costa de personas lejanas
+IMGSZ_PERSONAS = 640
+
+# Detectar personas solo en recortes alrededor de las mesas (roi.py)
+# en lugar del frame completo
+USAR_ROI_PERSONAS = False
+
+# Margen agregado a cada mesa al recortar (fracción del lado de la mesa)
+MARGEN_ROI = 0.5
+
+# Recortes separados por menos que esto (fracción del alto del frame,
+# aprox. una persona sentada) se fusionan: si no, una persona en el
+# hueco sale cortada en los dos y se cuenta dos veces
+SEPARACION_MINIMA_ROI = 0.15
+
+# Si los recortes cubren más que esta fracción del frame, se usa el
+# frame completo (recortar ya no ahorra nada)
+FRACCION_MAXIMA_ROI = 0.6
 
 #  CONFIGURACIÓN DE ACTUALIZACIÓN
 
 # Intervalo de envío al backend (segundos)
 INTERVALO_ACTUALIZACION = 5
 
-# Enviar solo si hay cambios en el estado
-ENVIAR_SOLO_CAMBIOS = False
+# Enviar solo si hay cambios en el estado (publicacion.py): una mesa que
+# cambia de libre a ocupada (o al revés) se publica apenas el cambio se
+# mantiene DEBOUNCE_CAMBIOS segundos, y cada INTERVALO_HEARTBEAT segundos
+# se publica el estado completo. Con False se publica todo cada
+# INTERVALO_ACTUALIZACION segundos.
+# Antes el valor por defecto era False (todo cada 5 s): una instalación
+# que dependa de recibir el estado completo en cada intervalo debe
+# ponerlo en False o bajar INTERVALO_HEARTBEAT
+ENVIAR_SOLO_CAMBIOS = True
+
+# Segundos que debe mantenerse un estado nuevo antes de publicarlo
+DEBOUNCE_CAMBIOS = 1.0
+
+# Segundos entre publicaciones completas cuando ENVIAR_SOLO_CAMBIOS = True
+INTERVALO_HEARTBEAT = 60
+
+# Segundos entre publicaciones de telemetría (FPS, tiempos por etapa,
+# colas, temperatura y carga de CPU). 0 = desactivada
+INTERVALO_TELEMETRIA = 30
+
+# Cola en disco (cola_offline.py) para no perder detecciones mientras no
+# hay conexión con el broker. {device_id} se reemplaza por el ID de cada
+# cámara. "" = desactivada
+RUTA_COLA_OFFLINE = "cola_offline_{device_id}.db"
+
+# Máximo de mensajes en la cola antes de compactarla al último estado
+# de cada mesa
+MAX_COLA_OFFLINE = 2000
+
+# Mensajes por publicación al reenviar la cola
+LOTE_REENVIO = 100
 
 # CONFIGURACIÓN DE VISUALIZACIÓN
 
-# Mostrar ventana de visualización
+# Mostrar ventana de visualización. False = modo headless (Raspberry Pi
+# sin monitor): no se copia ni se dibuja ningún frame
 MOSTRAR_VENTANA = True
 
+# Vista previa anotada como MJPEG por HTTP (preview.py). 0 = desactivada.
+# Solo se dibuja mientras hay alguien mirando, a PREVIEW_FPS como máximo
+PREVIEW_PUERTO = 0
+PREVIEW_FPS = 2
+
 # Tamaño de la ventana de visualización
 WINDOW_WIDTH = 1280
 WINDOW_HEIGHT = 720
@@ -84,6 +243,23 @@ REQUEST_TIMEOUT = 5
 # Reintentos en caso de fallo
 MAX_REINTENTOS = 3
 
+# Captura, inferencia y publicación en threads separados (pipeline.py).
+# La captura conserva solo el último frame para que la inferencia nunca
+# trabaje sobre imágenes viejas del buffer de OpenCV
+USAR_PIPELINE = True
+
+# Capacidad de la cola inferencia → publicación (se descarta lo más viejo)
+TAMANO_COLA_PIPELINE = 2
+
+# Modo multicámara (multicamara.py): un solo proceso y un solo modelo de
+# personas para varias cámaras. Cada entrada: fuente, device_id, layout
+# (opcional) y motor de ocupación (opcional, por defecto MOTOR_OCUPACION).
+# También se pueden pasar por línea de comandos con --camara.
+CAMARAS_MULTI = [
+    # {"fuente": "http://192.168.1.125:8080/video", "device_id": "vision_camera_01", "layout": "layout_cam01.json"},
+    # {"fuente": "http://192.168.1.126:8080/video", "device_id": "vision_camera_02", "layout": "layout_cam02.json", "motor": "recortes"},
+]
+
 # FPS objetivo para procesamiento
 TARGET_FPS = 30
 
@@ -0,0 +1,90 @@
+"""
+Genera el dataset del clasificador de mesas (motor "recortes").
+
+Recorre un video grabado con el layout calibrado, recorta cada mesa como
+lo hace clasificador_mesas.recortar_mesas y guarda el recorte en la
+carpeta de su conteo, con el formato de clasificación de ultralytics:
+
+    salida/train/0/*.jpg  salida/train/1/*.jpg ... salida/val/4/*.jpg
+
+La etiqueta sale de la verdad de terreno (--verdad, CSV frame,id_mesa,
+personas) o, si no hay, del motor por detección: conviene revisar las
+carpetas a mano antes de entrenar. Los conteos >= CLASES-1 van a la
+última clase ("4 o más").
+
+Uso:
+    python dataset_recortes.py --fuente grabacion.mp4 --salida dataset_mesas --cada 15
+    yolo classify train data=dataset_mesas model=yolov8n-cls.pt imgsz=96 epochs=30
+"""
+
+import argparse
+import logging
+import os
+import random
+
+import cv2
+
+import vision_system
+from benchmarks.fuentes import leer_frames
+from benchmarks.replay import cargar_verdad
+from clasificador_mesas import recortar_mesas
+from config import RUTA_LAYOUT_MESAS, TAMANO_RECORTE_MESA, MARGEN_RECORTE_MESA
+from vision_system import SistemaVisionMesas, CajasDetectadas
+
+CLASES = 5
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuente", required=True, help="Video o carpeta de imágenes")
+    parser.add_argument("--salida", default="dataset_mesas")
+    parser.add_argument("--frames", type=int, default=10000)
+    parser.add_argument("--cada", type=int, default=15, help="Tomar un frame de cada N")
+    parser.add_argument("--layout", default=RUTA_LAYOUT_MESAS)
+    parser.add_argument("--verdad", help="CSV frame,id_mesa,personas (si no, se etiqueta con el detector)")
+    parser.add_argument("--val", type=float, default=0.2, help="Fracción de recortes para validación")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.layout):
+        parser.error(f"No existe el layout {args.layout}: calibrar primero con calibracion.py")
+
+    vision_system.USAR_TRACKING = False
+    vision_system.USAR_COMPUERTA_MOVIMIENTO = False
+    logging.getLogger().setLevel(logging.WARNING)
+    sistema = SistemaVisionMesas(conectar_mqtt=False, ruta_layout=args.layout, mostrar_ventana=False)
+    verdad = cargar_verdad(args.verdad) if args.verdad else None
+
+    for particion in ("train", "val"):
+        for clase in range(CLASES):
+            os.makedirs(os.path.join(args.salida, particion, str(clase)), exist_ok=True)
+
+    rng = random.Random(0)
+    por_clase = [0] * CLASES
+    for numero, frame in enumerate(leer_frames(args.fuente, args.frames), start=1):
+        if (numero - 1) % args.cada:
+            continue
+
+        detecciones = sistema.procesar_frame(frame)
+        mesas = [det.bbox for det in detecciones]
+        recortes = recortar_mesas(frame, CajasDetectadas.desde_lista(mesas).xyxy,
+                                  TAMANO_RECORTE_MESA, MARGEN_RECORTE_MESA)
+
+        for det, recorte in zip(detecciones, recortes):
+            personas = det.personas_detectadas
+            if verdad is not None:
+                if (numero, det.id_mesa) not in verdad:
+                    continue
+                personas = verdad[(numero, det.id_mesa)]
+            clase = min(personas, CLASES - 1)
+            particion = "val" if rng.random() < args.val else "train"
+            ruta = os.path.join(args.salida, particion, str(clase), f"f{numero:06d}_m{det.id_mesa}.jpg")
+            cv2.imwrite(ruta, recorte)
+            por_clase[clase] += 1
+
+    print(f"Recortes por clase: {dict(enumerate(por_clase))}")
+    print(f"Entrenar con:\n   yolo classify train data={args.salida} model=yolov8n-cls.pt "
+          f"imgsz={TAMANO_RECORTE_MESA} epochs=30")
+
+
+if __name__ == "__main__":
+    main()
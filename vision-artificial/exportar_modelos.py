@@ -0,0 +1,69 @@
+"""
+Exporta los modelos YOLO del edge a ONNX (y opcionalmente OpenVINO).
+
+Los archivos quedan junto a los pesos .pt, donde los busca
+backends.cargar_detector:
+
+    yolov8n.pt → yolov8n.onnx, yolov8n_int8.onnx, yolov8n_openvino_model/
+
+Uso:
+    python exportar_modelos.py                  # personas y mesas a ONNX
+    python exportar_modelos.py --int8           # + versión cuantizada int8
+    python exportar_modelos.py --openvino       # + directorio OpenVINO
+    python exportar_modelos.py --imgsz 480 --modelo yolov8n.pt
+"""
+
+import argparse
+import os
+import shutil
+
+from backends import rutas_exportadas
+from config import MODELO_PERSONAS, RUTA_MODELO_MESAS
+
+
+def exportar(ruta_pt: str, imgsz: int, int8: bool, openvino: bool):
+    from ultralytics import YOLO
+
+    print(f"\n→ {ruta_pt}")
+    modelo = YOLO(ruta_pt)
+    rutas = rutas_exportadas(ruta_pt)
+
+    # Entrada dinámica: DetectorOnnx agrupa varios frames (multicámara,
+    # recortes ROI) en un solo batch y respeta el imgsz de config.py
+    generado = modelo.export(format="onnx", imgsz=imgsz, opset=12, simplify=True, dynamic=True)
+    if os.path.abspath(generado) != os.path.abspath(rutas["onnx"]):
+        shutil.move(generado, rutas["onnx"])
+    print(f"   ONNX: {rutas['onnx']} ({os.path.getsize(rutas['onnx']) / 1e6:.1f} MB)")
+
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        ruta_int8 = rutas_exportadas(ruta_pt, int8=True)["onnx"]
+        quantize_dynamic(rutas["onnx"], ruta_int8, weight_type=QuantType.QUInt8)
+        print(f"   ONNX int8: {ruta_int8} ({os.path.getsize(ruta_int8) / 1e6:.1f} MB)")
+
+    if openvino:
+        generado = modelo.export(format="openvino", imgsz=imgsz)
+        if os.path.abspath(generado) != os.path.abspath(rutas["openvino"]):
+            shutil.rmtree(rutas["openvino"], ignore_errors=True)
+            shutil.move(generado, rutas["openvino"])
+        print(f"   OpenVINO: {rutas['openvino']}/")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta los modelos YOLO a ONNX/OpenVINO")
+    parser.add_argument("--modelo", action="append",
+                        help="Pesos .pt a exportar (por defecto personas y mesas)")
+    parser.add_argument("--imgsz", type=int, default=640, help="Tamaño de entrada usado al exportar (el .onnx acepta cualquiera)")
+    parser.add_argument("--int8", action="store_true", help="Generar también la versión cuantizada int8")
+    parser.add_argument("--openvino", action="store_true", help="Exportar también a OpenVINO")
+    args = parser.parse_args()
+
+    for ruta in args.modelo or [MODELO_PERSONAS, RUTA_MODELO_MESAS]:
+        exportar(ruta, args.imgsz, args.int8, args.openvino)
+
+    print("\n✓ Listo. Con BACKEND_INFERENCIA = \"auto\" se usan los .onnx si hay onnxruntime")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Operaciones geométricas vectorizadas sobre conjuntos de cajas.
+
+Las cajas se manejan como arrays (N, 4) de enteros [x1, y1, x2, y2],
+tal como salen de results[0].boxes.xyxy, y las comparaciones
+mesa × persona se calculan con broadcasting en lugar de bucles Python.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+
+def centros(xyxy: np.ndarray) -> np.ndarray:
+    """Centros (N, 2) de las cajas, con la misma división entera que BoundingBox.center"""
+    return np.stack(((xyxy[:, 0] + xyxy[:, 2]) // 2, (xyxy[:, 1] + xyxy[:, 3]) // 2), axis=1)
+
+
+def areas(xyxy: np.ndarray) -> np.ndarray:
+    return (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])
+
+
+def areas_interseccion(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Área de intersección (M, N) entre cada caja de `a` (M, 4) y de `b` (N, 4)"""
+    ix = np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0])
+    iy = np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1])
+    return np.clip(ix, 0, None) * np.clip(iy, 0, None)
+
+
+def iou_matriz(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Intersección sobre unión (M, N) entre las cajas de `a` y de `b`"""
+    interseccion = areas_interseccion(a, b)
+    union = areas(a)[:, None] + areas(b)[None, :] - interseccion
+    return interseccion / np.maximum(union, 1)
+
+
+def matriz_asignacion(mesas: np.ndarray, personas: np.ndarray, overlap_minimo: float) -> np.ndarray:
+    """
+    Matriz booleana (M, N): True si la persona j está en la mesa i.
+
+    Una persona está en una mesa si su centro cae dentro de la mesa o si
+    la intersección supera `overlap_minimo` (fracción 0-1) del área de la
+    persona.
+    """
+    if len(mesas) == 0 or len(personas) == 0:
+        return np.zeros((len(mesas), len(personas)), dtype=bool)
+
+    c = centros(personas)
+    centro_dentro = (
+        (c[None, :, 0] >= mesas[:, None, 0]) & (c[None, :, 0] <= mesas[:, None, 2]) &
+        (c[None, :, 1] >= mesas[:, None, 1]) & (c[None, :, 1] <= mesas[:, None, 3])
+    )
+
+    area_persona = np.maximum(areas(personas), 1)
+    fraccion = areas_interseccion(mesas, personas) / area_persona[None, :]
+
+    return centro_dentro | (fraccion > overlap_minimo)
+
+
+def solapamientos_sospechosos(xyxy: np.ndarray, overlap_minimo: float) -> List[Tuple[int, int, float]]:
+    """
+    Pares (i, j, fracción) de cajas cuya intersección supera `overlap_minimo`
+    del área de la menor. Sirve para detectar personas duplicadas/fusionadas.
+    """
+    if len(xyxy) < 2:
+        return []
+
+    a = np.maximum(areas(xyxy), 1)
+    fraccion = areas_interseccion(xyxy, xyxy) / np.minimum(a[:, None], a[None, :])
+    i, j = np.nonzero(np.triu(fraccion > overlap_minimo, k=1))
+    return [(int(x), int(y), float(fraccion[x, y])) for x, y in zip(i, j)]
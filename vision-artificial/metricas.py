@@ -0,0 +1,72 @@
+"""
+Medición de tiempos por etapa del sistema de visión.
+
+Guarda una ventana móvil de duraciones por etapa (detección de personas,
+detección de mesas, asignación, publicación, ...) y calcula promedio y
+percentiles, además de los FPS efectivos del bucle.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict
+
+
+def percentil(valores, p: float) -> float:
+    """Percentil p (0-100) por rango más cercano; 0.0 si no hay valores"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+class MedidorEtapas:
+    """Acumula tiempos por etapa en una ventana móvil (thread-safe)"""
+
+    def __init__(self, ventana: int = 300):
+        self.ventana = ventana
+        self._tiempos: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.ventana))
+        self._marcas_frames: deque = deque(maxlen=ventana)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def medir(self, etapa: str):
+        """Context manager que registra la duración del bloque en `etapa`"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, time.perf_counter() - inicio)
+
+    def registrar(self, etapa: str, segundos: float):
+        with self._lock:
+            self._tiempos[etapa].append(segundos * 1000)
+
+    def marcar_frame(self):
+        """Registra que se terminó de procesar un frame (para calcular FPS)"""
+        with self._lock:
+            self._marcas_frames.append(time.perf_counter())
+
+    def fps(self) -> float:
+        with self._lock:
+            if len(self._marcas_frames) < 2:
+                return 0.0
+            duracion = self._marcas_frames[-1] - self._marcas_frames[0]
+            return (len(self._marcas_frames) - 1) / duracion if duracion > 0 else 0.0
+
+    def resumen(self) -> Dict[str, Dict[str, float]]:
+        """Retorna {etapa: {n, promedio_ms, p50_ms, p95_ms}}"""
+        with self._lock:
+            copia = {etapa: list(valores) for etapa, valores in self._tiempos.items()}
+
+        return {
+            etapa: {
+                "n": len(valores),
+                "promedio_ms": sum(valores) / len(valores) if valores else 0.0,
+                "p50_ms": percentil(valores, 50),
+                "p95_ms": percentil(valores, 95),
+            }
+            for etapa, valores in copia.items()
+        }
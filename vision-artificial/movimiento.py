@@ -0,0 +1,111 @@
+"""
+Compuerta de movimiento: ejecutar YOLO solo cuando la escena cambia.
+
+Con el salón quieto, correr el modelo de personas en cada frame gasta
+CPU para obtener siempre el mismo resultado. La compuerta compara una
+miniatura en escala de grises del frame actual con la del último frame
+inferido, solo dentro de las zonas de las mesas (con margen):
+
+- si cambió al menos MOVIMIENTO_FRACCION_MINIMA de esos píxeles, se infiere
+- si no, se reutiliza el último resultado, salvo que hayan pasado más de
+  MAX_SEGUNDOS_SIN_INFERENCIA desde la última inferencia (staleness máxima)
+
+Como la referencia es el último frame inferido y no el anterior, un
+cambio lento (alguien que se sienta despacio) se acumula hasta disparar.
+"""
+
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from roi import regiones_interes
+
+
+class CompuertaMovimiento:
+    """Decide si un frame necesita inferencia"""
+
+    def __init__(self, tamano: Tuple[int, int] = (160, 90), umbral_pixel: int = 25,
+                 fraccion_minima: float = 0.01, max_segundos: float = 2.0,
+                 margen: float = 0.5):
+        """
+        Args:
+            tamano: (ancho, alto) de la miniatura comparada
+            umbral_pixel: Diferencia de gris para considerar un píxel cambiado
+            fraccion_minima: Fracción de píxeles (dentro de las mesas) que
+                deben cambiar para inferir
+            max_segundos: Máximo de segundos sin inferir aunque no haya
+                movimiento
+            margen: Margen alrededor de cada mesa (fracción de su lado)
+        """
+        self.tamano = tamano
+        self.umbral_pixel = umbral_pixel
+        self.fraccion_minima = fraccion_minima
+        self.max_segundos = max_segundos
+        self.margen = margen
+
+        self.referencia: Optional[np.ndarray] = None
+        self.ultima_inferencia = 0.0
+        self._mascara: Optional[np.ndarray] = None
+        self._clave_mascara = None
+
+        # Estadísticas
+        self.evaluados = 0
+        self.omitidos = 0
+
+    def _miniatura(self, frame: np.ndarray) -> np.ndarray:
+        pequeno = cv2.resize(frame, self.tamano, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(cv2.cvtColor(pequeno, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+    def _mascara_mesas(self, mesas_xyxy: np.ndarray, forma) -> Optional[np.ndarray]:
+        """Máscara booleana de las zonas de mesa en la miniatura (None = todo)"""
+        if len(mesas_xyxy) == 0:
+            return None
+
+        clave = (mesas_xyxy.tobytes(), forma[:2])
+        if clave == self._clave_mascara:
+            return self._mascara
+
+        alto, ancho = forma[:2]
+        fx, fy = self.tamano[0] / ancho, self.tamano[1] / alto
+        mascara = np.zeros((self.tamano[1], self.tamano[0]), dtype=bool)
+        for x1, y1, x2, y2 in regiones_interes(mesas_xyxy, ancho, alto, self.margen):
+            mascara[int(y1 * fy):int(np.ceil(y2 * fy)), int(x1 * fx):int(np.ceil(x2 * fx))] = True
+
+        self._mascara, self._clave_mascara = mascara, clave
+        return mascara
+
+    def hay_que_inferir(self, frame: np.ndarray, mesas_xyxy: np.ndarray,
+                        ahora: Optional[float] = None) -> bool:
+        """True si hubo movimiento en las mesas o el resultado es muy viejo"""
+        ahora = time.monotonic() if ahora is None else ahora
+        self.evaluados += 1
+
+        if self.referencia is None or ahora - self.ultima_inferencia >= self.max_segundos:
+            return True
+
+        diferencia = cv2.absdiff(self._miniatura(frame), self.referencia) > self.umbral_pixel
+        mascara = self._mascara_mesas(mesas_xyxy, frame.shape)
+        if mascara is not None:
+            fraccion = np.count_nonzero(diferencia & mascara) / max(np.count_nonzero(mascara), 1)
+        else:
+            fraccion = np.count_nonzero(diferencia) / diferencia.size
+
+        if fraccion >= self.fraccion_minima:
+            return True
+
+        self.omitidos += 1
+        return False
+
+    def forzar_inferencia(self):
+        """El próximo frame se infiere aunque no haya movimiento"""
+        self.ultima_inferencia = 0.0
+
+    def marcar_inferencia(self, frame: np.ndarray, ahora: Optional[float] = None):
+        """
+        El frame se infirió: pasa a ser la nueva referencia (la miniatura se
+        recalcula; es despreciable frente a la inferencia que la acompaña)
+        """
+        self.referencia = self._miniatura(frame)
+        self.ultima_inferencia = time.monotonic() if ahora is None else ahora
@@ -0,0 +1,277 @@
+"""
+Varias cámaras en un solo proceso con un único modelo de personas.
+
+Con un proceso por cámara cada uno carga su propia copia de los modelos
+YOLO. Aquí se carga el modelo de personas una sola vez, cada cámara tiene
+su thread de captura (solo último frame) y el bucle principal junta el
+frame más reciente de cada cámara y ejecuta el modelo una vez sobre el
+batch. Las detecciones se devuelven a la SistemaVisionMesas de cada
+cámara, que asigna personas a mesas y publica con su propio device_id.
+
+    cámara 1 ─┐
+    cámara 2 ─┼─▶ batch YOLO personas ─▶ SistemaVisionMesas[i] ─▶ MQTT (device_id i)
+    cámara N ─┘
+
+Las cámaras con motor "recortes" (clasificador_mesas.py) no entran al
+batch de personas: su clasificador, también compartido, corre sobre los
+recortes de sus mesas.
+
+Uso:
+    python multicamara.py --camara http://192.168.1.125:8080/video vision_camera_01 layout_cam01.json \\
+                          --camara http://192.168.1.126:8080/video vision_camera_02 layout_cam02.json recortes
+
+Sin --camara se usa CAMARAS_MULTI de config.py. Corre sin ventana.
+"""
+
+import argparse
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from metricas import MedidorEtapas
+from config import (
+    BROKER_HOST,
+    BROKER_PORT,
+    RUTA_MODELO_MESAS,
+    MODELO_PERSONAS,
+    MOTOR_OCUPACION,
+    RUTA_LAYOUT_MESAS,
+    MOSTRAR_STATS_CADA,
+    CAMARAS_MULTI,
+)
+from vision_system import SistemaVisionMesas, cargar_modelo, cargar_clasificador
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Camara:
+    """Configuración de una cámara del modo multicámara"""
+    fuente: object
+    device_id: str
+    layout: str = RUTA_LAYOUT_MESAS
+    motor: str = MOTOR_OCUPACION
+
+
+class SistemaMulticamara:
+    """Inferencia de personas en batch para varias cámaras"""
+
+    def __init__(self, camaras: List[Camara],
+                 broker_host: str = BROKER_HOST,
+                 broker_port: int = BROKER_PORT,
+                 conectar_mqtt: bool = True):
+        if not camaras:
+            raise ValueError("Se necesita al menos una cámara")
+
+        # Cada modelo se carga una sola vez y solo si alguna cámara lo usa
+        self.model_personas = None
+        con_deteccion = sum(c.motor != "recortes" for c in camaras)
+        if con_deteccion:
+            logger.info(f"Cargando modelo YOLO para personas (compartido por {con_deteccion} cámaras)...")
+            self.model_personas = cargar_modelo(MODELO_PERSONAS)
+
+        self.clasificador = None
+        if con_deteccion < len(camaras):
+            logger.info("Cargando clasificador de mesas (cámaras con motor por recortes)...")
+            self.clasificador = cargar_clasificador()
+
+        # El modelo de mesas solo hace falta para cámaras sin layout calibrado
+        model_mesas = None
+        if any(not os.path.exists(c.layout) for c in camaras):
+            logger.info("Cargando modelo YOLO para mesas (cámaras sin layout)...")
+            model_mesas = cargar_modelo(RUTA_MODELO_MESAS)
+
+        self.camaras = camaras
+        self.sistemas = [
+            SistemaVisionMesas(
+                ip_webcam=c.fuente,
+                broker_host=broker_host,
+                broker_port=broker_port,
+                conectar_mqtt=conectar_mqtt,
+                device_id=c.device_id,
+                ruta_layout=c.layout,
+                model_personas=self.model_personas,
+                model_mesas=model_mesas,
+                motor_ocupacion=c.motor,
+                clasificador=self.clasificador,
+            )
+            for c in camaras
+        ]
+        self.capturas = [
+            sistema.crear_captura(c.fuente, nombre=f"captura-{c.device_id}")
+            for sistema, c in zip(self.sistemas, camaras)
+        ]
+
+        # Tiempos del batch completo (los de cada cámara quedan en su sistema)
+        self.medidor = MedidorEtapas()
+        self.lotes = 0
+        self.frames_procesados = 0
+        self._activas = []
+
+    def iniciar(self) -> bool:
+        """
+        Calienta los modelos compartidos (una vez por motor) y abre las
+        cámaras. Las que no conectan se omiten; False si ninguna
+        """
+        calentados = set()
+        for sistema in self.sistemas:
+            if sistema.motor_ocupacion in calentados:
+                sistema.marcar_listo()
+            else:
+                sistema.calentar()
+                calentados.add(sistema.motor_ocupacion)
+                modelo = sistema.model_personas
+                if modelo is not None and modelo.entrada_fija:
+                    logger.warning(f"El modelo de personas ({modelo.nombre}) tiene entrada fija: "
+                                   f"las cámaras se infieren de a una, sin batch. "
+                                   f"Re-exportar con exportar_modelos.py")
+
+        activas = []
+        for sistema, captura in zip(self.sistemas, self.capturas):
+            if captura.abrir():
+                captura.start()
+                sistema.fuentes_telemetria.append(captura.telemetria)
+                activas.append((sistema, captura))
+                logger.info(f"✓ Cámara {sistema.device_id} conectada")
+            else:
+                logger.error(f"No se pudo conectar a la cámara {sistema.device_id} ({captura.fuente})")
+        self._activas = activas
+        return bool(activas)
+
+    def _recolectar(self):
+        """Último frame nuevo de cada cámara activa: [(sistema, timestamp, frame)]"""
+        lote = []
+        for sistema, captura in self._activas:
+            lectura = captura.leer(timeout=0)
+            if lectura is not None:
+                _, capturado_en, frame = lectura
+                lote.append((sistema, capturado_en, frame))
+        return lote
+
+    def ejecutar(self):
+        """Bucle principal: batch de frames → modelo de personas → cada cámara"""
+        if not self.iniciar():
+            logger.error("Ninguna cámara disponible")
+            return
+
+        logger.info(f"Procesando {len(self._activas)} cámaras en batch. Ctrl+C para salir")
+        ultimo_reporte = 0
+        try:
+            while True:
+                self._activas = [(s, c) for s, c in self._activas if c.activo]
+                if not self._activas:
+                    logger.error("Todas las cámaras se desconectaron")
+                    break
+
+                lote = self._recolectar()
+                if not lote:
+                    time.sleep(0.005)
+                    continue
+
+                # Solo entran al batch las cámaras con movimiento en sus mesas;
+                # las de motor por recortes se procesan solas
+                a_inferir = []
+                for sistema, capturado_en, frame in lote:
+                    if sistema.clasificador is not None:
+                        self._publicar(sistema, capturado_en, sistema.procesar_frame(frame))
+                    elif sistema.requiere_inferencia(frame, sistema.obtener_mesas(frame)):
+                        a_inferir.append((sistema, capturado_en, frame))
+                    else:
+                        sistema.contador_frames += 1
+                        self._publicar(sistema, capturado_en, sistema.reutilizar_ultimas())
+
+                if a_inferir:
+                    with self.medidor.medir("personas_lote"):
+                        personas = self._detectar_lote([frame for _, _, frame in a_inferir])
+
+                    for (sistema, capturado_en, frame), personas_frame in zip(a_inferir, personas):
+                        self._publicar(sistema, capturado_en, sistema.procesar_frame(frame, personas_frame))
+
+                self.lotes += 1
+                self.frames_procesados += len(lote)
+                self.medidor.marcar_frame()
+
+                if self.frames_procesados - ultimo_reporte >= MOSTRAR_STATS_CADA:
+                    ultimo_reporte = self.frames_procesados
+                    self.mostrar_reporte()
+
+        except KeyboardInterrupt:
+            logger.info("\nInterrumpido por el usuario")
+        finally:
+            for captura in self.capturas:
+                captura.detener()
+            for sistema in self.sistemas:
+                sistema.cerrar_mqtt()
+            self.mostrar_reporte()
+
+    @staticmethod
+    def _publicar(sistema: SistemaVisionMesas, capturado_en: float, detecciones):
+        sistema.publicar_si_corresponde(detecciones)
+        sistema.medidor.marcar_frame()
+        sistema.medidor.registrar("extremo_a_extremo", time.perf_counter() - capturado_en)
+
+    def _detectar_lote(self, frames):
+        # Cualquier sistema con modelo de personas sirve: todos comparten el mismo
+        sistema = next(s for s in self.sistemas if s.model_personas is not None)
+        return sistema.detectar_personas_lote(frames)
+
+    def mostrar_reporte(self):
+        """Throughput total y FPS por cámara"""
+        lote = self.medidor.resumen().get("personas_lote")
+        tamano_medio = self.frames_procesados / self.lotes if self.lotes else 0.0
+        logger.info("=" * 60)
+        logger.info(f"Lotes: {self.lotes} | Frames: {self.frames_procesados} | "
+                    f"Tamaño medio de lote: {tamano_medio:.2f}")
+        if lote:
+            logger.info(f"Inferencia por lote: prom {lote['promedio_ms']:.1f} ms | "
+                        f"p95 {lote['p95_ms']:.1f} ms")
+        logger.info(f"Throughput total: {self.medidor.fps() * tamano_medio:.1f} frames/s")
+        for sistema in self.sistemas:
+            extremo = sistema.medidor.resumen().get("extremo_a_extremo")
+            latencia = f" | extremo a extremo p95 {extremo['p95_ms']:.1f} ms" if extremo else ""
+            logger.info(f"   {sistema.device_id:<20} FPS {sistema.medidor.fps():5.1f} | "
+                        f"frames {sistema.contador_frames} (sin inferencia {sistema.frames_sin_inferencia})"
+                        f"{latencia}")
+        for captura in self.capturas:
+            logger.info(f"   {captura.name:<28} {captura.reporte()}")
+        logger.info("=" * 60)
+
+
+def _parsear_camaras(argumentos: Optional[List[List[str]]]) -> List[Camara]:
+    if not argumentos:
+        return [Camara(c["fuente"], c["device_id"], c.get("layout", RUTA_LAYOUT_MESAS),
+                       c.get("motor", MOTOR_OCUPACION))
+                for c in CAMARAS_MULTI]
+
+    camaras = []
+    for valores in argumentos:
+        if len(valores) not in (2, 3, 4):
+            raise SystemExit("--camara espera: FUENTE DEVICE_ID [LAYOUT [MOTOR]]")
+        fuente = int(valores[0]) if valores[0].isdigit() else valores[0]
+        layout = valores[2] if len(valores) >= 3 else f"layout_{valores[1]}.json"
+        motor = valores[3] if len(valores) == 4 else MOTOR_OCUPACION
+        camaras.append(Camara(fuente, valores[1], layout, motor))
+    return camaras
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sistema de visión multicámara con inferencia en batch")
+    parser.add_argument("--camara", nargs="+", action="append", metavar="VALOR",
+                        help="FUENTE DEVICE_ID [LAYOUT [MOTOR]]; repetir por cada cámara "
+                             "(MOTOR: deteccion | recortes)")
+    parser.add_argument("--broker", default=BROKER_HOST, help="IP del broker MQTT")
+    parser.add_argument("--puerto", type=int, default=BROKER_PORT)
+    args = parser.parse_args()
+
+    camaras = _parsear_camaras(args.camara)
+    if not camaras:
+        parser.error("No hay cámaras: usa --camara o define CAMARAS_MULTI en config.py")
+
+    sistema = SistemaMulticamara(camaras, broker_host=args.broker, broker_port=args.puerto)
+    sistema.ejecutar()
+
+
+if __name__ == "__main__":
+    main()
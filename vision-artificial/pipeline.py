@@ -0,0 +1,181 @@
+"""
+Pipeline desacoplado de captura → inferencia → publicación.
+
+Cada etapa corre en su propio thread y se comunica con la siguiente por
+colas acotadas. Si una etapa es más lenta que la anterior se descartan
+los elementos más viejos (nunca se bloquea al productor), así la
+latencia de detección se mantiene baja aunque la inferencia sea más
+lenta que la cámara.
+
+    CapturaUltimoFrame ──(último frame)──▶ inferencia ──(cola)──▶ publicación
+                                               └──(último resultado)──▶ visualización
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Optional, Tuple, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def poner_descartando(cola: queue.Queue, item) -> bool:
+    """
+    Encola sin bloquear; si la cola está llena descarta el elemento más
+    viejo. Retorna True si se descartó algo.
+    """
+    try:
+        cola.put_nowait(item)
+        return False
+    except queue.Full:
+        try:
+            cola.get_nowait()
+        except queue.Empty:
+            pass
+        cola.put_nowait(item)
+        return True
+
+
+class PipelineVision:
+    """Orquesta los threads de captura, inferencia y publicación"""
+
+    def __init__(self, sistema, fuente, tamano_cola: int = 2, lector=None):
+        """
+        Args:
+            sistema: SistemaVisionMesas que provee crear_captura(),
+                procesar_frame() y publicar_si_corresponde()
+            fuente: URL de cámara, índice de webcam o archivo de video
+            tamano_cola: Capacidad de la cola inferencia → publicación
+            lector: Lector de la cámara ya abierto (opcional)
+        """
+        self.sistema = sistema
+        self.captura = sistema.crear_captura(fuente, lector=lector)
+
+        self.cola_publicacion: queue.Queue = queue.Queue(maxsize=tamano_cola)
+        self.cola_visualizacion: queue.Queue = queue.Queue(maxsize=1)
+
+        self._detener = threading.Event()
+        self._hilos: List[threading.Thread] = []
+
+        # Descartes por etapa
+        self.descartes_publicacion = 0
+        self.descartes_visualizacion = 0
+
+    def iniciar(self) -> bool:
+        """Abre la cámara y lanza los threads. False si no hay cámara"""
+        if not self.captura.abrir():
+            return False
+
+        self.captura.start()
+        self.sistema.fuentes_telemetria.append(self.telemetria)
+        self._hilos = [
+            threading.Thread(target=self._bucle_inferencia, name="inferencia", daemon=True),
+            threading.Thread(target=self._bucle_publicacion, name="publicacion", daemon=True),
+        ]
+        for hilo in self._hilos:
+            hilo.start()
+        return True
+
+    @property
+    def activo(self) -> bool:
+        return not self._detener.is_set() and self.captura.activo
+
+    def _bucle_inferencia(self):
+        medidor = self.sistema.medidor
+        try:
+            while not self._detener.is_set():
+                lectura = self.captura.leer(timeout=0.5)
+                if lectura is None:
+                    if not self.captura.activo:
+                        break
+                    continue
+
+                _, capturado_en, frame = lectura
+                medidor.registrar("espera", time.perf_counter() - capturado_en)
+
+                with medidor.medir("inferencia"):
+                    detecciones = self.sistema.procesar_frame(frame)
+                medidor.marcar_frame()
+
+                resultado = (capturado_en, frame, detecciones)
+                if poner_descartando(self.cola_publicacion, resultado):
+                    self.descartes_publicacion += 1
+                if poner_descartando(self.cola_visualizacion, resultado):
+                    self.descartes_visualizacion += 1
+        except Exception:
+            logger.exception("Error en el thread de inferencia; deteniendo el pipeline")
+        finally:
+            # Sin inferencia el pipeline no sirve: que el bucle principal salga
+            self._detener.set()
+
+    def _publicar(self, resultado):
+        capturado_en, _, detecciones = resultado
+        try:
+            self.sistema.publicar_si_corresponde(detecciones)
+        except Exception:
+            # Un error de la cola offline o de la telemetría no debe matar al
+            # thread: se pierde este envío y el siguiente vuelve a intentar
+            logger.exception("Error publicando detecciones")
+            return
+        self.sistema.medidor.registrar("extremo_a_extremo", time.perf_counter() - capturado_en)
+
+    def _bucle_publicacion(self):
+        while not self._detener.is_set():
+            try:
+                resultado = self.cola_publicacion.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._publicar(resultado)
+
+        # Lo que quedó en la cola (p. ej. los últimos frames de un video)
+        while True:
+            try:
+                resultado = self.cola_publicacion.get_nowait()
+            except queue.Empty:
+                break
+            self._publicar(resultado)
+
+    def ultimo_resultado(self, timeout: float = 0.5) -> Optional[Tuple[np.ndarray, list]]:
+        """Último (frame, detecciones) para visualizar, o None si no hay nuevo"""
+        try:
+            _, frame, detecciones = self.cola_visualizacion.get(timeout=timeout)
+            return frame, detecciones
+        except queue.Empty:
+            return None
+
+    def telemetria(self) -> dict:
+        """Colas y descartes por etapa para la telemetría del dispositivo"""
+        datos = self.captura.telemetria()
+        datos.update({
+            "cola_publicacion": self.cola_publicacion.qsize(),
+            "descartes_publicacion": self.descartes_publicacion,
+            "descartes_visualizacion": self.descartes_visualizacion,
+        })
+        return datos
+
+    def mostrar_reporte(self):
+        """Muestra profundidad de colas y descartes por etapa"""
+        logger.info(f"   Colas: publicación {self.cola_publicacion.qsize()}/{self.cola_publicacion.maxsize}"
+                    f" | Descartes: captura {self.captura.frames_descartados}"
+                    f" / publicación {self.descartes_publicacion}"
+                    f" / visualización {self.descartes_visualizacion}")
+        logger.info(f"   {self.captura.reporte()}")
+
+    def detener(self):
+        """
+        Detiene los threads. Espera a que la publicación termine de vaciar
+        su cola (y de reenviar la cola offline) antes de retornar: quien
+        llama cierra la conexión MQTT y la cola offline a continuación.
+        """
+        self._detener.set()
+        self.captura.detener()
+        if self._hilos:
+            inferencia, publicacion = self._hilos
+            inferencia.join(timeout=2)
+            # Sin timeout: la cola de publicación es acotada y reenviar_lotes
+            # corta en el primer envío fallido, así que el vaciado termina
+            publicacion.join()
+        self.captura.join(timeout=2)
@@ -0,0 +1,141 @@
+"""
+Vista previa anotada servida como MJPEG por HTTP.
+
+En modo headless (MOSTRAR_VENTANA = False) no se copia ni se dibuja
+nada por frame. El bucle de inferencia solo guarda una referencia al
+último (frame, detecciones), y el dibujo más la codificación JPEG se
+hacen en el thread del cliente HTTP, a PREVIEW_FPS como máximo y solo
+mientras alguien está mirando.
+
+    http://<ip>:<puerto>/          → stream MJPEG (abrir en el navegador)
+    http://<ip>:<puerto>/captura.jpg → un único frame anotado
+"""
+
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LIMITE_MULTIPART = "frame"
+CALIDAD_JPEG = 70
+
+
+class ServidorPreview:
+    """Servidor HTTP de la vista previa; renderiza bajo demanda"""
+
+    def __init__(self, renderizar: Callable[[np.ndarray, list], np.ndarray],
+                 puerto: int, fps: float = 2.0, host: str = "0.0.0.0"):
+        """
+        Args:
+            renderizar: Función (frame, detecciones) → frame anotado
+                (normalmente SistemaVisionMesas.dibujar_detecciones)
+            puerto: Puerto HTTP
+            fps: Máximo de frames renderizados por segundo (mínimo 0.1)
+        """
+        self.renderizar = renderizar
+        self.intervalo = 1.0 / max(fps, 0.1)
+
+        self._lock = threading.Lock()
+        self._ultimo = None       # (frame, detecciones) sin copiar
+        self._secuencia = 0
+        self._jpeg: Optional[bytes] = None
+        self._secuencia_jpeg = -1
+
+        self.clientes = 0
+        self.frames_renderizados = 0
+
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/captura.jpg"):
+                    servidor._servir_captura(self)
+                elif self.path in ("/", "/stream"):
+                    servidor._servir_stream(self)
+                else:
+                    self.send_error(404)
+
+            def log_message(self, formato, *args):
+                logger.debug("preview: " + formato, *args)
+
+        self.httpd = ThreadingHTTPServer((host, puerto), Manejador)
+        self.httpd.daemon_threads = True
+        self._hilo = threading.Thread(target=self.httpd.serve_forever, name="preview", daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+        host, puerto = self.httpd.server_address[:2]
+        logger.info(f"Vista previa MJPEG en http://{host}:{puerto}/ (máx. {1 / self.intervalo:.0f} FPS)")
+
+    def actualizar(self, frame: np.ndarray, detecciones: list):
+        """Guarda el último resultado. Barato: no copia ni dibuja"""
+        with self._lock:
+            self._ultimo = (frame, detecciones)
+            self._secuencia += 1
+
+    def _jpeg_actual(self) -> Optional[bytes]:
+        """JPEG del último resultado; se renderiza una vez por resultado nuevo"""
+        with self._lock:
+            ultimo, secuencia = self._ultimo, self._secuencia
+            if secuencia == self._secuencia_jpeg:
+                return self._jpeg
+        if ultimo is None:
+            return None
+
+        frame, detecciones = ultimo
+        ok, buffer = cv2.imencode(".jpg", self.renderizar(frame, detecciones),
+                                  [cv2.IMWRITE_JPEG_QUALITY, CALIDAD_JPEG])
+        if not ok:
+            return None
+
+        with self._lock:
+            self._jpeg, self._secuencia_jpeg = buffer.tobytes(), secuencia
+            self.frames_renderizados += 1
+            return self._jpeg
+
+    def _servir_captura(self, manejador: BaseHTTPRequestHandler):
+        jpeg = self._jpeg_actual()
+        if jpeg is None:
+            manejador.send_error(503, "Sin frames todavía")
+            return
+        manejador.send_response(200)
+        manejador.send_header("Content-Type", "image/jpeg")
+        manejador.send_header("Content-Length", str(len(jpeg)))
+        manejador.end_headers()
+        manejador.wfile.write(jpeg)
+
+    def _servir_stream(self, manejador: BaseHTTPRequestHandler):
+        manejador.send_response(200)
+        manejador.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={LIMITE_MULTIPART}")
+        manejador.send_header("Cache-Control", "no-cache")
+        manejador.end_headers()
+
+        with self._lock:
+            self.clientes += 1
+        try:
+            while True:
+                inicio = time.monotonic()
+                jpeg = self._jpeg_actual()
+                if jpeg is not None:
+                    manejador.wfile.write(
+                        f"--{LIMITE_MULTIPART}\r\nContent-Type: image/jpeg\r\n"
+                        f"Content-Length: {len(jpeg)}\r\n\r\n".encode()
+                    )
+                    manejador.wfile.write(jpeg)
+                    manejador.wfile.write(b"\r\n")
+                time.sleep(max(0.0, self.intervalo - (time.monotonic() - inicio)))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self._lock:
+                self.clientes -= 1
+
+    def detener(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,99 @@
+"""
+Política de publicación de detecciones: solo cambios + heartbeat.
+
+Publicar la lista completa cada INTERVALO_ACTUALIZACION segundos hace
+esperar un cambio real hasta ese intervalo y, con el salón quieto,
+carga al broker y al backend con mensajes idénticos. Con
+ENVIAR_SOLO_CAMBIOS se compara cada resultado con el último estado
+publicado de cada mesa:
+
+- si una mesa cambia de estado (libre ↔ ocupada) y el nuevo estado se
+  mantiene DEBOUNCE_CAMBIOS segundos, se publica de inmediato solo esa
+  mesa (el debounce filtra parpadeos del detector)
+- cada INTERVALO_HEARTBEAT segundos se publica el estado completo, así
+  el backend se resincroniza aunque se haya perdido algún mensaje
+
+El backend solo actualiza las mesas que vienen en el mensaje, por lo que
+los mensajes parciales no requieren cambios del lado del servidor.
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+TIPO_COMPLETO = "completo"
+TIPO_CAMBIOS = "cambios"
+
+
+class PoliticaPublicacion:
+    """Decide cuándo y qué detecciones publicar"""
+
+    def __init__(self, solo_cambios: bool, intervalo: float,
+                 debounce: float, heartbeat: float):
+        """
+        Args:
+            solo_cambios: Si False, se publica todo cada `intervalo`
+                segundos (comportamiento original)
+            intervalo: Segundos entre envíos completos sin solo_cambios
+            debounce: Segundos que un estado nuevo debe mantenerse
+            heartbeat: Segundos entre envíos completos con solo_cambios
+        """
+        self.solo_cambios = solo_cambios
+        self.intervalo = intervalo
+        self.debounce = debounce
+        self.heartbeat = heartbeat
+
+        self.ultimo_completo = 0.0
+        self.publicado: Dict[int, bool] = {}                 # id_mesa → ocupada
+        self.pendiente: Dict[int, Tuple[bool, float]] = {}   # id_mesa → (ocupada, desde)
+
+        # Estadísticas
+        self.envios_completos = 0
+        self.envios_cambios = 0
+
+    @staticmethod
+    def _ocupada(deteccion) -> bool:
+        return deteccion.personas_detectadas > 0
+
+    def evaluar(self, detecciones: list, ahora: Optional[float] = None) -> Optional[Tuple[list, str]]:
+        """
+        Retorna (detecciones a publicar, tipo) o None si no hay que
+        publicar nada. El estado se da por publicado al retornar.
+        """
+        if not detecciones:
+            return None
+        ahora = time.time() if ahora is None else ahora
+
+        periodo = self.heartbeat if self.solo_cambios else self.intervalo
+        if ahora - self.ultimo_completo >= periodo:
+            self.ultimo_completo = ahora
+            self.publicado = {d.id_mesa: self._ocupada(d) for d in detecciones}
+            self.pendiente.clear()
+            self.envios_completos += 1
+            return detecciones, TIPO_COMPLETO
+
+        if not self.solo_cambios:
+            return None
+
+        cambios: List = []
+        for det in detecciones:
+            ocupada = self._ocupada(det)
+            if self.publicado.get(det.id_mesa) == ocupada:
+                self.pendiente.pop(det.id_mesa, None)
+                continue
+
+            estado_pendiente = self.pendiente.get(det.id_mesa)
+            if estado_pendiente is None or estado_pendiente[0] != ocupada:
+                self.pendiente[det.id_mesa] = (ocupada, ahora)
+                estado_pendiente = self.pendiente[det.id_mesa]
+
+            if ahora - estado_pendiente[1] >= self.debounce:
+                cambios.append(det)
+
+        if not cambios:
+            return None
+
+        for det in cambios:
+            self.publicado[det.id_mesa] = self._ocupada(det)
+            del self.pendiente[det.id_mesa]
+        self.envios_cambios += 1
+        return cambios, TIPO_CAMBIOS
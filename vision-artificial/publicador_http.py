@@ -0,0 +1,170 @@
+"""
+Publicador HTTP asíncrono para vision_simple.
+
+El bucle de detección no espera a la red: `publicar()` solo deja el
+estado en una bandeja de salida y vuelve. Un thread aparte lo envía al
+backend por una `requests.Session` (conexión keep-alive reutilizada, sin
+handshake TCP por envío).
+
+- La bandeja guarda el último estado de cada mesa: si el backend tarda o
+  está caído, los estados nuevos reemplazan a los viejos en lugar de
+  acumularse (el backend solo guarda el estado actual).
+- Si un envío falla se reintenta con backoff exponencial con jitter.
+- Al cerrar, lo que no se pudo enviar queda en la cola offline en disco
+  (cola_offline.py) y se reenvía primero en el próximo arranque.
+- Opcionalmente el cuerpo va comprimido con gzip (el backend lo
+  descomprime en app/utils/gzip_request.py).
+"""
+
+import gzip
+import json
+import logging
+import random
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cola_offline import ColaOffline
+
+logger = logging.getLogger(__name__)
+
+
+class PublicadorHttp(threading.Thread):
+    """Envía detecciones al backend en segundo plano"""
+
+    def __init__(self, url: str, cola: Optional[ColaOffline] = None,
+                 timeout: float = 3.0, usar_gzip: bool = False,
+                 espera_inicial: float = 1.0, espera_maxima: float = 30.0):
+        """
+        Args:
+            url: Endpoint del backend (POST con JSON)
+            cola: Cola offline para lo pendiente entre ejecuciones
+            timeout: Segundos máximos por request
+            usar_gzip: Comprimir el cuerpo (Content-Encoding: gzip)
+            espera_inicial: Primera espera tras un envío fallido
+            espera_maxima: Tope del backoff
+        """
+        super().__init__(name="publicador-http", daemon=True)
+        self.url = url
+        self.cola = cola
+        self.timeout = timeout
+        self.usar_gzip = usar_gzip
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+
+        # Un solo destino: un pool de una conexión persistente
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        self.sesion.mount("http://", adaptador)
+        self.sesion.mount("https://", adaptador)
+        self.sesion.headers["Content-Type"] = "application/json"
+        if usar_gzip:
+            self.sesion.headers["Content-Encoding"] = "gzip"
+
+        # Bandeja de salida: último estado por mesa
+        self._lock = threading.Lock()
+        self._pendientes: Dict[int, dict] = {}
+        self._timestamp: Optional[str] = None
+        self._hay_pendientes = threading.Event()
+        self._detener = threading.Event()
+
+        # Estadísticas
+        self.enviados = 0
+        self.fallidos = 0
+        self.reemplazados = 0
+        self.bytes_enviados = 0
+
+    def publicar(self, payload: dict):
+        """Deja el estado en la bandeja (no bloquea)"""
+        with self._lock:
+            for det in payload.get("detecciones", []):
+                if det["id_mesa"] in self._pendientes:
+                    self.reemplazados += 1
+                self._pendientes[det["id_mesa"]] = det
+            self._timestamp = payload.get("timestamp")
+        self._hay_pendientes.set()
+
+    def pendientes(self) -> int:
+        with self._lock:
+            return len(self._pendientes)
+
+    def _tomar(self) -> Optional[dict]:
+        """Vacía la bandeja y arma el payload a enviar"""
+        with self._lock:
+            self._hay_pendientes.clear()
+            if not self._pendientes:
+                return None
+            payload = {
+                "timestamp": self._timestamp,
+                "detecciones": [self._pendientes[k] for k in sorted(self._pendientes)],
+            }
+            self._pendientes = {}
+        return payload
+
+    def _devolver(self, payload: dict):
+        """Un envío falló: vuelve a la bandeja salvo las mesas con estado más nuevo"""
+        with self._lock:
+            for det in payload["detecciones"]:
+                self._pendientes.setdefault(det["id_mesa"], det)
+            if self._timestamp is None:
+                self._timestamp = payload["timestamp"]
+        self._hay_pendientes.set()
+
+    def _post(self, payload: dict) -> bool:
+        """POST al backend. True si respondió 200"""
+        cuerpo = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        if self.usar_gzip:
+            cuerpo = gzip.compress(cuerpo, compresslevel=6)
+        try:
+            response = self.sesion.post(self.url, data=cuerpo, timeout=self.timeout)
+            if response.status_code == 200:
+                self.bytes_enviados += len(cuerpo)
+                return True
+            logger.error(f"✗ Error: {response.status_code}")
+        except requests.RequestException as e:
+            logger.error(f"✗ Error: {e}")
+        return False
+
+    def run(self):
+        espera = self.espera_inicial
+        while not self._detener.is_set():
+            if not self._hay_pendientes.wait(timeout=0.5):
+                continue
+
+            # Primero lo que quedó en disco de una ejecución anterior
+            if self.cola is not None and len(self.cola):
+                self.cola.reenviar(self._post)
+            payload = self._tomar()
+            if payload is None:
+                continue
+
+            if (self.cola is None or not len(self.cola)) and self._post(payload):
+                self.enviados += 1
+                espera = self.espera_inicial
+                logger.info("✓ Enviado al backend")
+                continue
+
+            self.fallidos += 1
+            self._devolver(payload)
+            logger.warning(f"Backend no disponible, reintento en {espera:.1f}s "
+                           f"({self.pendientes()} mesas pendientes)")
+            self._detener.wait(espera * random.uniform(0.8, 1.2))
+            espera = min(espera * 2, self.espera_maxima)
+
+    def cerrar(self, timeout: float = 5.0):
+        """Detiene el thread; lo no enviado queda en la cola offline"""
+        self._detener.set()
+        if self.is_alive():
+            self.join(timeout)
+
+        payload = self._tomar()
+        if payload is not None and self.cola is not None:
+            self.cola.encolar(payload)
+            logger.warning(f"{len(payload['detecciones'])} mesas sin enviar guardadas en la cola offline")
+        self.sesion.close()
+
+    def reporte(self) -> str:
+        return (f"enviados {self.enviados} | fallidos {self.fallidos} | "
+                f"reemplazados en bandeja {self.reemplazados} | {self.bytes_enviados} bytes")
@@ -0,0 +1,80 @@
+"""
+Regiones de interés (ROI) para la detección de personas.
+
+Solo importan las personas que están cerca de una mesa, así que en lugar
+de pasar el frame completo a YOLO se recortan las zonas alrededor de las
+mesas conocidas (caché o layout calibrado). Las cajas de las mesas se
+agrandan con un margen, las que se tocan o quedan más cerca que
+`separacion` se fusionan en un solo recorte y las detecciones de cada
+recorte se trasladan de vuelta a coordenadas del frame.
+
+Que los recortes no se solapen no alcanza: si el hueco entre dos es más
+angosto que una persona, la que está en el hueco aparece cortada en los
+dos y se cuenta dos veces (con cajas que no se solapan, así que un NMS
+tampoco las une). Con `separacion` del tamaño de una persona, cada
+persona cae a lo sumo en un recorte.
+"""
+
+from typing import List
+
+import numpy as np
+
+
+def regiones_interes(mesas_xyxy: np.ndarray, ancho: int, alto: int,
+                     margen: float, separacion: int = 0) -> np.ndarray:
+    """
+    Recortes (R, 4) [x1, y1, x2, y2] que cubren todas las mesas.
+
+    Args:
+        mesas_xyxy: Cajas de las mesas (M, 4)
+        ancho, alto: Tamaño del frame
+        margen: Fracción del lado de cada mesa que se agrega por cada
+            lado (las personas sentadas sobresalen de la mesa)
+        separacion: Hueco mínimo en píxeles entre recortes; los más
+            cercanos se fusionan
+    """
+    if len(mesas_xyxy) == 0:
+        return np.zeros((0, 4), dtype=np.int32)
+
+    cajas = mesas_xyxy.astype(np.float32)
+    lados = np.stack((cajas[:, 2] - cajas[:, 0], cajas[:, 3] - cajas[:, 1]), axis=1)
+    relleno = np.concatenate((-lados, lados), axis=1) * margen
+    cajas = cajas + relleno
+    cajas = np.clip(cajas, 0, [ancho, alto, ancho, alto]).astype(np.int32)
+
+    regiones = [tuple(c) for c in cajas]
+    fusionado = True
+    while fusionado:
+        fusionado = False
+        for i in range(len(regiones)):
+            for j in range(i + 1, len(regiones)):
+                a, b = regiones[i], regiones[j]
+                if (a[0] <= b[2] + separacion and b[0] <= a[2] + separacion
+                        and a[1] <= b[3] + separacion and b[1] <= a[3] + separacion):
+                    regiones[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del regiones[j]
+                    fusionado = True
+                    break
+            if fusionado:
+                break
+
+    return np.array(regiones, dtype=np.int32).reshape(-1, 4)
+
+
+def fraccion_cubierta(regiones: np.ndarray, ancho: int, alto: int) -> float:
+    """Fracción del frame que ocupan los recortes (no se solapan)"""
+    if len(regiones) == 0:
+        return 0.0
+    areas = (regiones[:, 2] - regiones[:, 0]) * (regiones[:, 3] - regiones[:, 1])
+    return float(areas.sum()) / (ancho * alto)
+
+
+def recortar(frame: np.ndarray, regiones: np.ndarray) -> List[np.ndarray]:
+    """Vistas (sin copia) del frame para cada recorte"""
+    return [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in regiones]
+
+
+def a_coordenadas_frame(xyxy: np.ndarray, region: np.ndarray) -> np.ndarray:
+    """Traslada cajas (N, 4) de un recorte a coordenadas del frame"""
+    desplazamiento = np.array([region[0], region[1], region[0], region[1]], dtype=xyxy.dtype)
+    return xyxy + desplazamiento
@@ -0,0 +1,41 @@
+"""
+Telemetría del dispositivo edge.
+
+Cada INTERVALO_TELEMETRIA segundos el sistema publica en
+restaurant/telemetria/{device_id} (retenido, QoS 0) un resumen de salud:
+FPS, milisegundos por etapa (p50/p95), profundidad de colas, frames
+descartados, reconexiones de cámara, temperatura y carga de CPU. El
+backend lo agrega en una vista de salud de dispositivos, así una cámara
+lenta se detecta desde el dashboard sin entrar por SSH a la Raspberry.
+"""
+
+import os
+from typing import Optional
+
+RUTA_TEMPERATURA = "/sys/class/thermal/thermal_zone0/temp"
+
+
+def temperatura_cpu() -> Optional[float]:
+    """Temperatura de la CPU en °C (Raspberry Pi / Linux), o None si no se puede leer"""
+    try:
+        with open(RUTA_TEMPERATURA) as f:
+            return round(int(f.read().strip()) / 1000, 1)
+    except (OSError, ValueError):
+        return None
+
+
+def carga_cpu() -> Optional[float]:
+    """Carga promedio del último minuto normalizada por núcleo (1.0 = CPU saturada)"""
+    try:
+        return round(os.getloadavg()[0] / (os.cpu_count() or 1), 2)
+    except (OSError, AttributeError):
+        return None  # getloadavg no existe en Windows
+
+
+def muestra_sistema() -> dict:
+    """Métricas del sistema operativo para el payload de telemetría"""
+    return {
+        "temperatura_cpu_c": temperatura_cpu(),
+        "carga_cpu": carga_cpu(),
+        "cpus": os.cpu_count(),
+    }
@@ -0,0 +1,103 @@
+"""ColaOffline: orden de reenvío, corte en el primer fallo y compactación"""
+
+import pytest
+
+from cola_offline import ColaOffline, TIPO_COMPACTADO
+
+
+@pytest.fixture
+def cola(tmp_path):
+    cola = ColaOffline(str(tmp_path / "cola.db"), max_entradas=5)
+    yield cola
+    cola.cerrar()
+
+
+def mensaje(numero, *mesas):
+    return {
+        "timestamp": f"t{numero}",
+        "tipo": "cambios",
+        "detecciones": [{"id_mesa": m, "personas_detectadas": p} for m, p in mesas],
+    }
+
+
+def test_reenvia_en_orden_de_llegada_y_vacia_la_cola(cola):
+    for n in range(3):
+        cola.encolar(mensaje(n, (1, n)))
+
+    recibidos = []
+    assert cola.reenviar(lambda payload: recibidos.append(payload) or True) == 3
+    assert [m["timestamp"] for m in recibidos] == ["t0", "t1", "t2"]
+    assert len(cola) == 0
+    assert cola.reenviados == 3
+
+
+def test_reenvio_por_lotes(cola):
+    for n in range(4):
+        cola.encolar(mensaje(n, (1, n)))
+
+    lotes = []
+    assert cola.reenviar_lotes(lambda lote: lotes.append(lote) or True, tamano_lote=3) == 4
+    assert [[m["timestamp"] for m in lote] for lote in lotes] == [["t0", "t1", "t2"], ["t3"]]
+
+
+def test_envio_fallido_deja_el_mensaje_y_los_siguientes(cola):
+    for n in range(3):
+        cola.encolar(mensaje(n, (1, n)))
+
+    respuestas = iter([True, False])
+    assert cola.reenviar(lambda payload: next(respuestas)) == 1
+    assert len(cola) == 2
+
+    recibidos = []
+    cola.reenviar(lambda payload: recibidos.append(payload["timestamp"]) or True)
+    assert recibidos == ["t1", "t2"]
+
+
+def test_persiste_entre_instancias(tmp_path):
+    ruta = str(tmp_path / "cola.db")
+    cola = ColaOffline(ruta)
+    cola.encolar(mensaje(0, (1, 2)))
+    cola.cerrar()
+
+    cola = ColaOffline(ruta)
+    try:
+        recibidos = []
+        cola.reenviar(lambda payload: recibidos.append(payload) or True)
+        assert recibidos == [mensaje(0, (1, 2))]
+    finally:
+        cola.cerrar()
+
+
+def test_compacta_al_ultimo_estado_de_cada_mesa(cola):
+    cola.encolar(mensaje(0, (1, 0), (2, 0), (3, 1)))
+    cola.encolar(mensaje(1, (1, 2)))
+    cola.encolar(mensaje(2, (2, 1)))
+    cola.encolar(mensaje(3, (1, 0)))
+    cola.encolar(mensaje(4, (3, 4)))
+    assert cola.compactaciones == 0
+
+    cola.encolar(mensaje(5, (2, 3)))
+    assert cola.compactaciones == 1
+    assert len(cola) == 1
+
+    recibidos = []
+    cola.reenviar(lambda payload: recibidos.append(payload) or True)
+    assert recibidos == [{
+        "timestamp": "t5",
+        "tipo": TIPO_COMPACTADO,
+        "detecciones": [
+            {"id_mesa": 1, "personas_detectadas": 0},
+            {"id_mesa": 2, "personas_detectadas": 3},
+            {"id_mesa": 3, "personas_detectadas": 4},
+        ],
+    }]
+
+
+def test_lo_encolado_despues_de_compactar_va_detras(cola):
+    for n in range(6):
+        cola.encolar(mensaje(n, (1, n)))
+    cola.encolar(mensaje(6, (2, 1)))
+
+    recibidos = []
+    cola.reenviar(lambda payload: recibidos.append(payload) or True)
+    assert [(m["tipo"], m["timestamp"]) for m in recibidos] == [(TIPO_COMPACTADO, "t5"), ("cambios", "t6")]
@@ -0,0 +1,98 @@
+"""PoliticaPublicacion: debounce de cambios y heartbeat completo"""
+
+from collections import namedtuple
+
+from publicacion import PoliticaPublicacion, TIPO_COMPLETO, TIPO_CAMBIOS
+
+Deteccion = namedtuple("Deteccion", "id_mesa personas_detectadas")
+
+
+def mesas(*personas):
+    return [Deteccion(i + 1, p) for i, p in enumerate(personas)]
+
+
+def politica(**kwargs):
+    opciones = dict(solo_cambios=True, intervalo=3.0, debounce=2.0, heartbeat=60.0)
+    opciones.update(kwargs)
+    return PoliticaPublicacion(**opciones)
+
+
+def test_primer_resultado_se_publica_completo():
+    p = politica()
+    envio = p.evaluar(mesas(0, 2), ahora=100.0)
+    assert envio == (mesas(0, 2), TIPO_COMPLETO)
+    assert p.publicado == {1: False, 2: True}
+
+
+def test_sin_detecciones_no_publica():
+    assert politica().evaluar([], ahora=100.0) is None
+
+
+def test_sin_cambios_no_publica_hasta_el_heartbeat():
+    p = politica()
+    p.evaluar(mesas(0, 2), ahora=100.0)
+    assert p.evaluar(mesas(0, 2), ahora=130.0) is None
+    assert p.evaluar(mesas(0, 2), ahora=160.0) == (mesas(0, 2), TIPO_COMPLETO)
+    assert p.envios_completos == 2
+
+
+def test_cambio_de_conteo_sin_cambio_de_estado_no_publica():
+    p = politica()
+    p.evaluar(mesas(0, 2), ahora=100.0)
+    assert p.evaluar(mesas(0, 3), ahora=101.0) is None
+    assert p.evaluar(mesas(0, 3), ahora=110.0) is None
+
+
+def test_cambio_se_publica_cuando_se_mantiene_el_debounce():
+    p = politica()
+    p.evaluar(mesas(0, 2), ahora=100.0)
+    assert p.evaluar(mesas(1, 2), ahora=101.0) is None
+    assert p.evaluar(mesas(1, 2), ahora=102.5) is None
+    assert p.evaluar(mesas(1, 2), ahora=103.0) == ([Deteccion(1, 1)], TIPO_CAMBIOS)
+    assert p.publicado[1] is True
+    assert p.pendiente == {}
+
+    # Ya publicado: no se repite
+    assert p.evaluar(mesas(1, 2), ahora=104.0) is None
+    assert p.envios_cambios == 1
+
+
+def test_parpadeo_dentro_del_debounce_se_descarta():
+    p = politica()
+    p.evaluar(mesas(0), ahora=100.0)
+    assert p.evaluar(mesas(1), ahora=101.0) is None
+    assert p.evaluar(mesas(0), ahora=102.0) is None
+    assert p.pendiente == {}
+    assert p.evaluar(mesas(0), ahora=105.0) is None
+
+
+def test_solo_se_publican_las_mesas_que_cambiaron():
+    p = politica()
+    p.evaluar(mesas(0, 0, 3), ahora=100.0)
+    p.evaluar(mesas(2, 0, 0), ahora=101.0)
+    envio = p.evaluar(mesas(2, 0, 0), ahora=103.0)
+    assert envio == ([Deteccion(1, 2), Deteccion(3, 0)], TIPO_CAMBIOS)
+
+
+def test_heartbeat_descarta_los_pendientes():
+    p = politica()
+    p.evaluar(mesas(0), ahora=100.0)
+    p.evaluar(mesas(1), ahora=159.0)
+    assert p.evaluar(mesas(1), ahora=160.0) == (mesas(1), TIPO_COMPLETO)
+    assert p.pendiente == {}
+    assert p.evaluar(mesas(1), ahora=170.0) is None
+
+
+def test_forzar_completo_reiniciando_ultimo_completo():
+    p = politica()
+    p.evaluar(mesas(0), ahora=100.0)
+    p.ultimo_completo = 0
+    assert p.evaluar(mesas(0), ahora=101.0) == (mesas(0), TIPO_COMPLETO)
+
+
+def test_sin_solo_cambios_publica_completo_cada_intervalo():
+    p = politica(solo_cambios=False)
+    assert p.evaluar(mesas(0), ahora=100.0)[1] == TIPO_COMPLETO
+    assert p.evaluar(mesas(1), ahora=102.0) is None
+    assert p.evaluar(mesas(1), ahora=103.0) == (mesas(1), TIPO_COMPLETO)
+    assert p.envios_cambios == 0
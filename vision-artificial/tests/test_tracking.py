@@ -0,0 +1,125 @@
+"""RastreadorPersonas: confirmación, pérdida y estancias"""
+
+import numpy as np
+
+from tracking import RastreadorPersonas, PermanenciaMesas
+
+
+def cajas(*xyxy):
+    return np.array(xyxy, dtype=np.float32).reshape(-1, 4)
+
+
+def confs(n):
+    return np.full(n, 0.9, dtype=np.float32)
+
+
+PERSONA = (100, 100, 160, 260)
+OTRA = (400, 120, 460, 280)
+
+
+def paso(rastreador, *xyxy, ahora=0.0):
+    return rastreador.actualizar(cajas(*xyxy), confs(len(xyxy)), ahora)
+
+
+def test_persona_nueva_cuenta_recien_con_min_golpes():
+    r = RastreadorPersonas(min_golpes=3)
+    assert paso(r, PERSONA) == []
+    assert paso(r, PERSONA) == []
+    confirmados = paso(r, PERSONA)
+    assert [t.id for t in confirmados] == [1]
+
+
+def test_min_golpes_uno_confirma_de_inmediato():
+    r = RastreadorPersonas(min_golpes=1)
+    assert [t.id for t in paso(r, PERSONA)] == [1]
+
+
+def test_falso_positivo_de_un_frame_se_descarta():
+    r = RastreadorPersonas(min_golpes=3)
+    paso(r, PERSONA)
+    paso(r)
+    assert r.tracks == []
+
+    # Reaparece: es un track nuevo que vuelve a empezar
+    paso(r, PERSONA)
+    assert [t.id for t in r.tracks] == [2]
+    assert r.tracks[0].golpes == 1
+
+
+def test_confirmado_sigue_contando_hasta_max_perdidos():
+    r = RastreadorPersonas(min_golpes=2, max_perdidos=2)
+    paso(r, PERSONA)
+    paso(r, PERSONA)
+
+    assert [t.id for t in paso(r)] == [1]
+    assert [t.id for t in paso(r)] == [1]
+    assert paso(r) == []
+    assert r.tracks == []
+
+
+def test_confirmado_que_reaparece_conserva_el_id():
+    r = RastreadorPersonas(min_golpes=2, max_perdidos=5)
+    paso(r, PERSONA)
+    paso(r, PERSONA)
+    paso(r)
+    paso(r)
+
+    confirmados = paso(r, PERSONA)
+    assert [t.id for t in confirmados] == [1]
+    assert confirmados[0].perdidos == 0
+
+
+def test_ids_estables_aunque_cambie_el_orden_de_las_detecciones():
+    r = RastreadorPersonas(min_golpes=1)
+    primero = {tuple(t.xyxy.astype(int)): t.id for t in paso(r, PERSONA, OTRA)}
+    segundo = {tuple(t.xyxy.astype(int)): t.id for t in paso(r, OTRA, PERSONA)}
+    assert primero == segundo
+    assert len(r.tracks) == 2
+
+
+def test_movimiento_brusco_se_asocia_por_distancia_de_centros():
+    r = RastreadorPersonas(min_golpes=1, iou_minimo=0.3)
+    paso(r, (0, 0, 100, 200))
+    # IoU ~0.11 con la caja anterior, pero el centro se movió menos de media diagonal
+    confirmados = paso(r, (80, 0, 180, 200))
+    assert [t.id for t in confirmados] == [1]
+    assert len(r.tracks) == 1
+
+
+def test_caja_suavizada_entre_frames():
+    r = RastreadorPersonas(min_golpes=1, suavizado=0.5)
+    paso(r, (0, 0, 100, 200))
+    track = paso(r, (10, 0, 110, 200))[0]
+    np.testing.assert_allclose(track.xyxy, [5, 0, 105, 200])
+
+
+def test_estancia_se_registra_al_perder_a_la_persona():
+    r = RastreadorPersonas(min_golpes=1, max_perdidos=0)
+    track = paso(r, PERSONA, ahora=10.0)[0]
+    r.registrar_mesas([track], {track.id: 4}, ahora=10.0)
+
+    paso(r, PERSONA, ahora=70.0)
+    paso(r, ahora=100.0)
+    assert list(r.estancias) == [(4, 90.0)]
+    assert r.estancia_promedio() == {4: 90.0}
+
+
+def test_cambio_de_mesa_cierra_la_estancia_anterior():
+    r = RastreadorPersonas(min_golpes=1)
+    track = paso(r, PERSONA, ahora=0.0)[0]
+    r.registrar_mesas([track], {track.id: 1}, ahora=0.0)
+    r.registrar_mesas([track], {track.id: 1}, ahora=30.0)
+    r.registrar_mesas([track], {track.id: 2}, ahora=60.0)
+
+    assert list(r.estancias) == [(1, 60.0)]
+    assert track.mesa == 2
+    assert track.en_mesa_desde == 60.0
+
+
+def test_permanencia_de_mesa():
+    p = PermanenciaMesas()
+    assert p.actualizar(1, 0, ahora=0.0) is None
+    assert p.actualizar(1, 2, ahora=10.0) == 0.0
+    assert p.actualizar(1, 1, ahora=25.0) == 15.0
+    assert p.actualizar(1, 0, ahora=30.0) is None
+    assert p.actualizar(1, 1, ahora=40.0) == 0.0
@@ -0,0 +1,183 @@
+"""
+Seguimiento de personas entre frames.
+
+Contar las personas de cada frame por separado hace saltar el conteo de
+una mesa cada vez que YOLO pierde o duplica a alguien por un frame, y
+cada salto termina en una publicación MQTT y una escritura en la base.
+El rastreador asocia las detecciones de frames consecutivos (IoU, con
+la distancia entre centros como respaldo) y le da a cada persona un ID
+persistente:
+
+- una persona nueva cuenta recién después de TRACKING_MIN_GOLPES frames
+  seguidos (filtra falsos positivos de un frame)
+- una persona que deja de detectarse sigue contando hasta
+  TRACKING_MAX_PERDIDOS frames (tapa los huecos del detector)
+
+Además se lleva la permanencia de cada persona en su mesa y de cada mesa
+ocupada, para análisis de tiempo de estadía.
+"""
+
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from geometria import centros, iou_matriz
+
+
+class Track:
+    """Una persona seguida entre frames"""
+
+    __slots__ = ("id", "xyxy", "conf", "golpes", "perdidos", "confirmado",
+                 "mesa", "en_mesa_desde")
+
+    def __init__(self, id_track: int, xyxy: np.ndarray, conf: float):
+        self.id = id_track
+        self.xyxy = xyxy.astype(np.float32)
+        self.conf = conf
+        self.golpes = 1
+        self.perdidos = 0
+        self.confirmado = False
+        self.mesa: Optional[int] = None
+        self.en_mesa_desde = 0.0
+
+
+def _emparejar(puntaje: np.ndarray, validos: np.ndarray, mayor_es_mejor: bool) -> List[Tuple[int, int]]:
+    """Emparejamiento greedy (fila, columna) por mejor puntaje"""
+    filas, columnas = np.nonzero(validos)
+    if len(filas) == 0:
+        return []
+    valores = puntaje[filas, columnas]
+    orden = np.argsort(-valores if mayor_es_mejor else valores, kind="stable")
+
+    usadas_f, usadas_c, pares = set(), set(), []
+    for k in orden:
+        f, c = int(filas[k]), int(columnas[k])
+        if f in usadas_f or c in usadas_c:
+            continue
+        usadas_f.add(f)
+        usadas_c.add(c)
+        pares.append((f, c))
+    return pares
+
+
+class RastreadorPersonas:
+    """Rastreador multi-objeto liviano por IoU/centroide"""
+
+    def __init__(self, iou_minimo: float = 0.3, max_perdidos: int = 15,
+                 min_golpes: int = 3, suavizado: float = 0.6, max_estancias: int = 500):
+        """
+        Args:
+            iou_minimo: IoU mínimo para asociar una detección a un track
+            max_perdidos: Frames sin detección antes de descartar un track
+            min_golpes: Frames detectado antes de contar a la persona
+            suavizado: Peso de la detección nueva en la caja del track (0-1)
+            max_estancias: Estancias finalizadas que se conservan
+        """
+        self.iou_minimo = iou_minimo
+        self.max_perdidos = max_perdidos
+        self.min_golpes = min_golpes
+        self.suavizado = suavizado
+
+        self.tracks: List[Track] = []
+        self._siguiente_id = 1
+
+        # (id_mesa, segundos) de las personas que dejaron su mesa
+        self.estancias: deque = deque(maxlen=max_estancias)
+
+    def actualizar(self, xyxy: np.ndarray, conf: np.ndarray, ahora: Optional[float] = None) -> List[Track]:
+        """
+        Asocia las detecciones del frame a los tracks existentes.
+
+        Returns:
+            Tracks confirmados vigentes (incluye los perdidos hace menos de
+            max_perdidos frames, con su última caja)
+        """
+        ahora = time.monotonic() if ahora is None else ahora
+        detecciones = xyxy.astype(np.float32).reshape(-1, 4)
+        libres = set(range(len(detecciones)))
+        sin_pareja = set(range(len(self.tracks)))
+
+        if self.tracks and len(detecciones):
+            cajas = np.stack([t.xyxy for t in self.tracks])
+
+            # 1. Por IoU
+            iou = iou_matriz(cajas, detecciones)
+            pares = _emparejar(iou, iou >= self.iou_minimo, mayor_es_mejor=True)
+
+            # 2. Respaldo por distancia entre centros (movimientos bruscos)
+            restantes_t = sorted(sin_pareja - {f for f, _ in pares})
+            restantes_d = sorted(libres - {c for _, c in pares})
+            if restantes_t and restantes_d:
+                ct, cd = centros(cajas[restantes_t]), centros(detecciones[restantes_d])
+                distancia = np.linalg.norm(ct[:, None, :] - cd[None, :, :], axis=2)
+                lados = cajas[restantes_t, 2:] - cajas[restantes_t, :2]
+                limite = 0.5 * np.linalg.norm(lados, axis=1)[:, None]
+                pares += [(restantes_t[f], restantes_d[c])
+                          for f, c in _emparejar(distancia, distancia <= limite, mayor_es_mejor=False)]
+
+            for f, c in pares:
+                track = self.tracks[f]
+                track.xyxy = self.suavizado * detecciones[c] + (1 - self.suavizado) * track.xyxy
+                track.conf = float(conf[c])
+                track.golpes += 1
+                track.perdidos = 0
+                if track.golpes >= self.min_golpes:
+                    track.confirmado = True
+                sin_pareja.discard(f)
+                libres.discard(c)
+
+        for f in sin_pareja:
+            self.tracks[f].perdidos += 1
+
+        # Descartar tracks vencidos (y los no confirmados apenas se pierden)
+        vigentes = []
+        for track in self.tracks:
+            vencido = track.perdidos > self.max_perdidos or (not track.confirmado and track.perdidos > 0)
+            if not vencido:
+                vigentes.append(track)
+            elif track.confirmado and track.mesa is not None:
+                self.estancias.append((track.mesa, ahora - track.en_mesa_desde))
+        self.tracks = vigentes
+
+        for c in sorted(libres):
+            self.tracks.append(Track(self._siguiente_id, detecciones[c], float(conf[c])))
+            self._siguiente_id += 1
+            if self.min_golpes <= 1:
+                self.tracks[-1].confirmado = True
+
+        return [t for t in self.tracks if t.confirmado]
+
+    def registrar_mesas(self, tracks: List[Track], mesa_por_track: Dict[int, Optional[int]], ahora: float):
+        """Actualiza la mesa de cada track y cierra la estancia si cambió"""
+        for track in tracks:
+            mesa = mesa_por_track.get(track.id)
+            if mesa == track.mesa:
+                continue
+            if track.mesa is not None:
+                self.estancias.append((track.mesa, ahora - track.en_mesa_desde))
+            track.mesa = mesa
+            track.en_mesa_desde = ahora
+
+    def estancia_promedio(self) -> Dict[int, float]:
+        """Segundos promedio de estancia finalizada por mesa"""
+        por_mesa: Dict[int, List[float]] = {}
+        for mesa, segundos in self.estancias:
+            por_mesa.setdefault(mesa, []).append(segundos)
+        return {mesa: sum(v) / len(v) for mesa, v in por_mesa.items()}
+
+
+class PermanenciaMesas:
+    """Desde cuándo está ocupada cada mesa (con el conteo ya suavizado)"""
+
+    def __init__(self):
+        self.ocupada_desde: Dict[int, float] = {}
+
+    def actualizar(self, id_mesa: int, personas: int, ahora: float) -> Optional[float]:
+        """Segundos que la mesa lleva ocupada, o None si está libre"""
+        if personas <= 0:
+            self.ocupada_desde.pop(id_mesa, None)
+            return None
+        desde = self.ocupada_desde.setdefault(id_mesa, ahora)
+        return ahora - desde
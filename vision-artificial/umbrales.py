@@ -0,0 +1,81 @@
+"""
+Umbrales de detección ajustables en caliente.
+
+Los valores por defecto salen de config.py. El backend (o cualquier
+cliente MQTT) puede publicar cambios en restaurant/config/{device_id}
+(retenido, así el dispositivo los recibe también al reconectar):
+
+    {"confianza_personas": 0.4, "overlap_persona_mesa": 0.25}
+
+Solo se envían los campos que cambian. El mensaje se valida completo y
+se aplica todo o nada: Umbrales es inmutable y el sistema reemplaza la
+referencia en una sola asignación, así un frame nunca ve una mezcla de
+valores viejos y nuevos. No hace falta reiniciar ni recargar modelos.
+"""
+
+import json
+import math
+from dataclasses import dataclass, asdict, fields, replace
+
+from config import (
+    CONFIDENCE_PERSONAS,
+    CONFIDENCE_MESAS,
+    MIN_AREA_MESA,
+    MAX_AREA_MESA,
+    OVERLAP_PERSONA_MESA,
+)
+
+
+@dataclass(frozen=True)
+class Umbrales:
+    """Parámetros de detección y asignación vigentes"""
+    confianza_personas: float = CONFIDENCE_PERSONAS
+    confianza_mesas: float = CONFIDENCE_MESAS
+    min_area_mesa: int = MIN_AREA_MESA
+    max_area_mesa: int = MAX_AREA_MESA
+    overlap_persona_mesa: float = OVERLAP_PERSONA_MESA
+
+    def __post_init__(self):
+        for nombre in ("confianza_personas", "confianza_mesas"):
+            if not 0.0 < getattr(self, nombre) <= 1.0:
+                raise ValueError(f"{nombre} debe estar en (0, 1]")
+        if not 0.0 <= self.overlap_persona_mesa <= 1.0:
+            raise ValueError("overlap_persona_mesa debe estar en [0, 1]")
+        if self.min_area_mesa < 0 or self.min_area_mesa >= self.max_area_mesa:
+            raise ValueError("Se requiere 0 <= min_area_mesa < max_area_mesa")
+
+    def actualizar(self, cambios: dict) -> "Umbrales":
+        """
+        Nuevos umbrales con `cambios` aplicados (ValueError si hay campos
+        desconocidos, tipos inválidos o valores fuera de rango)
+        """
+        tipos = {campo.name: campo.type for campo in fields(self)}
+        desconocidos = set(cambios) - set(tipos)
+        if desconocidos:
+            raise ValueError(f"Campos desconocidos: {sorted(desconocidos)}")
+
+        convertidos = {}
+        for nombre, valor in cambios.items():
+            # bool es subclase de int: rechazarlo explícitamente
+            if isinstance(valor, bool) or not isinstance(valor, (int, float)) or not math.isfinite(valor):
+                raise ValueError(f"{nombre} debe ser numérico")
+            if tipos[nombre] is int:
+                if valor != int(valor):
+                    raise ValueError(f"{nombre} debe ser entero")
+                convertidos[nombre] = int(valor)
+            else:
+                convertidos[nombre] = float(valor)
+        return replace(self, **convertidos)
+
+    def desde_mensaje(self, payload: bytes) -> "Umbrales":
+        """Como actualizar, a partir del payload JSON de un mensaje MQTT"""
+        try:
+            cambios = json.loads(payload)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError(f"JSON inválido: {e}")
+        if not isinstance(cambios, dict):
+            raise ValueError("Se esperaba un objeto JSON")
+        return self.actualizar(cambios)
+
+    def a_dict(self) -> dict:
+        return asdict(self)
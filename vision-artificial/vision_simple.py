@@ -4,16 +4,23 @@ Sin autenticación y con configuración mínima
 """
 
 import cv2
-import requests
 import time
+from datetime import datetime
 from ultralytics import YOLO
 import logging
 
+from cola_offline import ColaOffline
+from captura import crear_lector
+from publicador_http import PublicadorHttp
+
 # Configuración simple
-IP_WEBCAM = "http://192.168.50.133:8080/video"
+IP_WEBCAM = "http://192.168.50.133:8080/video"  # o "bus:NOMBRE" (bus_frames.py)
 BACKEND_URL = "http://localhost:8000/api/v1/vision/actualizar-estado-mesas"
 MODELO_MESAS = "Entrenamiendo_mesas/weights/best.pt"
 INTERVALO = 5  # segundos
+RUTA_COLA = "cola_offline_simple.db"  # envíos fallidos pendientes
+MAX_COLA = 2000
+GZIP_HTTP = False  # comprimir el cuerpo (requiere el backend con DescomprimirGzip)
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger()
@@ -26,6 +33,9 @@ class SistemaSimple:
         self.model_mesas = YOLO(MODELO_MESAS)
         logger.info("Modelos cargados")
         self.ultimo_envio = 0
+        self.cola = ColaOffline(RUTA_COLA, MAX_COLA)
+        # Envío en segundo plano: el bucle de detección no espera a la red
+        self.publicador = PublicadorHttp(BACKEND_URL, self.cola, usar_gzip=GZIP_HTTP)
     
     def detectar(self, frame):
         """Detecta personas y mesas"""
@@ -79,26 +89,15 @@ class SistemaSimple:
         return frame
     
     def enviar_backend(self, detecciones):
-        """Envía al backend"""
-        try:
-            payload = {
-                "detecciones": [
-                    {"id_mesa": d["id_mesa"], "personas_detectadas": d["personas_detectadas"]}
-                    for d in detecciones
-                ]
-            }
-            
-            response = requests.post(BACKEND_URL, json=payload, timeout=3)
-            
-            if response.status_code == 200:
-                logger.info("✓ Enviado al backend")
-                return True
-            else:
-                logger.error(f"✗ Error: {response.status_code}")
-                return False
-        except Exception as e:
-            logger.error(f"✗ Error: {e}")
-            return False
+        """Deja el estado para el publicador HTTP (no bloquea)"""
+        payload = {
+            "timestamp": datetime.now().isoformat(),
+            "detecciones": [
+                {"id_mesa": d["id_mesa"], "personas_detectadas": d["personas_detectadas"]}
+                for d in detecciones
+            ]
+        }
+        self.publicador.publicar(payload)
     
     def debe_enviar(self):
         """Verifica si debe enviar al backend"""
@@ -111,18 +110,19 @@ class SistemaSimple:
     def ejecutar(self):
         """Bucle principal"""
         logger.info(f"Conectando a cámara: {IP_WEBCAM}")
-        cap = cv2.VideoCapture(IP_WEBCAM)
+        lector = crear_lector(IP_WEBCAM)
         
-        if not cap.isOpened():
+        if not lector.abrir():
             logger.error("No se pudo conectar a la cámara")
             return
         
         logger.info("✓ Conectado - Presiona 'q' para salir, 's' para envío manual")
+        self.publicador.start()
         
         try:
             while True:
-                ret, frame = cap.read()
-                if not ret:
+                frame = lector.leer()
+                if frame is None:
                     break
                 
                 # Detectar
@@ -154,8 +154,11 @@ class SistemaSimple:
                     self.enviar_backend(detecciones)
         
         finally:
-            cap.release()
+            lector.cerrar()
             cv2.destroyAllWindows()
+            self.publicador.cerrar()
+            logger.info(f"Publicador HTTP: {self.publicador.reporte()}")
+            self.cola.cerrar()
             logger.info("Sistema cerrado")
 
 
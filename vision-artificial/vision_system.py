@@ -9,51 +9,143 @@ Autor: Sistema de Reservaciones
 Fecha: 2025
 """
 
+import argparse
 import cv2
+import os
 import time
 import json
+import threading
 import numpy as np
 import paho.mqtt.client as mqtt
-from ultralytics import YOLO
 from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 import logging
 
 # Importar configuración
 from config import (
     IP_WEBCAM,
+    USAR_WEBCAM_LOCAL,
+    WEBCAM_INDEX,
+    BACKEND_CAPTURA,
+    ESCALA_DECODIFICACION,
+    RESOLUCION_CAMARA,
+    RECONEXION_ESPERA_INICIAL,
+    RECONEXION_ESPERA_MAXIMA,
     BROKER_HOST,
     BROKER_PORT,
     BROKER_KEEPALIVE,
     TOPIC_OCUPACION,
+    TOPIC_OCUPACION_LOTE,
     TOPIC_DISPOSITIVOS,
+    TOPIC_TELEMETRIA,
+    TOPIC_CONFIG,
+    INTERVALO_TELEMETRIA,
     DEVICE_ID,
     INTERVALO_ACTUALIZACION,
-    RUTA_MODELO_MESAS
+    ENVIAR_SOLO_CAMBIOS,
+    DEBOUNCE_CAMBIOS,
+    INTERVALO_HEARTBEAT,
+    RUTA_COLA_OFFLINE,
+    MAX_COLA_OFFLINE,
+    LOTE_REENVIO,
+    RUTA_MODELO_MESAS,
+    MODELO_PERSONAS,
+    MOTOR_OCUPACION,
+    MODELO_CLASIFICADOR_MESAS,
+    TAMANO_RECORTE_MESA,
+    MARGEN_RECORTE_MESA,
+    BACKEND_INFERENCIA,
+    ONNX_INT8,
+    ONNX_HILOS,
+    INTERVALO_DETECCION_MESAS,
+    UMBRAL_CAMBIO_ESCENA,
+    IMGSZ_PERSONAS,
+    USAR_ROI_PERSONAS,
+    USAR_COMPUERTA_MOVIMIENTO,
+    MOVIMIENTO_FRACCION_MINIMA,
+    MOVIMIENTO_UMBRAL_PIXEL,
+    MAX_SEGUNDOS_SIN_INFERENCIA,
+    USAR_TRACKING,
+    TRACKING_IOU_MINIMO,
+    TRACKING_MAX_PERDIDOS,
+    TRACKING_MIN_GOLPES,
+    MARGEN_ROI,
+    SEPARACION_MINIMA_ROI,
+    FRACCION_MAXIMA_ROI,
+    MOSTRAR_STATS_CADA,
+    RUTA_LAYOUT_MESAS,
+    USAR_PIPELINE,
+    TAMANO_COLA_PIPELINE,
+    MOSTRAR_VENTANA,
+    PREVIEW_PUERTO,
+    PREVIEW_FPS,
+    LOG_LEVEL
 )
+from metricas import MedidorEtapas
+from backends import cargar_detector, Detecciones
+from geometria import matriz_asignacion, solapamientos_sospechosos
+from pipeline import PipelineVision
+from captura import CapturaUltimoFrame, crear_lector, reconectar, es_archivo
+from preview import ServidorPreview
+from publicacion import PoliticaPublicacion, TIPO_COMPLETO
+from cola_offline import ColaOffline, comprimir
+from tracking import RastreadorPersonas, PermanenciaMesas
+from movimiento import CompuertaMovimiento
+from telemetria import muestra_sistema
+from clasificador_mesas import ClasificadorMesas, MOTORES_OCUPACION
+from umbrales import Umbrales
+from roi import regiones_interes, fraccion_cubierta, recortar, a_coordenadas_frame
+from calibracion import agrupar_cajas, guardar_layout, cargar_layout, escalar_caja
 
 # Parámetros de actualización
 INTERVALO_ACTUALIZACION = INTERVALO_ACTUALIZACION if 'INTERVALO_ACTUALIZACION' in dir() else 5
 
-# Parámetros de detección - PERSONAS
-CONFIDENCE_PERSONAS = 0.35     # Umbral más bajo para detectar más personas
+# Parámetros de detección - PERSONAS (la confianza y el solapamiento con
+# las mesas, junto con los filtros de mesas, están en self.umbrales)
 IOU_THRESHOLD_PERSONAS = 0.45  # Threshold de NMS - reduce fusión de personas
 MAX_DETECTIONS = 50            # Máximo de personas a detectar
 
-# Parámetros de detección - MESAS
-CONFIDENCE_MESAS = 0.75        # Umbral MÁS ALTO = menos falsos positivos (paredes, techos, caras)
-MIN_AREA_MESA = 15000          # Área mínima en píxeles (ej: 122x122) - filtra objetos pequeños
-MAX_AREA_MESA = 150000         # Área máxima (ej: 387x387) - rechaza detecciones que cubren >50% imagen
+# Detección de cambio de escena (para re-detectar mesas antes de tiempo)
+TAMANO_MINIATURA_ESCENA = (64, 36)  # (ancho, alto) de la miniatura comparada
+DIFERENCIA_PIXEL_ESCENA = 25        # Diferencia de gris para considerar un píxel cambiado
 
 # Configurar logging
 logging.basicConfig(
-    level=logging.DEBUG,  # DEBUG para ver detalles de detección
+    level=getattr(logging, LOG_LEVEL, logging.INFO),  # DEBUG para ver detalles de detección
     format='%(asctime)s - %(levelname)s - %(message)s',
     datefmt='%H:%M:%S'
 )
 logger = logging.getLogger(__name__)
 
+# Referencia para los tiempos de arranque (modelos, MQTT, cámara, primera
+# publicación): se toma al importar el módulo, casi al inicio del proceso
+INICIO_PROCESO = time.perf_counter()
+
+
+def cargar_modelo(ruta_pt: str):
+    """Carga un detector con el backend configurado (ver backends.py)"""
+    return cargar_detector(ruta_pt, BACKEND_INFERENCIA, ONNX_INT8, ONNX_HILOS)
+
+
+def cargar_clasificador(ruta: str = MODELO_CLASIFICADOR_MESAS) -> ClasificadorMesas:
+    """Clasificador de conteo por mesa del motor "recortes" (ver clasificador_mesas.py)"""
+    return ClasificadorMesas(ruta, TAMANO_RECORTE_MESA, ONNX_HILOS)
+
+
+def abrir_camara(fuente):
+    """
+    Crea y abre el lector de video con el backend de config.py. Pensado
+    para correr en paralelo con la carga de modelos.
+
+    Returns:
+        (lector abierto o None, segundos desde INICIO_PROCESO)
+    """
+    lector = crear_lector(fuente, BACKEND_CAPTURA, ESCALA_DECODIFICACION, RESOLUCION_CAMARA)
+    abierto = lector.abrir()
+    return (lector if abierto else None), time.perf_counter() - INICIO_PROCESO
+
 
 # CLASES DE DATOS 
 
@@ -66,6 +158,7 @@ class BoundingBox:
     y2: int
     confidence: float
     label: str
+    id_mesa: Optional[int] = None  # ID estable (solo mesas del layout calibrado)
     
     @property
     def center(self) -> Tuple[int, int]:
@@ -96,6 +189,44 @@ class BoundingBox:
         return x_overlap * y_overlap
 
 
+class CajasDetectadas:
+    """
+    Conjunto de cajas de una detección guardado como arrays NumPy.
+
+    xyxy (N, 4) y conf (N,) vienen directo del detector (backends.py). Los
+    BoundingBox individuales solo se construyen cuando se piden (para
+    dibujar o para DeteccionMesa.personas_bbox).
+    """
+
+    def __init__(self, xyxy: np.ndarray, conf: np.ndarray, label: str):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.label = label
+
+    @classmethod
+    def desde_resultado(cls, result: Detecciones, label: str) -> 'CajasDetectadas':
+        return cls(result.xyxy.astype(np.int32), result.conf, label)
+
+    @classmethod
+    def desde_lista(cls, cajas: List[BoundingBox], label: str = "") -> 'CajasDetectadas':
+        if isinstance(cajas, CajasDetectadas):
+            return cajas
+        xyxy = np.array([[c.x1, c.y1, c.x2, c.y2] for c in cajas], dtype=np.int32).reshape(-1, 4)
+        conf = np.array([c.confidence for c in cajas], dtype=np.float32)
+        return cls(xyxy, conf, label)
+
+    def __len__(self) -> int:
+        return len(self.xyxy)
+
+    def __getitem__(self, i: int) -> BoundingBox:
+        x1, y1, x2, y2 = (int(v) for v in self.xyxy[i])
+        return BoundingBox(x1=x1, y1=y1, x2=x2, y2=y2,
+                           confidence=float(self.conf[i]), label=self.label)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
 @dataclass
 class DeteccionMesa:
     """Representa una mesa detectada con personas"""
@@ -103,6 +234,8 @@ class DeteccionMesa:
     bbox: BoundingBox
     personas_detectadas: int
     personas_bbox: List[BoundingBox]
+    ids_personas: List[int] = field(default_factory=list)  # IDs de tracking
+    permanencia_segundos: Optional[float] = None           # tiempo ocupada
     
     def __repr__(self):
         return f"Mesa {self.id_mesa}: {self.personas_detectadas} personas"
@@ -126,7 +259,17 @@ class SistemaVisionMesas:
                  broker_host: str = BROKER_HOST,
                  broker_port: int = BROKER_PORT,
                  modelo_mesas_path: str = RUTA_MODELO_MESAS,
-                 intervalo_actualizacion: int = INTERVALO_ACTUALIZACION):
+                 intervalo_actualizacion: int = INTERVALO_ACTUALIZACION,
+                 conectar_mqtt: bool = True,
+                 usar_layout: bool = True,
+                 device_id: str = DEVICE_ID,
+                 ruta_layout: str = RUTA_LAYOUT_MESAS,
+                 model_personas=None,
+                 model_mesas=None,
+                 mostrar_ventana: bool = MOSTRAR_VENTANA,
+                 motor_ocupacion: str = MOTOR_OCUPACION,
+                 clasificador=None,
+                 cargar_personas: bool = True):
         """
         Inicializa el sistema de visión.
 
@@ -136,44 +279,166 @@ class SistemaVisionMesas:
             broker_port: Puerto del broker MQTT
             modelo_mesas_path: Ruta al modelo YOLO de mesas
             intervalo_actualizacion: Segundos entre envíos al broker
+            conectar_mqtt: Si False, no se conecta al broker (calibración, pruebas)
+            usar_layout: Si True y existe `ruta_layout`, usa el layout
+                calibrado y no carga el modelo de mesas
+            device_id: ID del dispositivo en los topics MQTT
+            ruta_layout: Archivo de layout calibrado de esta cámara
+            model_personas: Modelo de personas ya cargado (compartido entre
+                cámaras); si es None se carga MODELO_PERSONAS
+            model_mesas: Modelo de mesas ya cargado (compartido entre cámaras)
+            mostrar_ventana: Si False (headless) no se dibuja ni se muestra
+                ningún frame; ver también PREVIEW_PUERTO
+            motor_ocupacion: "deteccion" (personas + cruce con mesas) o
+                "recortes" (clasificador por mesa, ver clasificador_mesas.py)
+            clasificador: ClasificadorMesas ya cargado (compartido entre cámaras)
+            cargar_personas: Si False no se carga el modelo de personas
+                (calibración: solo se detectan mesas)
         """
         logger.info("Inicializando Sistema de Visión de Mesas...")
+        if motor_ocupacion not in MOTORES_OCUPACION:
+            raise ValueError(f"Motor de ocupación desconocido: {motor_ocupacion} (usar {MOTORES_OCUPACION})")
 
         self.ip_webcam = ip_webcam
         self.broker_host = broker_host
         self.broker_port = broker_port
         self.intervalo_actualizacion = intervalo_actualizacion
-        self.device_id = DEVICE_ID
+        self.device_id = device_id
+        self.modelo_mesas_path = modelo_mesas_path
+        self.mostrar_ventana = mostrar_ventana
+        # Divisor de tamaño de los frames que entrega el lector (ver _adoptar_lector)
+        self.escala_frames = 1
+        self.motor_ocupacion = motor_ocupacion
+        self.preview: Optional[ServidorPreview] = None
+
+        # Arranque: "online" se anuncia recién cuando el modelo está caliente
+        self.listo = False
+        self.hitos_arranque: Dict[str, float] = {}
+        self.primera_publicacion: Optional[float] = None
+
+        # Política de publicación (la usa on_mqtt_connect: crear antes de conectar)
+        self.politica = PoliticaPublicacion(
+            solo_cambios=ENVIAR_SOLO_CAMBIOS,
+            intervalo=intervalo_actualizacion,
+            debounce=DEBOUNCE_CAMBIOS,
+            heartbeat=INTERVALO_HEARTBEAT
+        )
 
         # Configurar cliente MQTT
         logger.info(f"Conectando a broker MQTT en {broker_host}:{broker_port}...")
         self.mqtt_client = mqtt.Client(
             mqtt.CallbackAPIVersion.VERSION2,
-            client_id=DEVICE_ID
+            client_id=self.device_id
         )
         self.mqtt_client.on_connect = self.on_mqtt_connect
         self.mqtt_client.on_disconnect = self.on_mqtt_disconnect
         self.mqtt_connected = False
 
-        try:
-            self.mqtt_client.connect(broker_host, broker_port, BROKER_KEEPALIVE)
-            self.mqtt_client.loop_start()
-        except Exception as e:
-            logger.error(f"Error conectando al broker MQTT: {e}")
-            logger.warning("Continuando sin conexión MQTT...")
-
-        # Cargar modelos YOLO
-        logger.info("Cargando modelo YOLO para personas...")
-        self.model_personas = YOLO('yolov8n.pt')
+        # Umbrales de detección: se reemplazan enteros (nunca se modifican)
+        # cuando llega una configuración nueva por MQTT
+        self.umbrales = Umbrales()
+        self.topic_config = f"{TOPIC_CONFIG}/{self.device_id}"
+        self.mqtt_client.message_callback_add(self.topic_config, self.on_mqtt_config)
+
+        # Cola en disco para los mensajes que no se pudieron publicar
+        self.cola_offline: Optional[ColaOffline] = None
+        if conectar_mqtt and RUTA_COLA_OFFLINE:
+            self.cola_offline = ColaOffline(
+                RUTA_COLA_OFFLINE.format(device_id=self.device_id),
+                MAX_COLA_OFFLINE
+            )
 
-        logger.info("Cargando modelo YOLO para mesas...")
-        self.model_mesas = YOLO(modelo_mesas_path)
+        # connect_async: la conexión avanza en el thread de paho mientras se
+        # cargan los modelos (y se reintenta sola si el broker no responde)
+        if conectar_mqtt:
+            try:
+                self.mqtt_client.connect_async(broker_host, broker_port, BROKER_KEEPALIVE)
+                self.mqtt_client.loop_start()
+            except Exception as e:
+                logger.error(f"Error conectando al broker MQTT: {e}")
+                logger.warning("Continuando sin conexión MQTT...")
+
+        # Layout calibrado de mesas (reemplaza al modelo de mesas)
+        self.layout_mesas = None
+        self.resolucion_layout = None
+        if usar_layout and os.path.exists(ruta_layout):
+            self.layout_mesas, self.resolucion_layout = cargar_layout(ruta_layout)
+            logger.info(f"Layout de mesas cargado: {len(self.layout_mesas)} mesas ({ruta_layout})")
+
+        # Cargar modelos (o usar los compartidos), todos a la vez. El motor
+        # "recortes" no usa el modelo de personas sino el clasificador
+        usa_recortes = motor_ocupacion == "recortes"
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="carga-modelo") as ejecutor:
+            futuro_personas = futuro_mesas = futuro_clasificador = None
+            if usa_recortes and clasificador is None:
+                logger.info("Cargando clasificador de mesas...")
+                futuro_clasificador = ejecutor.submit(cargar_clasificador)
+            if not usa_recortes and model_personas is None and cargar_personas:
+                logger.info("Cargando modelo YOLO para personas...")
+                futuro_personas = ejecutor.submit(cargar_modelo, MODELO_PERSONAS)
+            if self.layout_mesas is None and model_mesas is None:
+                logger.info("Cargando modelo YOLO para mesas...")
+                futuro_mesas = ejecutor.submit(cargar_modelo, modelo_mesas_path)
+
+            self.model_personas = futuro_personas.result() if futuro_personas else model_personas
+            self.clasificador = None
+            if usa_recortes:
+                self.clasificador = futuro_clasificador.result() if futuro_clasificador else clasificador
+            self.model_mesas = None
+            if self.layout_mesas is None:
+                self.model_mesas = futuro_mesas.result() if futuro_mesas else model_mesas
+        if futuro_personas is not None:
+            logger.info(f"  Backend: {self.model_personas.nombre}")
+        if usa_recortes:
+            logger.info(f"  Motor de ocupación: {self.clasificador.nombre}")
+            if self.layout_mesas is None:
+                logger.warning("  Motor por recortes sin layout calibrado: las mesas se detectan "
+                               "con el modelo y sus recortes pueden moverse entre frames")
+        self._hito("modelos")
 
         # Variables de control
-        self.ultimo_envio = 0
         self.mesas_registradas: Dict[int, DeteccionMesa] = {}
         self.contador_frames = 0
 
+        # Caché de mesas (se re-detectan cada INTERVALO_DETECCION_MESAS frames)
+        self.mesas_cache: Optional[List[BoundingBox]] = None
+        self._forma_mesas_cache = None  # (alto, ancho) del frame del layout escalado
+        self._redetectar_mesas = False  # lo pide on_mqtt_config (otro thread)
+        self.frame_ultima_deteccion_mesas = 0
+        self.miniatura_referencia: Optional[np.ndarray] = None
+        self.detecciones_mesas_ejecutadas = 0
+
+        # Seguimiento de personas entre frames
+        self.rastreador: Optional[RastreadorPersonas] = None
+        self.permanencia = PermanenciaMesas()
+        if USAR_TRACKING:
+            self.rastreador = RastreadorPersonas(
+                iou_minimo=TRACKING_IOU_MINIMO,
+                max_perdidos=TRACKING_MAX_PERDIDOS,
+                min_golpes=TRACKING_MIN_GOLPES
+            )
+
+        # Compuerta de movimiento: reutilizar el último resultado si la
+        # escena no cambió alrededor de las mesas
+        self.compuerta: Optional[CompuertaMovimiento] = None
+        if USAR_COMPUERTA_MOVIMIENTO:
+            self.compuerta = CompuertaMovimiento(
+                umbral_pixel=MOVIMIENTO_UMBRAL_PIXEL,
+                fraccion_minima=MOVIMIENTO_FRACCION_MINIMA,
+                max_segundos=MAX_SEGUNDOS_SIN_INFERENCIA,
+                margen=MARGEN_ROI
+            )
+        self.ultimas_detecciones: Optional[List[DeteccionMesa]] = None
+        self.frames_sin_inferencia = 0
+
+        # Tiempos por etapa
+        self.medidor = MedidorEtapas()
+
+        # Telemetría: funciones que aportan métricas extra (colas y descartes
+        # del pipeline, reconexiones de la captura)
+        self.fuentes_telemetria: List = []
+        self.ultima_telemetria = 0.0
+
         # Estadísticas
         self.total_envios = 0
         self.envios_exitosos = 0
@@ -186,18 +451,86 @@ class SistemaVisionMesas:
         if rc == 0:
             self.mqtt_connected = True
             logger.info("✓ Conectado al broker MQTT")
+            self._hito("mqtt")
 
-            # Publicar estado del dispositivo
-            client.publish(
-                f"{TOPIC_DISPOSITIVOS}/{self.device_id}/estado",
-                "online",
-                qos=1,
-                retain=True
-            )
+            # Forzar un envío completo en el próximo frame: resincroniza al
+            # backend y vacía la cola offline sin esperar al heartbeat
+            self.politica.ultimo_completo = 0
+
+            # Publicar estado del dispositivo y recibir los umbrales (si el
+            # modelo ya está caliente; si no, lo hace marcar_listo())
+            if self.listo:
+                self._publicar_online()
         else:
             self.mqtt_connected = False
             logger.error(f"Error conectando al broker MQTT. Código: {rc}")
 
+    def on_mqtt_config(self, client, userdata, message):
+        """Nuevos umbrales de detección: se validan y se aplican todos juntos"""
+        try:
+            nuevos = self.umbrales.desde_mensaje(message.payload)
+        except ValueError as e:
+            logger.error(f"Configuración rechazada ({message.topic}): {e}")
+            return
+
+        if nuevos == self.umbrales:
+            return
+        anteriores, self.umbrales = self.umbrales, nuevos
+        cambios = {k: v for k, v in nuevos.a_dict().items() if anteriores.a_dict()[k] != v}
+        logger.info(f"✓ Umbrales actualizados: {cambios}")
+
+        # Que el próximo frame ya use los umbrales nuevos: re-detectar mesas
+        # y no reutilizar el último resultado aunque la escena esté quieta.
+        # Este es el thread de paho: la caché la invalida obtener_mesas
+        self._redetectar_mesas = True
+        if self.compuerta is not None:
+            self.compuerta.forzar_inferencia()
+
+    def _publicar_online(self):
+        # Umbrales en caliente: el retenido llega apenas se suscribe
+        self.mqtt_client.subscribe(self.topic_config, qos=1)
+        self.mqtt_client.publish(
+            f"{TOPIC_DISPOSITIVOS}/{self.device_id}/estado",
+            "online",
+            qos=1,
+            retain=True
+        )
+
+    def _hito(self, nombre: str):
+        """Registra el primer momento (desde INICIO_PROCESO) en que se alcanzó un hito del arranque"""
+        self.hitos_arranque.setdefault(nombre, time.perf_counter() - INICIO_PROCESO)
+
+    def calentar(self):
+        """
+        Corre una inferencia sobre un frame negro para pagar antes de tiempo
+        la inicialización perezosa de los modelos (primera llamada mucho
+        más lenta), y después anuncia el dispositivo como online.
+        """
+        ancho, alto = self.resolucion_layout or (640, 360)
+        frame = np.zeros((alto, ancho, 3), dtype=np.uint8)
+        inicio = time.perf_counter()
+        if self.model_personas is not None:
+            self.detectar_personas(frame)
+        if self.clasificador is not None:
+            self.clasificador.contar_frame(frame, np.array([[0, 0, ancho, alto]]), MARGEN_RECORTE_MESA)
+        if self.model_mesas is not None:
+            self.model_mesas.detectar([frame], conf=self.umbrales.confianza_mesas)
+        logger.info(f"✓ Modelos calentados en {time.perf_counter() - inicio:.1f}s")
+        self.marcar_listo()
+
+    def marcar_listo(self):
+        """El sistema puede procesar frames: publicar "online" si hay conexión"""
+        self.listo = True
+        self._hito("calentamiento")
+        if self.mqtt_connected:
+            self._publicar_online()
+
+    def _registrar_primera_publicacion(self):
+        self.primera_publicacion = time.perf_counter() - INICIO_PROCESO
+        hitos = " | ".join(f"{nombre} {segundos:.1f}s" for nombre, segundos in
+                           sorted(self.hitos_arranque.items(), key=lambda h: h[1]))
+        logger.info(f"⏱  Primera publicación a los {self.primera_publicacion:.1f}s del arranque ({hitos})")
+
     def on_mqtt_disconnect(self, client, userdata, rc, properties=None):
         """Callback cuando se desconecta del broker MQTT"""
         self.mqtt_connected = False
@@ -206,7 +539,7 @@ class SistemaVisionMesas:
     
     # ==================== DETECCIÓN ====================
     
-    def detectar_personas(self, frame: np.ndarray) -> List[BoundingBox]:
+    def detectar_personas(self, frame: np.ndarray) -> CajasDetectadas:
         """
         Detecta personas en el frame con parámetros optimizados.
 
@@ -214,68 +547,99 @@ class SistemaVisionMesas:
             frame: Frame de video (numpy array)
 
         Returns:
-            Lista de BoundingBox con personas detectadas
+            CajasDetectadas con las personas (iterable como BoundingBox)
+        """
+        return self.detectar_personas_lote([frame])[0]
+
+    def detectar_personas_lote(self, frames: List[np.ndarray]) -> List[CajasDetectadas]:
+        """
+        Detecta personas en varios frames con una sola llamada al modelo
+        (un batch). Usado por el modo multicámara.
+
+        Returns:
+            Una CajasDetectadas por frame, en el mismo orden
         """
         # Ejecutar modelo YOLO con parámetros optimizados
-        results = self.model_personas(
-            frame,
-            classes=[0],          # Solo clase 'person' (0 en COCO)
-            conf=CONFIDENCE_PERSONAS,  # Umbral más bajo = detecta más personas
+        results = self.model_personas.detectar(
+            frames,
+            clases=[0],           # Solo clase 'person' (0 en COCO)
+            conf=self.umbrales.confianza_personas,  # Umbral más bajo = detecta más personas
             iou=IOU_THRESHOLD_PERSONAS,  # NMS menos agresivo = no fusiona personas cercanas
             max_det=MAX_DETECTIONS,      # Máximo de detecciones por frame
-            verbose=False
+            imgsz=IMGSZ_PERSONAS
         )
 
-        personas = []
-        for box in results[0].boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            conf = float(box.conf[0])
+        lote = []
+        for result in results:
+            personas = CajasDetectadas.desde_resultado(result, "Persona")
 
-            personas.append(BoundingBox(
-                x1=x1, y1=y1, x2=x2, y2=y2,
-                confidence=conf,
-                label="Persona"
-            ))
+            # Logging de debug: detectar solapamientos sospechosos
+            if logger.isEnabledFor(logging.DEBUG):
+                for i, j, fraccion in solapamientos_sospechosos(personas.xyxy, 0.30):
+                    logger.debug(f"⚠️  Solapamiento detectado: {fraccion * 100:.1f}% "
+                                 f"(conf: {personas.conf[i]:.2f}, {personas.conf[j]:.2f})")
+
+            lote.append(personas)
 
-        # Logging de debug: detectar solapamientos sospechosos
-        if len(personas) > 1:
-            for i, p1 in enumerate(personas):
-                for p2 in personas[i+1:]:
-                    if p1.overlaps_with(p2):
-                        overlap_area = p1.overlap_area(p2)
-                        overlap_pct = (overlap_area / min(p1.area, p2.area)) * 100
-                        if overlap_pct > 30:
-                            logger.debug(f"⚠️  Solapamiento detectado: {overlap_pct:.1f}% "
-                                       f"(conf: {p1.confidence:.2f}, {p2.confidence:.2f})")
-
-        return personas
+        return lote
     
+    def detectar_personas_roi(self, frame: np.ndarray,
+                              mesas: List[BoundingBox]) -> CajasDetectadas:
+        """
+        Detecta personas solo en los recortes alrededor de las mesas y
+        devuelve las cajas en coordenadas del frame.
+
+        Usa el frame completo si no hay mesas, si los recortes cubren más
+        de FRACCION_MAXIMA_ROI del frame o si el modelo tiene entrada fija
+        (cada recorte costaría una inferencia completa).
+        """
+        if self.model_personas.entrada_fija:
+            return self.detectar_personas(frame)
+
+        alto, ancho = frame.shape[:2]
+        mesas_xyxy = CajasDetectadas.desde_lista(mesas).xyxy
+        regiones = regiones_interes(mesas_xyxy, ancho, alto, MARGEN_ROI,
+                                    int(SEPARACION_MINIMA_ROI * alto))
+
+        if len(regiones) == 0 or fraccion_cubierta(regiones, ancho, alto) > FRACCION_MAXIMA_ROI:
+            return self.detectar_personas(frame)
+
+        por_recorte = self.detectar_personas_lote(recortar(frame, regiones))
+        xyxy = np.concatenate(
+            [a_coordenadas_frame(p.xyxy, r) for p, r in zip(por_recorte, regiones)]
+        ).reshape(-1, 4)
+        conf = np.concatenate([p.conf for p in por_recorte])
+        return CajasDetectadas(xyxy, conf, "Persona")
+
     def detectar_mesas(self, frame: np.ndarray) -> List[BoundingBox]:
         """
         Detecta mesas con filtros anti-falsos positivos:
-        - Umbral de confianza alto (0.7)
+        - Umbral de confianza alto (0.75)
         - Filtro por tamaño (área mínima/máxima)
         """
-        results = self.model_mesas(
-            frame,
-            conf=CONFIDENCE_MESAS,  # Umbral MÁS ALTO = menos falsos positivos
-            verbose=False
-        )
+        umbrales = self.umbrales  # los mismos valores para todo el frame
+        # Áreas en píxeles del frame completo; el frame puede venir reducido
+        divisor = self.escala_frames ** 2
+        min_area, max_area = umbrales.min_area_mesa / divisor, umbrales.max_area_mesa / divisor
+        resultado = self.model_mesas.detectar(
+            [frame],
+            conf=umbrales.confianza_mesas  # Umbral MÁS ALTO = menos falsos positivos
+        )[0]
 
         mesas_detectadas = []
 
         # 1. Recolectar detecciones que cumplen los criterios de filtrado
-        for box in results[0].boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            conf = float(box.conf[0])
+        for caja, confianza in zip(resultado.xyxy, resultado.conf):
+            x1, y1, x2, y2 = map(int, caja)
+            conf = float(confianza)
             area = (x2 - x1) * (y2 - y1)
 
             # FILTRO 1: Área válida (no muy pequeña, no muy grande)
-            if area < MIN_AREA_MESA:
+            if area < min_area:
                 logger.debug(f"⛔ Mesa rechazada: área muy pequeña ({area} px²)")
                 continue
 
-            if area > MAX_AREA_MESA:
+            if area > max_area:
                 logger.debug(f"⛔ Mesa rechazada: área muy grande ({area} px²)")
                 continue
 
@@ -298,49 +662,153 @@ class SistemaVisionMesas:
 
         return mesas_detectadas
     
+    def _miniatura_escena(self, frame: np.ndarray) -> np.ndarray:
+        """Miniatura en escala de grises para comparar escenas de forma barata"""
+        gris = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gris, TAMANO_MINIATURA_ESCENA, interpolation=cv2.INTER_AREA)
+
+    def _escena_cambio(self, miniatura: np.ndarray) -> bool:
+        """Verifica si la escena cambió respecto a la última detección de mesas"""
+        if UMBRAL_CAMBIO_ESCENA <= 0 or self.miniatura_referencia is None:
+            return False
+
+        diferencia = cv2.absdiff(miniatura, self.miniatura_referencia)
+        fraccion = np.count_nonzero(diferencia > DIFERENCIA_PIXEL_ESCENA) / diferencia.size
+        return fraccion >= UMBRAL_CAMBIO_ESCENA
+
+    def obtener_mesas(self, frame: np.ndarray) -> List[BoundingBox]:
+        """
+        Retorna las mesas del frame reutilizando la caché.
+
+        Con layout calibrado no se ejecuta ningún modelo. Sin layout, el
+        modelo de mesas solo se ejecuta en el primer frame, cada
+        INTERVALO_DETECCION_MESAS frames o cuando cambia la escena.
+        """
+        if self.layout_mesas is not None:
+            # Se recalcula si cambia la resolución (reconexión, otro tamaño en el bus)
+            forma = frame.shape[:2]
+            mesas = self.mesas_cache
+            if mesas is None or forma != self._forma_mesas_cache:
+                mesas = self._mesas_desde_layout(frame)
+                self.mesas_cache, self._forma_mesas_cache = mesas, forma
+            return mesas
+
+        frames_desde_deteccion = self.contador_frames - self.frame_ultima_deteccion_mesas
+        miniatura = self._miniatura_escena(frame) if UMBRAL_CAMBIO_ESCENA > 0 else None
+
+        mesas = self.mesas_cache
+        if (mesas is None
+                or self._redetectar_mesas
+                or frames_desde_deteccion >= INTERVALO_DETECCION_MESAS
+                or (miniatura is not None and self._escena_cambio(miniatura))):
+            self._redetectar_mesas = False
+            with self.medidor.medir("mesas"):
+                mesas = self.detectar_mesas(frame)
+            self.mesas_cache = mesas
+            self.frame_ultima_deteccion_mesas = self.contador_frames
+            self.miniatura_referencia = miniatura
+            self.detecciones_mesas_ejecutadas += 1
+
+        return mesas
+
+    def _mesas_desde_layout(self, frame: np.ndarray) -> List[BoundingBox]:
+        """Convierte el layout calibrado en BoundingBox a la resolución del frame"""
+        alto, ancho = frame.shape[:2]
+        mesas = []
+        for id_mesa, caja in self.layout_mesas:
+            if tuple(self.resolucion_layout) != (ancho, alto):
+                caja = escalar_caja(caja, self.resolucion_layout, (ancho, alto))
+            x1, y1, x2, y2 = caja
+            mesas.append(BoundingBox(
+                x1=x1, y1=y1, x2=x2, y2=y2,
+                confidence=1.0,
+                label=f"Mesa {id_mesa}",
+                id_mesa=id_mesa
+            ))
+        return mesas
+
+    def calibrar_layout(self, frames_calentamiento: int, ruta_salida: str = RUTA_LAYOUT_MESAS) -> int:
+        """
+        Detecta mesas durante `frames_calentamiento` frames, agrupa las cajas
+        y guarda el layout con IDs estables.
+
+        Returns:
+            Cantidad de mesas guardadas en el layout
+        """
+        if self.model_mesas is None:
+            self.model_mesas = cargar_modelo(self.modelo_mesas_path)
+
+        logger.info(f"Calibrando layout de mesas con {frames_calentamiento} frames...")
+        # El mismo lector que en ejecución: la resolución guardada en el
+        # layout es la de los frames que va a procesar el sistema
+        lector = self.crear_lector(self.ip_webcam)
+        self._adoptar_lector(lector)
+        if not lector.abrir():
+            logger.error(" No se pudo conectar a la cámara")
+            return 0
+
+        cajas_por_frame = []
+        resolucion = None
+        try:
+            while len(cajas_por_frame) < frames_calentamiento:
+                frame = lector.leer()
+                if frame is None:
+                    logger.warning("La fuente terminó antes de completar el calentamiento")
+                    break
+                resolucion = (frame.shape[1], frame.shape[0])
+                mesas = self.detectar_mesas(frame)
+                cajas_por_frame.append([(m.x1, m.y1, m.x2, m.y2) for m in mesas])
+        finally:
+            lector.cerrar()
+
+        if not cajas_por_frame:
+            logger.error("No se leyó ningún frame, no se generó el layout")
+            return 0
+
+        mesas = agrupar_cajas(cajas_por_frame)
+        guardar_layout(ruta_salida, mesas, resolucion, self.device_id)
+
+        logger.info(f"✓ Layout guardado en {ruta_salida}: {len(mesas)} mesas "
+                    f"({len(cajas_por_frame)} frames analizados)")
+        for idx, caja in enumerate(mesas):
+            logger.info(f"   Mesa {idx + 1}: {caja}")
+        return len(mesas)
+
     # ==================== CRUCE DE DETECCIONES ====================
     
     def asignar_personas_a_mesas(self, 
                                  mesas: List[BoundingBox], 
-                                 personas: List[BoundingBox]) -> List[DeteccionMesa]:
+                                 personas: 'CajasDetectadas | List[BoundingBox]',
+                                 ids: Optional[np.ndarray] = None) -> List[DeteccionMesa]:
         """
         Determina qué personas están en qué mesas.
         
-        Usa dos métodos:
+        Usa dos métodos (calculados para todos los pares a la vez con NumPy):
         1. Verifica si el centro de la persona está dentro de la mesa
         2. Verifica el porcentaje de solapamiento entre bounding boxes
         
         Args:
             mesas: Lista de bounding boxes de mesas
-            personas: Lista de bounding boxes de personas
+            personas: Personas detectadas (CajasDetectadas o lista de BoundingBox)
+            ids: IDs de tracking de cada persona (opcional)
         
         Returns:
             Lista de DeteccionMesa con personas asignadas
         """
+        personas = CajasDetectadas.desde_lista(personas, "Persona")
+        mesas_xyxy = np.array([[m.x1, m.y1, m.x2, m.y2] for m in mesas], dtype=np.int32).reshape(-1, 4)
+
+        asignadas = matriz_asignacion(mesas_xyxy, personas.xyxy, self.umbrales.overlap_persona_mesa)
+
         detecciones = []
-        
         for idx, mesa in enumerate(mesas):
-            personas_en_mesa = []
-            
-            for persona in personas:
-                # Método 1: Centro de persona dentro de mesa
-                px, py = persona.center
-                esta_dentro = mesa.contains_point(px, py)
-                
-                # Método 2: Solapamiento significativo (>30% del área de la persona)
-                if not esta_dentro:
-                    overlap = mesa.overlap_area(persona)
-                    porcentaje_overlap = (overlap / persona.area) * 100
-                    esta_dentro = porcentaje_overlap > 30
-                
-                if esta_dentro:
-                    personas_en_mesa.append(persona)
-            
+            indices = np.flatnonzero(asignadas[idx])
             detecciones.append(DeteccionMesa(
-                id_mesa=idx + 1,
+                id_mesa=mesa.id_mesa if mesa.id_mesa is not None else idx + 1,
                 bbox=mesa,
-                personas_detectadas=len(personas_en_mesa),
-                personas_bbox=personas_en_mesa
+                personas_detectadas=len(indices),
+                personas_bbox=[personas[j] for j in indices],
+                ids_personas=[int(ids[j]) for j in indices] if ids is not None else []
             ))
         
         return detecciones
@@ -420,36 +888,49 @@ class SistemaVisionMesas:
     
     # COMUNICACIÓN VÍA MQTT
 
-    def publicar_detecciones_mqtt(self, detecciones: List[DeteccionMesa]) -> bool:
+    def publicar_detecciones_mqtt(self, detecciones: List[DeteccionMesa],
+                                  tipo: str = TIPO_COMPLETO) -> bool:
         """
         Publica las detecciones al broker MQTT.
 
         Args:
             detecciones: Lista de detecciones de mesas
+            tipo: "completo" (todas las mesas) o "cambios" (solo las que
+                cambiaron de estado)
 
         Returns:
             True si la publicación fue exitosa, False en caso contrario
         """
+        # Preparar payload MQTT
+        payload = {
+            "timestamp": datetime.now().isoformat(),
+            "device_id": self.device_id,
+            "tipo": tipo,
+            "detecciones": [
+                {
+                    "id_mesa": det.id_mesa,
+                    "personas_detectadas": det.personas_detectadas,
+                    "confianza": round(det.bbox.confidence, 2),
+                    "ids_personas": det.ids_personas,
+                    "permanencia_segundos": (round(det.permanencia_segundos)
+                                             if det.permanencia_segundos is not None else None)
+                }
+                for det in detecciones
+            ]
+        }
+
         if not self.mqtt_connected:
-            logger.warning("No conectado al broker MQTT, saltando publicación...")
-            self.envios_fallidos += 1
+            self._guardar_offline(payload, "No conectado al broker MQTT")
             return False
 
-        try:
-            # Preparar payload MQTT
-            payload = {
-                "timestamp": datetime.now().isoformat(),
-                "device_id": self.device_id,
-                "detecciones": [
-                    {
-                        "id_mesa": det.id_mesa,
-                        "personas_detectadas": det.personas_detectadas,
-                        "confianza": round(det.bbox.confidence, 2)
-                    }
-                    for det in detecciones
-                ]
-            }
+        # Primero lo pendiente, para que el backend reciba todo en orden
+        if self.cola_offline is not None and len(self.cola_offline):
+            self.cola_offline.reenviar_lotes(self._publicar_lote_mqtt, LOTE_REENVIO)
+            if len(self.cola_offline):
+                self._guardar_offline(payload, "Reenvío de la cola offline incompleto")
+                return False
 
+        try:
             # Publicar al topic de ocupación
             result = self.mqtt_client.publish(
                 TOPIC_OCUPACION,
@@ -462,30 +943,102 @@ class SistemaVisionMesas:
                 logger.info(f"  Topic: {TOPIC_OCUPACION}")
                 logger.info(f"  Mesas: {len(detecciones)}")
                 self.envios_exitosos += 1
+                if self.primera_publicacion is None:
+                    self._registrar_primera_publicacion()
                 return True
             else:
-                logger.error(f"✗ Error publicando a MQTT (código: {result.rc})")
-                self.envios_fallidos += 1
+                self._guardar_offline(payload, f"✗ Error publicando a MQTT (código: {result.rc})")
                 return False
 
         except Exception as e:
-            logger.error(f"✗ Error inesperado publicando a MQTT: {e}")
-            self.envios_fallidos += 1
+            self._guardar_offline(payload, f"✗ Error inesperado publicando a MQTT: {e}")
+            return False
+
+    def construir_telemetria(self) -> dict:
+        """Resumen de salud del dispositivo para TOPIC_TELEMETRIA"""
+        telemetria = {
+            "timestamp": datetime.now().isoformat(),
+            "device_id": self.device_id,
+            "backend": (self.clasificador or self.model_personas).nombre,
+            "fps": round(self.medidor.fps(), 2),
+            "etapas_ms": {
+                etapa: {"p50": round(datos["p50_ms"], 1), "p95": round(datos["p95_ms"], 1)}
+                for etapa, datos in self.medidor.resumen().items()
+            },
+            "frames": self.contador_frames,
+            "frames_sin_inferencia": self.frames_sin_inferencia,
+            "cola_offline": len(self.cola_offline) if self.cola_offline is not None else 0,
+            "envios_fallidos": self.envios_fallidos,
+            "umbrales": self.umbrales.a_dict(),
+        }
+        telemetria.update(muestra_sistema())
+        for fuente in self.fuentes_telemetria:
+            telemetria.update(fuente())
+        return telemetria
+
+    def publicar_telemetria_si_corresponde(self, ahora: Optional[float] = None):
+        """Publica la telemetría cada INTERVALO_TELEMETRIA segundos (si hay conexión)"""
+        ahora = time.monotonic() if ahora is None else ahora
+        if not INTERVALO_TELEMETRIA or not self.mqtt_connected:
+            return
+        if ahora - self.ultima_telemetria < INTERVALO_TELEMETRIA:
+            return
+        self.ultima_telemetria = ahora
+
+        try:
+            # Retenida: el backend ve la última muestra apenas se suscribe.
+            # QoS 0 y sin cola offline: una muestra vieja no sirve de nada
+            self.mqtt_client.publish(
+                f"{TOPIC_TELEMETRIA}/{self.device_id}",
+                json.dumps(self.construir_telemetria()),
+                qos=0,
+                retain=True
+            )
+        except Exception as e:
+            logger.warning(f"No se pudo publicar la telemetría: {e}")
+
+    def _guardar_offline(self, payload: dict, motivo: str):
+        """Cuenta el envío fallido y guarda el mensaje en la cola offline"""
+        self.envios_fallidos += 1
+        if self.cola_offline is None:
+            logger.warning(f"{motivo}, saltando publicación...")
+            return
+        self.cola_offline.encolar(payload)
+        logger.warning(f"{motivo}: guardado en cola offline ({len(self.cola_offline)} pendientes)")
+
+    def _publicar_lote_mqtt(self, lote: List[dict]) -> bool:
+        """Publica varios mensajes pendientes en uno solo comprimido"""
+        if not self.mqtt_connected:
+            return False
+        try:
+            result = self.mqtt_client.publish(TOPIC_OCUPACION_LOTE, comprimir(lote), qos=1)
+            return result.rc == mqtt.MQTT_ERR_SUCCESS
+        except Exception as e:
+            logger.error(f"✗ Error reenviando cola offline: {e}")
             return False
     
-    def debe_actualizar_backend(self) -> bool:
+    def cerrar_mqtt(self):
         """
-        Verifica si es momento de enviar actualización al backend.
-        
-        Returns:
-            True si debe actualizar, False en caso contrario
+        Publica el estado offline del dispositivo, cierra la conexión y la
+        cola offline (lo pendiente se reenvía en el próximo arranque)
         """
-        tiempo_actual = time.time()
-        if tiempo_actual - self.ultimo_envio >= self.intervalo_actualizacion:
-            self.ultimo_envio = tiempo_actual
-            return True
-        return False
-    
+        if self.cola_offline is not None:
+            pendientes = len(self.cola_offline)
+            if pendientes:
+                logger.info(f"Cola offline: {pendientes} mensajes quedan para el próximo arranque")
+            self.cola_offline.cerrar()
+            self.cola_offline = None
+
+        if self.mqtt_connected:
+            self.mqtt_client.publish(
+                f"{TOPIC_DISPOSITIVOS}/{self.device_id}/estado",
+                "offline",
+                qos=1,
+                retain=True
+            )
+            self.mqtt_client.loop_stop()
+            self.mqtt_client.disconnect()
+
     # ==================== LOGS Y ESTADÍSTICAS ====================
     
     def mostrar_estadisticas_consola(self, detecciones: List[DeteccionMesa]):
@@ -503,8 +1056,12 @@ class SistemaVisionMesas:
                 estado_emoji = "🔴"
                 estado = "OCUPADA"
             
+            permanencia = ""
+            if det.permanencia_segundos is not None:
+                permanencia = f" · ocupada hace {int(det.permanencia_segundos // 60)} min"
             logger.info(f"{estado_emoji} Mesa {det.id_mesa} → {estado} "
-                       f"({det.personas_detectadas} persona{'s' if det.personas_detectadas != 1 else ''})")
+                       f"({det.personas_detectadas} persona{'s' if det.personas_detectadas != 1 else ''})"
+                       f"{permanencia}")
         
         logger.info("-" * 60)
         logger.info(f"Total de mesas: {len(detecciones)}")
@@ -513,83 +1070,227 @@ class SistemaVisionMesas:
         logger.info(f"Envíos exitosos/fallidos: {self.envios_exitosos}/{self.envios_fallidos}")
         logger.info("=" * 60)
     
+    def crear_lector(self, fuente):
+        """Lector de video con el backend de captura de config.py"""
+        return crear_lector(fuente, BACKEND_CAPTURA, ESCALA_DECODIFICACION, RESOLUCION_CAMARA, self.medidor)
+
+    def _adoptar_lector(self, lector):
+        """
+        Mide la lectura con el medidor del sistema y toma su escala de
+        decodificación: los filtros de área de mesas están pensados para
+        el frame completo y se dividen por escala²
+        """
+        lector.medidor = self.medidor
+        self.escala_frames = getattr(lector, "escala", 1)
+
+    def crear_captura(self, fuente, nombre: str = "captura", lector=None) -> CapturaUltimoFrame:
+        """
+        Thread de captura (último frame) con reconexión automática.
+        `lector` permite reutilizar uno ya abierto (ver abrir_camara())
+        """
+        if lector is None:
+            lector = self.crear_lector(fuente)
+        self._adoptar_lector(lector)
+        return CapturaUltimoFrame(fuente, nombre, lector,
+                                  RECONEXION_ESPERA_INICIAL, RECONEXION_ESPERA_MAXIMA)
+
+    def mostrar_tiempos_etapas(self):
+        """Muestra los tiempos por etapa y los FPS efectivos"""
+        resumen = self.medidor.resumen()
+        logger.info(f"⏱  FPS: {self.medidor.fps():.1f} | "
+                    f"Detecciones de mesas: {self.detecciones_mesas_ejecutadas}/{self.contador_frames} frames | "
+                    f"Sin inferencia (quietos): {self.frames_sin_inferencia}")
+        for etapa, datos in resumen.items():
+            logger.info(f"   {etapa:<12} prom {datos['promedio_ms']:7.1f} ms | "
+                        f"p50 {datos['p50_ms']:7.1f} ms | p95 {datos['p95_ms']:7.1f} ms | n={datos['n']}")
+    
+    # ==================== PROCESAMIENTO POR FRAME ====================
+
+    def procesar_frame(self, frame: np.ndarray,
+                       personas: Optional[CajasDetectadas] = None,
+                       ahora: Optional[float] = None) -> List[DeteccionMesa]:
+        """
+        Detecta personas, obtiene mesas (caché/layout) y las cruza.
+
+        Args:
+            frame: Frame de video
+            personas: Personas ya detectadas (p. ej. en un batch multicámara);
+                si es None se detectan aquí
+            ahora: Reloj del frame en segundos (por defecto time.monotonic();
+                el benchmark de replay pasa uno simulado)
+        """
+        self.contador_frames += 1
+        ahora = time.monotonic() if ahora is None else ahora
+
+        mesas = self.obtener_mesas(frame)
+        if personas is None:
+            if not self.requiere_inferencia(frame, mesas, ahora):
+                return self.reutilizar_ultimas()
+
+            if self.clasificador is not None:
+                return self._ocupacion_por_recortes(frame, mesas, ahora)
+
+            with self.medidor.medir("personas"):
+                if USAR_ROI_PERSONAS:
+                    personas = self.detectar_personas_roi(frame, mesas)
+                else:
+                    personas = self.detectar_personas(frame)
+
+        if self.compuerta is not None:
+            self.compuerta.marcar_inferencia(frame, ahora)
+
+        with self.medidor.medir("asignacion"):
+            if self.rastreador is None:
+                detecciones = self.asignar_personas_a_mesas(mesas, personas)
+            else:
+                detecciones = self._asignar_con_tracking(mesas, personas, ahora)
+
+        self.ultimas_detecciones = detecciones
+        return detecciones
+
+    def _ocupacion_por_recortes(self, frame: np.ndarray, mesas: List[BoundingBox],
+                                ahora: float) -> List[DeteccionMesa]:
+        """Motor "recortes": el clasificador cuenta las personas de cada mesa"""
+        mesas_xyxy = CajasDetectadas.desde_lista(mesas).xyxy
+        with self.medidor.medir("recortes"):
+            conteos, _ = self.clasificador.contar_frame(frame, mesas_xyxy, MARGEN_RECORTE_MESA)
+
+        if self.compuerta is not None:
+            self.compuerta.marcar_inferencia(frame, ahora)
+
+        detecciones = []
+        for idx, (mesa, personas) in enumerate(zip(mesas, conteos)):
+            id_mesa = mesa.id_mesa if mesa.id_mesa is not None else idx + 1
+            detecciones.append(DeteccionMesa(
+                id_mesa=id_mesa,
+                bbox=mesa,
+                personas_detectadas=int(personas),
+                personas_bbox=[],
+                permanencia_segundos=self.permanencia.actualizar(id_mesa, int(personas), ahora)
+            ))
+
+        self.ultimas_detecciones = detecciones
+        return detecciones
+
+    def requiere_inferencia(self, frame: np.ndarray, mesas: List[BoundingBox],
+                            ahora: Optional[float] = None) -> bool:
+        """False si la compuerta de movimiento permite reutilizar el último resultado"""
+        if self.compuerta is None or self.ultimas_detecciones is None:
+            return True
+        with self.medidor.medir("movimiento"):
+            return self.compuerta.hay_que_inferir(frame, CajasDetectadas.desde_lista(mesas).xyxy, ahora)
+
+    def reutilizar_ultimas(self) -> List[DeteccionMesa]:
+        """Resultado para un frame sin cambios: el de la última inferencia"""
+        self.frames_sin_inferencia += 1
+        return self.ultimas_detecciones
+
+    def _asignar_con_tracking(self, mesas: List[BoundingBox],
+                              personas: CajasDetectadas, ahora: float) -> List[DeteccionMesa]:
+        """
+        Asigna a las mesas las personas seguidas (no las detecciones crudas
+        del frame) y calcula la permanencia de cada mesa ocupada
+        """
+        tracks = self.rastreador.actualizar(personas.xyxy, personas.conf, ahora)
+
+        seguidas = CajasDetectadas(
+            np.array([t.xyxy for t in tracks], dtype=np.int32).reshape(-1, 4),
+            np.array([t.conf for t in tracks], dtype=np.float32),
+            "Persona"
+        )
+        ids = np.array([t.id for t in tracks], dtype=np.int64)
+        detecciones = self.asignar_personas_a_mesas(mesas, seguidas, ids)
+
+        mesa_por_track = {}
+        for det in detecciones:
+            for id_track in det.ids_personas:
+                mesa_por_track.setdefault(id_track, det.id_mesa)
+            det.permanencia_segundos = self.permanencia.actualizar(
+                det.id_mesa, det.personas_detectadas, ahora)
+        self.rastreador.registrar_mesas(tracks, mesa_por_track, ahora)
+
+        return detecciones
+
+    def publicar_si_corresponde(self, detecciones: List[DeteccionMesa],
+                                ahora: Optional[float] = None):
+        """
+        Publica a MQTT según la política: cambios de estado por mesa
+        (con debounce) y estado completo periódico. `ahora` reemplaza al
+        reloj real (ver procesar_frame)
+        """
+        self.publicar_telemetria_si_corresponde(ahora)
+
+        envio = self.politica.evaluar(detecciones, ahora)
+        if envio is None:
+            return
+
+        lote, tipo = envio
+        self.total_envios += 1
+        with self.medidor.medir("publicacion"):
+            self.publicar_detecciones_mqtt(lote, tipo)
+
+        if tipo == TIPO_COMPLETO:
+            self.mostrar_estadisticas_consola(detecciones)
+        else:
+            for det in lote:
+                estado = "OCUPADA" if det.personas_detectadas > 0 else "DISPONIBLE"
+                logger.info(f"↻ Mesa {det.id_mesa} → {estado} ({det.personas_detectadas} personas)")
+
+    def _manejar_tecla(self, detecciones: List[DeteccionMesa]) -> bool:
+        """Procesa el teclado de la ventana. Retorna False si hay que salir"""
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord('q'):
+            logger.info("Saliendo...")
+            return False
+        elif key == ord('s') and detecciones:
+            # No publicar desde aquí: en modo pipeline competiría con el thread
+            # de publicación por la cola offline. Se fuerza un envío completo
+            # en el próximo frame, que pasa por la política como cualquier otro
+            logger.info("Publicación manual solicitada...")
+            self.politica.ultimo_completo = 0
+        elif key == ord('e'):
+            if detecciones:
+                self.mostrar_estadisticas_consola(detecciones)
+            else:
+                logger.info("No hay detecciones para mostrar")
+        return True
+
     # ==================== BUCLE PRINCIPAL ====================
     
-    def ejecutar(self, usar_webcam: bool = False, webcam_index: int = 0):
+    def ejecutar(self, usar_webcam: bool = False, webcam_index: int = 0,
+                 usar_pipeline: bool = USAR_PIPELINE, lector=None):
         """
         Ejecuta el sistema de visión en tiempo real.
         
         Args:
             usar_webcam: Si True, usa webcam local en lugar de IP
             webcam_index: Índice de la webcam (0 para la predeterminada)
+            usar_pipeline: Si True, captura, inferencia y publicación corren
+                en threads separados (ver pipeline.py)
+            lector: Lector de la cámara ya abierto (ver abrir_camara()); si
+                es None se abre aquí
         """
         logger.info(" Iniciando sistema de visión...")
         
-        # Conectar a cámara
         if usar_webcam:
             logger.info(f"Conectando a webcam {webcam_index}...")
-            cap = cv2.VideoCapture(webcam_index)
+            fuente = webcam_index
         else:
             logger.info(f"Conectando a cámara IP: {self.ip_webcam}...")
-            cap = cv2.VideoCapture(self.ip_webcam)
-        
-        if not cap.isOpened():
-            logger.error(" No se pudo conectar a la cámara")
-            logger.error("Verifica:")
-            logger.error("  1. La IP está correcta")
-            logger.error("  2. Estás en la misma red")
-            logger.error("  3. La aplicación IP Webcam está corriendo")
-            return
-        
-        logger.info("Conectado a la cámara")
-        logger.info(f"Publicando detecciones vía MQTT cada {self.intervalo_actualizacion} segundos")
-        logger.info(f"Broker MQTT: {self.broker_host}:{self.broker_port}")
-        logger.info("Presiona 'q' para salir | 's' para publicación manual | 'e' para estadísticas")
-        logger.info("")
+            fuente = self.ip_webcam
         
         try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    logger.error("Conexión con cámara perdida")
-                    break
-                
-                self.contador_frames += 1
-                
-                # 1. Detectar personas y mesas
-                personas = self.detectar_personas(frame)
-                mesas = self.detectar_mesas(frame)
-                
-                # 2. Asignar personas a mesas
-                detecciones = self.asignar_personas_a_mesas(mesas, personas)
-                
-                # 3. Dibujar visualización
-                frame_anotado = self.dibujar_detecciones(frame, detecciones)
-                
-                # 4. Publicar detecciones a MQTT automáticamente
-                if detecciones and self.debe_actualizar_backend():
-                    self.total_envios += 1
-                    self.publicar_detecciones_mqtt(detecciones)
-                    self.mostrar_estadisticas_consola(detecciones)
-                
-                # 5. Mostrar frame
-                cv2.imshow('Sistema de Visión - Mesas del Restaurante', frame_anotado)
-                
-                # 6. Manejar teclas
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q'):
-                    logger.info("Saliendo...")
-                    break
-                elif key == ord('s') and detecciones:
-                    logger.info("Publicación manual solicitada...")
-                    self.total_envios += 1
-                    self.publicar_detecciones_mqtt(detecciones)
-                    self.mostrar_estadisticas_consola(detecciones)
-                elif key == ord('e'):
-                    if detecciones:
-                        self.mostrar_estadisticas_consola(detecciones)
-                    else:
-                        logger.info("No hay detecciones para mostrar")
+            if not self.listo:
+                self.calentar()
+
+            if PREVIEW_PUERTO:
+                self.preview = ServidorPreview(self.dibujar_detecciones, PREVIEW_PUERTO, PREVIEW_FPS)
+                self.preview.iniciar()
+
+            if usar_pipeline:
+                self._bucle_pipeline(fuente, lector)
+            else:
+                self._bucle_secuencial(fuente, lector)
         
         except KeyboardInterrupt:
             logger.info("\nInterrumpido por el usuario")
@@ -599,87 +1300,227 @@ class SistemaVisionMesas:
             traceback.print_exc()
         finally:
             # Limpieza
-            cap.release()
-            cv2.destroyAllWindows()
+            if self.preview is not None:
+                self.preview.detener()
+            if self.mostrar_ventana:
+                cv2.destroyAllWindows()
 
             # Publicar estado offline
-            if self.mqtt_connected:
-                self.mqtt_client.publish(
-                    f"{TOPIC_DISPOSITIVOS}/{self.device_id}/estado",
-                    "offline",
-                    qos=1,
-                    retain=True
-                )
-                self.mqtt_client.loop_stop()
-                self.mqtt_client.disconnect()
+            self.cerrar_mqtt()
 
             # Estadísticas finales
             logger.info("\n" + "=" * 60)
             logger.info("ESTADÍSTICAS FINALES")
             logger.info("=" * 60)
             logger.info(f"Frames procesados: {self.contador_frames}")
-            logger.info(f"Total de envíos: {self.total_envios}")
+            logger.info(f"Detecciones de mesas ejecutadas: {self.detecciones_mesas_ejecutadas}")
+            logger.info(f"Total de envíos: {self.total_envios} "
+                        f"(completos {self.politica.envios_completos} / cambios {self.politica.envios_cambios})")
             logger.info(f"Envíos exitosos: {self.envios_exitosos}")
             logger.info(f"Envíos fallidos: {self.envios_fallidos}")
             if self.total_envios > 0:
                 tasa_exito = (self.envios_exitosos / self.total_envios) * 100
                 logger.info(f"Tasa de éxito: {tasa_exito:.1f}%")
+            if self.rastreador is not None:
+                for id_mesa, segundos in sorted(self.rastreador.estancia_promedio().items()):
+                    logger.info(f"Estancia promedio mesa {id_mesa}: {segundos / 60:.1f} min")
+            self.mostrar_tiempos_etapas()
             logger.info("=" * 60)
             logger.info("✓ Sistema finalizado correctamente")
 
+    def _log_conectado(self):
+        logger.info("Conectado a la cámara")
+        if self.politica.solo_cambios:
+            logger.info(f"Publicando cambios vía MQTT (debounce {DEBOUNCE_CAMBIOS}s, "
+                        f"estado completo cada {INTERVALO_HEARTBEAT}s)")
+        else:
+            logger.info(f"Publicando detecciones vía MQTT cada {self.intervalo_actualizacion} segundos")
+        logger.info(f"Broker MQTT: {self.broker_host}:{self.broker_port}")
+        if self.mostrar_ventana:
+            logger.info("Presiona 'q' para salir | 's' para publicación manual | 'e' para estadísticas")
+        else:
+            logger.info("Modo headless (sin ventana). Ctrl+C para salir")
+        logger.info("")
+
+    def _log_error_camara(self):
+        logger.error(" No se pudo conectar a la cámara")
+        logger.error("Verifica:")
+        logger.error("  1. La IP está correcta")
+        logger.error("  2. Estás en la misma red")
+        logger.error("  3. La aplicación IP Webcam está corriendo")
+
+    def _bucle_secuencial(self, fuente, lector=None):
+        """Captura, inferencia, publicación y visualización en un solo thread"""
+        if lector is None:
+            lector = self.crear_lector(fuente)
+        self._adoptar_lector(lector)
+        if not (lector.abierto or lector.abrir()):
+            self._log_error_camara()
+            return
+        self._hito("camara")
+
+        self._log_conectado()
+        sin_detener = threading.Event()
+        try:
+            while True:
+                frame = lector.leer()
+                if frame is None:
+                    if es_archivo(fuente):
+                        logger.info("Fin del video")
+                        break
+                    logger.error("Conexión con cámara perdida")
+                    if not reconectar(lector, sin_detener, RECONEXION_ESPERA_INICIAL, RECONEXION_ESPERA_MAXIMA):
+                        break
+                    continue
+                
+                # 1-2. Detectar y asignar personas a mesas
+                detecciones = self.procesar_frame(frame)
+                
+                # 3. Publicar detecciones a MQTT automáticamente
+                self.publicar_si_corresponde(detecciones)
+
+                self.medidor.marcar_frame()
+                if self.contador_frames % MOSTRAR_STATS_CADA == 0:
+                    self.mostrar_tiempos_etapas()
+
+                # 4. Vista previa HTTP (solo guarda la referencia)
+                if self.preview is not None:
+                    self.preview.actualizar(frame, detecciones)
+
+                if not self.mostrar_ventana:
+                    continue
+
+                # 5. Dibujar y mostrar frame
+                with self.medidor.medir("dibujo"):
+                    frame_anotado = self.dibujar_detecciones(frame, detecciones)
+                cv2.imshow('Sistema de Visión - Mesas del Restaurante', frame_anotado)
+                
+                # 6. Manejar teclas
+                if not self._manejar_tecla(detecciones):
+                    break
+        finally:
+            lector.cerrar()
+
+    def _bucle_pipeline(self, fuente, lector=None):
+        """
+        Captura, inferencia y publicación en threads separados; este thread
+        (el principal, requerido por cv2.imshow) solo visualiza, o en modo
+        headless solo alimenta la vista previa y muestra estadísticas.
+        """
+        pipeline = PipelineVision(self, fuente, TAMANO_COLA_PIPELINE, lector)
+        if not pipeline.iniciar():
+            self._log_error_camara()
+            return
+        self._hito("camara")
+
+        self._log_conectado()
+        ultimo_reporte = 0
+        try:
+            while pipeline.activo:
+                resultado = pipeline.ultimo_resultado(timeout=0.5)
+                if resultado is None:
+                    continue
+                frame, detecciones = resultado
+
+                if self.contador_frames - ultimo_reporte >= MOSTRAR_STATS_CADA:
+                    ultimo_reporte = self.contador_frames
+                    self.mostrar_tiempos_etapas()
+                    pipeline.mostrar_reporte()
+
+                if self.preview is not None:
+                    self.preview.actualizar(frame, detecciones)
+
+                if not self.mostrar_ventana:
+                    continue
+
+                with self.medidor.medir("dibujo"):
+                    frame_anotado = self.dibujar_detecciones(frame, detecciones)
+                cv2.imshow('Sistema de Visión - Mesas del Restaurante', frame_anotado)
+
+                if not self._manejar_tecla(detecciones):
+                    break
+        finally:
+            pipeline.detener()
+            pipeline.mostrar_reporte()
+
 
 # ==================== FUNCIÓN PRINCIPAL ====================
 
+def _env_bool(nombre: str) -> bool:
+    return os.environ.get(nombre, "").strip().lower() in ("1", "true", "si", "sí", "yes")
+
+
+def _parsear_fuente(valor: str):
+    """Índice de webcam local (número) o URL de cámara IP"""
+    return int(valor) if str(valor).isdigit() else valor
+
+
 def main():
-    """Función principal para ejecutar el sistema"""
+    """
+    Función principal para ejecutar el sistema.
+
+    No es interactiva (se puede lanzar desde systemd): cada opción se toma
+    de la línea de comandos, si no de la variable de entorno indicada y si
+    no de config.py.
+    """
     print("""
 
      Sistema de Visión Artificial para Gestión de Mesas       
             Restaurante - Sistema de Reservaciones     
           -----------------------------------------------             
     """)
-    
-    # VARIABLES LOCALES
-    ip_webcam_local = IP_WEBCAM
-    broker_host_local = BROKER_HOST
-    broker_port_local = BROKER_PORT
-    intervalo_local = INTERVALO_ACTUALIZACION
-
-    print("\n🔧 CONFIGURACIÓN")
-    print("-" * 60)
-
-    opcion = input("¿Usar webcam local? (s/n) [n]: ").strip().lower()
-    usar_webcam = opcion == 's'
-
-    if usar_webcam:
-        webcam_index = input("Índice de webcam [0]: ").strip()
-        webcam_index = int(webcam_index) if webcam_index else 0
-    else:
-        ip = input(f"IP de cámara [{IP_WEBCAM}]: ").strip()
-        if ip:
-            ip_webcam_local = ip
-        webcam_index = 0
-
-    broker = input(f"IP del broker MQTT [{BROKER_HOST}]: ").strip()
-    if broker:
-        broker_host_local = broker
-
-    intervalo = input(f"Intervalo de actualización en segundos [{INTERVALO_ACTUALIZACION}]: ").strip()
-    if intervalo:
-        intervalo_local = int(intervalo)
-
-    print("\n✓ Configuración completada\n")
-
-    # INICIALIZACIÓN DEL SISTEMA
-    sistema = SistemaVisionMesas(
-        ip_webcam=webcam_index if usar_webcam else ip_webcam_local,
-        broker_host=broker_host_local,
-        broker_port=broker_port_local,
-        intervalo_actualizacion=intervalo_local
+
+    parser = argparse.ArgumentParser(
+        description="Sistema de visión de mesas",
+        epilog="Ejemplo systemd: ExecStart=/usr/bin/python3 vision_system.py --headless "
+               "con Environment=VISION_CAMARA=http://192.168.1.125:8080/video"
     )
-    
-    sistema.ejecutar(usar_webcam=usar_webcam, webcam_index=webcam_index)
+    parser.add_argument("--camara", default=os.environ.get("VISION_CAMARA",
+                                                           WEBCAM_INDEX if USAR_WEBCAM_LOCAL else IP_WEBCAM),
+                        help="URL de la cámara IP o índice de webcam local (env VISION_CAMARA)")
+    parser.add_argument("--broker", default=os.environ.get("VISION_BROKER", BROKER_HOST),
+                        help="IP del broker MQTT (env VISION_BROKER)")
+    parser.add_argument("--puerto", type=int, default=int(os.environ.get("VISION_PUERTO", BROKER_PORT)),
+                        help="Puerto del broker MQTT (env VISION_PUERTO)")
+    parser.add_argument("--intervalo", type=int,
+                        default=int(os.environ.get("VISION_INTERVALO", INTERVALO_ACTUALIZACION)),
+                        help="Segundos entre actualizaciones (env VISION_INTERVALO)")
+    parser.add_argument("--device-id", default=os.environ.get("VISION_DEVICE_ID", DEVICE_ID),
+                        help="ID del dispositivo en los topics MQTT (env VISION_DEVICE_ID)")
+    parser.add_argument("--headless", action="store_true", default=_env_bool("VISION_HEADLESS") or not MOSTRAR_VENTANA,
+                        help="Sin ventana (env VISION_HEADLESS=1)")
+    parser.add_argument("--secuencial", action="store_true", default=_env_bool("VISION_SECUENCIAL"),
+                        help="Todo en un thread, sin pipeline (env VISION_SECUENCIAL=1)")
+    args = parser.parse_args()
+
+    fuente = _parsear_fuente(args.camara)
+    usar_webcam = isinstance(fuente, int)
+    logger.info(f"Cámara: {fuente} | Broker: {args.broker}:{args.puerto} | Dispositivo: {args.device_id}")
+
+    # La cámara se abre mientras se cargan los modelos y conecta MQTT
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="abrir-camara") as ejecutor:
+        camara = ejecutor.submit(abrir_camara, fuente)
+
+        sistema = SistemaVisionMesas(
+            ip_webcam=fuente,
+            broker_host=args.broker,
+            broker_port=args.puerto,
+            intervalo_actualizacion=args.intervalo,
+            device_id=args.device_id,
+            mostrar_ventana=not args.headless
+        )
+        sistema.calentar()
+
+        lector, abierta_en = camara.result()
+        if lector is not None:
+            sistema.hitos_arranque["camara"] = abierta_en
 
+    sistema.ejecutar(
+        usar_webcam=usar_webcam,
+        webcam_index=fuente if usar_webcam else 0,
+        usar_pipeline=not args.secuencial,
+        lector=lector
+    )
 
 
 if __name__ == "__main__":